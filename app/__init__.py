@@ -4,12 +4,13 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from .config import Config
 from flask_jwt_extended import JWTManager
+from .replicas import SessaoRoteada
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})
 migrate = Migrate()
 jwt = JWTManager()
 
-def create_app(testing=False):
+def create_app(testing=False, config=None):
     app = Flask(__name__)
 
     # Config padrão
@@ -20,12 +21,88 @@ def create_app(testing=False):
         app.config["TESTING"] = True
         app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
         app.config["JWT_SECRET_KEY"] = "test-secret"
+        app.config["AUDITORIA_ASSINCRONA"] = False
+        app.config["SQLALCHEMY_REPLICA_URIS"] = []
+        app.config["CACHE_URL"] = None
+        app.config["TELEMEDICINA_REGISTRO_URL"] = None
+        app.config["EVENTOS_URL"] = None
+
+    if config:
+        app.config.update(config)
+
+    from .database import opcoes_engine, prepara_engines, metricas_pool
+    from .replicas import RoteadorReplicas
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opcoes_engine(app.config)
 
     db.init_app(app)
+    replicas = RoteadorReplicas(app)
+
+    with app.app_context():
+        engines = {**db.engines, **replicas.engines}
+
+    prepara_engines(app, engines.values())
     migrate.init_app(app, db)
     jwt.init_app(app)
 
     from . import models
+    from .audit import FilaAuditoria
+    from .services.security import VerificadorSenhas
+    from .metrics import Metricas
+    from .cache import CacheEntidades
+    from .sessoes import RegistroSessoes
+    from .eventos import CanalEventos
+
+    fila_auditoria = FilaAuditoria(app)
+    verificador_senhas = VerificadorSenhas(app)
+    metricas = Metricas(app)
+    cache_entidades = CacheEntidades(app)
+    registro_sessoes = RegistroSessoes(app)
+    canal_eventos = CanalEventos(app)
+
+    metricas.registra_gauge(
+        "vidaplus_auditoria_fila", "Logs de auditoria aguardando gravação.",
+        lambda: fila_auditoria.profundidade
+    )
+    metricas.registra_gauge(
+        "vidaplus_auditoria_gravados_total", "Logs de auditoria gravados em lote.",
+        lambda: fila_auditoria.registros_gravados, tipo="counter"
+    )
+    metricas.registra_gauge(
+        "vidaplus_auditoria_spool_total", "Logs de auditoria enviados ao spool local.",
+        lambda: fila_auditoria.registros_em_spool, tipo="counter"
+    )
+    metricas.registra_gauge(
+        "vidaplus_auditoria_descartados_total", "Logs de auditoria recusados pelo banco e gravados em descartados-*.ndjson.",
+        lambda: fila_auditoria.registros_descartados, tipo="counter"
+    )
+    metricas.registra_gauge(
+        "vidaplus_db_pool", "Estado do pool de conexões com o banco.",
+        lambda: metricas_pool(engines)
+    )
+    metricas.registra_gauge(
+        "vidaplus_replicas", "Disponibilidade e leituras atendidas por réplica.",
+        replicas.metricas
+    )
+    metricas.registra_gauge(
+        "vidaplus_cache", "Acertos, falhas e entradas do cache de entidades.",
+        lambda: [({"metrica": chave}, valor) for chave, valor in cache_entidades.metricas().items()]
+    )
+    metricas.registra_gauge(
+        "vidaplus_telemedicina_sessoes_ativas", "Sessões de telemedicina em andamento.",
+        lambda: len(registro_sessoes.ativas())
+    )
+    metricas.registra_gauge(
+        "vidaplus_eventos", "Conexões SSE abertas neste processo e eventos publicados.",
+        lambda: [({"metrica": chave}, valor) for chave, valor in canal_eventos.metricas().items()]
+    )
+    metricas.registra_gauge(
+        "vidaplus_login_verificacao", "Estado do pool de verificação de senhas.",
+        lambda: [({"metrica": chave}, valor) for chave, valor in verificador_senhas.metricas().items()]
+    )
+
+    from .comandos import manutencao
+    app.cli.add_command(manutencao)
 
     from .routes.pacientes import api as pacientes_ns
     from .routes.profissionais import api as profissionais_ns
@@ -55,6 +132,10 @@ def create_app(testing=False):
         security="Bearer Auth"
     )
 
+    # Encoder JSON rápido (orjson quando disponível) para todos os namespaces
+    from .serializacao import saida_json
+    api.representation("application/json")(saida_json)
+
     api.add_namespace(pacientes_ns)
     api.add_namespace(profissionais_ns)
     api.add_namespace(telemedicina_ns)
@@ -0,0 +1,187 @@
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Chaves do environ WSGI usadas entre o adaptador e as rotas de streaming
+CHAVE_LOOP = "vidaplus.asgi.loop"
+CHAVE_FLUXO = "vidaplus.asgi.fluxo"
+
+class AdaptadorAsgi:
+    """Serve a aplicação Flask por ASGI (uvicorn, hypercorn).
+
+    Cada requisição roda a aplicação WSGI em um pool limitado de threads, onde
+    ficam o acesso ao banco e a serialização. Rotas de longa duração (SSE da
+    telemedicina) encontram o loop em `environ[CHAVE_LOOP]`, retornam só os
+    cabeçalhos e deixam em `environ[CHAVE_FLUXO]` um iterador assíncrono que o
+    adaptador transmite no loop, sem ocupar uma thread enquanto o cliente
+    espera. Assim um processo sustenta milhares de conexões em espera com
+    `threads` requisições de banco simultâneas.
+    """
+
+    def __init__(self, app, threads=None):
+        self.app = app
+        self.threads = threads or app.config["ASGI_THREADS"]
+        self.executor = None
+
+    def obtem_executor(self):
+        # Criado no processo do worker, depois do fork
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi")
+
+        return self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.ciclo_de_vida(receive, send)
+        elif scope["type"] == "http":
+            await self.requisicao(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Tipo de conexão ASGI não suportado: {scope['type']}")
+
+    async def ciclo_de_vida(self, receive, send):
+        while True:
+            mensagem = await receive()
+
+            if mensagem["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def requisicao(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        executor = self.obtem_executor()
+        environ = monta_environ(scope, await le_corpo(receive))
+        environ[CHAVE_LOOP] = loop
+        inicio = {}
+
+        def start_response(status, cabecalhos, exc_info=None):
+            inicio["status"] = int(status.split(" ", 1)[0])
+            inicio["headers"] = [(nome.lower().encode("latin-1"), valor.encode("latin-1")) for nome, valor in cabecalhos]
+            return lambda dados: None
+
+        corpo = await loop.run_in_executor(executor, self.app, environ, start_response)
+        iterador = iter(corpo)
+
+        try:
+            # O start_response pode ser chamado só na primeira iteração
+            primeiro = await loop.run_in_executor(executor, next, iterador, None)
+            fluxo = environ.get(CHAVE_FLUXO)
+
+            if fluxo is not None:
+                # O corpo vem do fluxo, não da resposta WSGI (vazia)
+                cabecalhos = [(nome, valor) for nome, valor in inicio["headers"] if nome != b"content-length"]
+                await send({"type": "http.response.start", "status": inicio["status"], "headers": cabecalhos})
+                await transmite(fluxo, receive, send)
+                return
+
+            await send({"type": "http.response.start", "status": inicio["status"], "headers": inicio["headers"]})
+
+            while primeiro is not None:
+                if primeiro:
+                    await send({"type": "http.response.body", "body": primeiro, "more_body": True})
+
+                primeiro = await loop.run_in_executor(executor, next, iterador, None)
+
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(corpo, "close"):
+                await loop.run_in_executor(executor, corpo.close)
+
+            if environ.get(CHAVE_FLUXO) is not None:
+                environ[CHAVE_FLUXO].fecha()
+
+async def le_corpo(receive):
+    partes = []
+
+    while True:
+        mensagem = await receive()
+
+        if mensagem["type"] == "http.disconnect":
+            break
+
+        partes.append(mensagem.get("body", b""))
+
+        if not mensagem.get("more_body"):
+            break
+
+    return b"".join(partes)
+
+def monta_environ(scope, corpo):
+    servidor = scope.get("server") or ("localhost", 80)
+    cliente = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(servidor[0]),
+        "SERVER_PORT": str(servidor[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": cliente[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(corpo),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        # uvicorn --workers N roda cada worker como filho do processo supervisor
+        "wsgi.multiprocess": multiprocessing.parent_process() is not None,
+        "wsgi.run_once": False
+    }
+
+    for nome, valor in scope.get("headers", []):
+        nome = nome.decode("latin-1").upper().replace("-", "_")
+        valor = valor.decode("latin-1")
+
+        if nome in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            chave = nome
+        else:
+            chave = f"HTTP_{nome}"
+
+        environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+
+    # O corpo já foi lido inteiro (inclusive se veio em chunks)
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    environ["CONTENT_LENGTH"] = str(len(corpo))
+
+    return environ
+
+async def espera_desconexao(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+async def transmite(fluxo, receive, send):
+    """Envia o fluxo assíncrono até ele terminar ou o cliente desconectar."""
+    desconexao = asyncio.ensure_future(espera_desconexao(receive))
+    iterador = fluxo.__aiter__()
+
+    try:
+        while True:
+            proximo = asyncio.ensure_future(iterador.__anext__())
+            await asyncio.wait({proximo, desconexao}, return_when=asyncio.FIRST_COMPLETED)
+
+            if not proximo.done():
+                proximo.cancel()
+
+                with contextlib.suppress(asyncio.CancelledError):
+                    await proximo
+
+                return
+
+            try:
+                pedaco = proximo.result()
+            except StopAsyncIteration:
+                break
+
+            await send({"type": "http.response.body", "body": pedaco.encode("utf-8"), "more_body": True})
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        desconexao.cancel()
+        await iterador.aclose()
+        fluxo.fecha()
@@ -1,14 +1,361 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
 from app import db
 from app.models import LogAuditoria
-from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+REIVINDICADO = re.compile(r"^(.*\.ndjson)\.(\d+)\.processando$")
+
+def trava_arquivo(arquivo):
+    # flock exclusivo entre processos; sem fcntl (Windows) vale só a trava da instância
+    if fcntl is not None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+
+def processo_ativo(pid):
+    if pid == os.getpid():
+        return True
+
+    if os.name != "posix":
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+def recusa_definitiva(erro):
+    """Erros que se repetiriam a cada nova tentativa com a mesma linha."""
+    return isinstance(erro, (IntegrityError, DataError))
+
+class FilaAuditoria:
+    """Grava os logs de auditoria em lote a partir de uma thread em segundo plano.
+
+    Os registros são enfileirados em memória e descarregados com um único
+    INSERT multi-linha quando o lote enche ou o intervalo de flush expira.
+    Se o banco estiver indisponível o lote vai para um arquivo de spool
+    local, que é reprocessado no próximo flush bem-sucedido.
+
+    Quem grava no spool e quem o reivindica seguram o mesmo flock, e arquivos
+    reivindicados por um processo que morreu antes de apagá-los são
+    retomados pelos demais (e pelo próprio processo ao iniciar).
+
+    Se o INSERT em lote falhar, as linhas são tentadas uma a uma: as que o
+    banco recusa de vez (FK de usuário excluído, valor grande demais) vão para
+    um arquivo de descartados, para não travarem os flushes seguintes.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.fila = None
+        self.thread = None
+        self.pid = None
+        self.trava = threading.Lock()
+        self.parar = threading.Event()
+        self.registros_gravados = 0
+        self.registros_em_spool = 0
+        self.registros_descartados = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.tamanho_lote = app.config["AUDITORIA_TAMANHO_LOTE"]
+        self.intervalo_flush = app.config["AUDITORIA_INTERVALO_FLUSH"]
+        self.diretorio_spool = app.config.get("AUDITORIA_DIRETORIO_SPOOL") or os.path.join(app.instance_path, "auditoria_spool")
+        self.fila = queue.Queue(maxsize=app.config["AUDITORIA_TAMANHO_FILA"])
+
+        app.extensions["auditoria"] = self
+
+    @property
+    def profundidade(self):
+        return self.fila.qsize() if self.fila else 0
+
+    def enfileira(self, registro):
+        self.garante_thread()
+
+        try:
+            self.fila.put_nowait(registro)
+        except queue.Full:
+            # Fila cheia: não bloqueia a requisição, manda direto para o spool
+            self.grava_spool([registro])
+
+    def garante_thread(self):
+        """Inicia a thread no processo atual (também após o fork dos workers)."""
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            return
+
+        with self.trava:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+
+            if self.pid != os.getpid():
+                # Processo filho herda a fila do pai, mas não a thread
+                self.fila = queue.Queue(maxsize=self.fila.maxsize)
+                self.parar = threading.Event()
+                atexit.register(self.encerra)
+
+            self.pid = os.getpid()
+            self.retoma_spool_orfao(inicio=True)
+            self.thread = threading.Thread(target=self.executa, name="auditoria", daemon=True)
+            self.thread.start()
+
+    def executa(self):
+        while not self.parar.is_set():
+            try:
+                lote = self.coleta_lote()
+
+                if lote:
+                    self.descarrega(lote)
+            except Exception:
+                # Nada pode encerrar a thread: os próximos lotes ainda precisam ser gravados
+                logger.exception("Falha inesperada na gravação da auditoria.")
+                self.parar.wait(self.intervalo_flush)
+
+    def coleta_lote(self):
+        try:
+            lote = [self.fila.get(timeout=self.intervalo_flush)]
+        except queue.Empty:
+            return []
+
+        limite = time.monotonic() + self.intervalo_flush
+
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+
+            if restante <= 0:
+                break
+
+            try:
+                lote.append(self.fila.get(timeout=restante))
+            except queue.Empty:
+                break
+
+        return lote
+
+    def descarrega(self, lote):
+        """Insere o spool pendente e o lote, cada um em sua própria transação."""
+        pendentes, arquivos = self.reivindica_spool()
+
+        try:
+            if pendentes:
+                self.grava(pendentes)
+        except Exception:
+            # Ex.: spool sem espaço; os arquivos voltam a ser reivindicáveis e o lote segue
+            logger.exception("Falha ao reprocessar o spool de auditoria.")
+            self.devolve_spool(arquivos)
+        else:
+            # Só apaga o spool depois que as linhas foram gravadas, devolvidas ao spool ou descartadas
+            for arquivo in arquivos:
+                os.remove(arquivo)
+
+        if lote:
+            self.grava(lote)
+
+    def grava(self, registros):
+        """Grava no banco; falhas temporárias vão para o spool e recusas definitivas para os descartados."""
+        with self.app.app_context():
+            try:
+                erro = self.insere(registros)
+
+                if erro is None:
+                    self.registros_gravados += len(registros)
+                    return
+
+                if not recusa_definitiva(erro):
+                    logger.error("Falha ao gravar %s logs de auditoria; enviando para o spool.", len(registros), exc_info=erro)
+                    self.grava_spool(registros)
+                    return
+
+                # Alguma linha é inválida: isola as que o banco recusa
+                temporarias = []
+                recusadas = []
+
+                for registro in registros:
+                    erro = self.insere([registro])
+
+                    if erro is None:
+                        self.registros_gravados += 1
+                    elif recusa_definitiva(erro):
+                        recusadas.append(registro)
+                    else:
+                        temporarias.append(registro)
+
+                if temporarias:
+                    self.grava_spool(temporarias)
+
+                if recusadas:
+                    logger.error("%s logs de auditoria recusados pelo banco; gravados em %s.", len(recusadas), self.diretorio_spool)
+                    self.grava_descartados(recusadas)
+            finally:
+                db.session.remove()
+
+    def insere(self, registros):
+        try:
+            db.session.execute(insert(LogAuditoria), registros)
+            db.session.commit()
+        except Exception as erro:
+            db.session.rollback()
+            return erro
+
+    def esvazia_fila(self):
+        lote = []
+
+        while True:
+            try:
+                lote.append(self.fila.get_nowait())
+            except queue.Empty:
+                return lote
+
+    def encerra(self):
+        """Para a thread e grava o que ainda estiver na fila."""
+        if self.pid != os.getpid():
+            return
+
+        self.parar.set()
+
+        if self.thread is not None:
+            self.thread.join(timeout=self.intervalo_flush * 2)
+
+        lote = self.esvazia_fila()
+
+        if lote:
+            self.descarrega(lote)
+
+    def grava_spool(self, registros):
+        self.acrescenta(f"auditoria-{os.getpid()}.ndjson", registros)
+        self.registros_em_spool += len(registros)
+
+    def grava_descartados(self, registros):
+        # Fora do padrão auditoria-*.ndjson: não é reprocessado automaticamente
+        self.acrescenta(f"descartados-{os.getpid()}.ndjson", registros)
+        self.registros_descartados += len(registros)
+
+    def acrescenta(self, nome, registros):
+        os.makedirs(self.diretorio_spool, exist_ok=True)
+        caminho = os.path.join(self.diretorio_spool, nome)
+
+        linhas = "".join(json.dumps({**r, "data_hora": r["data_hora"].isoformat()}) + "\n" for r in registros)
+
+        with self.trava:
+            while True:
+                with open(caminho, "a", encoding="utf-8") as arquivo:
+                    trava_arquivo(arquivo)
+
+                    # Se o arquivo foi reivindicado (renomeado) antes do flock, abre um novo
+                    try:
+                        mesmo_arquivo = os.stat(caminho).st_ino == os.fstat(arquivo.fileno()).st_ino
+                    except FileNotFoundError:
+                        mesmo_arquivo = False
+
+                    if not mesmo_arquivo:
+                        continue
+
+                    arquivo.write(linhas)
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                    break
+
+    def devolve_spool(self, arquivos):
+        for arquivo in arquivos:
+            pid = REIVINDICADO.match(arquivo).group(2)
+
+            try:
+                os.rename(arquivo, os.path.join(self.diretorio_spool, f"auditoria-orfao-{pid}-{time.time_ns()}.ndjson"))
+            except FileNotFoundError:
+                # Já retomado por outro processo
+                continue
+            except OSError:
+                logger.exception("Não foi possível devolver %s ao spool.", arquivo)
+
+    def retoma_spool_orfao(self, inicio=False):
+        """Devolve ao spool os arquivos reivindicados por processos que não existem mais.
+
+        Na inicialização também retoma os que têm o pid atual: vêm de um
+        processo anterior com o mesmo pid (contêiner reiniciado, por exemplo).
+        """
+        for caminho in glob.glob(os.path.join(self.diretorio_spool, "auditoria-*.ndjson.*.processando")):
+            encontrado = REIVINDICADO.match(caminho)
+
+            if not encontrado:
+                continue
+
+            pid = int(encontrado.group(2))
+
+            if processo_ativo(pid) and not (inicio and pid == os.getpid()):
+                continue
+
+            # Volta a ter o nome de um spool comum, reivindicável por qualquer processo
+            self.devolve_spool([caminho])
+
+    def reivindica_spool(self):
+        """Renomeia os arquivos de spool para este processo e lê os registros.
+
+        O rename é atômico, então dois workers nunca reprocessam o mesmo
+        arquivo, e é feito com o flock dos gravadores, então nenhuma linha é
+        acrescentada depois da leitura.
+        """
+        registros = []
+        arquivos = []
+        self.retoma_spool_orfao()
+
+        for caminho in glob.glob(os.path.join(self.diretorio_spool, "auditoria-*.ndjson")):
+            reivindicado = f"{caminho}.{os.getpid()}.processando"
+
+            try:
+                arquivo = open(caminho, encoding="utf-8")
+            except OSError:
+                continue
+
+            with arquivo:
+                trava_arquivo(arquivo)
+
+                try:
+                    os.rename(caminho, reivindicado)
+                except OSError:
+                    continue
+
+                for linha in arquivo:
+                    r = json.loads(linha)
+                    r["data_hora"] = datetime.fromisoformat(r["data_hora"])
+                    registros.append(r)
+
+            arquivos.append(reivindicado)
+
+        return registros, arquivos
 
 def registrar_auditoria(usuario_id, acao, detalhes=None):
-    log = LogAuditoria(
-        usuario_id = usuario_id,
-        acao = acao,
-        detalhes = detalhes,
-        data_hora = datetime.now()
-    )
-
-    db.session.add(log)
-    db.session.commit()
\ No newline at end of file
+    registro = {
+        "usuario_id": usuario_id,
+        "acao": acao,
+        "detalhes": detalhes,
+        "data_hora": datetime.now()
+    }
+
+    if current_app.config.get("AUDITORIA_ASSINCRONA"):
+        current_app.extensions["auditoria"].enfileira(registro)
+        return
+
+    db.session.add(LogAuditoria(**registro))
+    db.session.commit()
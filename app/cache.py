@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Usuario, Paciente, Profissional, Consulta
+from app.replicas import leitura_no_primario
+from app.serializacao import dumps
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+class CacheLocal:
+    """LRU em memória com TTL por entrada (um por processo)."""
+
+    def __init__(self, maximo_entradas, ttl):
+        self.maximo_entradas = maximo_entradas
+        self.ttl = ttl
+        self.trava = threading.Lock()
+        self.entradas = OrderedDict()
+
+    def obtem(self, chave):
+        with self.trava:
+            item = self.entradas.get(chave)
+
+            if item is None:
+                return None
+
+            if item[1] <= time.monotonic():
+                del self.entradas[chave]
+                return None
+
+            self.entradas.move_to_end(chave)
+            return item[0]
+
+    def grava(self, chave, valor):
+        with self.trava:
+            self.entradas[chave] = (valor, time.monotonic() + self.ttl)
+            self.entradas.move_to_end(chave)
+
+            while len(self.entradas) > self.maximo_entradas:
+                self.entradas.popitem(last=False)
+
+    def remove(self, chaves):
+        with self.trava:
+            for chave in chaves:
+                self.entradas.pop(chave, None)
+
+    def __len__(self):
+        return len(self.entradas)
+
+class CacheRedis:
+    """Backend compartilhado entre os workers, em qualquer servidor compatível com Redis.
+
+    Os valores são gravados em JSON, então datas e enums voltam como texto,
+    no mesmo formato em que a API os serializa.
+    """
+
+    def __init__(self, cliente, ttl, prefixo="vidaplus:cache:"):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    @classmethod
+    def de_url(cls, url, ttl):
+        import redis
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def obtem(self, chave):
+        valor = self.cliente.get(self.prefixo + chave)
+        return loads(valor) if valor is not None else None
+
+    def grava(self, chave, valor):
+        self.cliente.set(self.prefixo + chave, dumps(valor), ex=max(1, int(self.ttl)))
+
+    def remove(self, chaves):
+        if chaves:
+            self.cliente.delete(*[self.prefixo + chave for chave in chaves])
+
+    def __len__(self):
+        return 0
+
+class CacheEntidades:
+    """Cache das visões serializadas das entidades consultadas pela administração.
+
+    As chaves têm o formato "<tabela>:<id>". Alterações e exclusões feitas pelo
+    ORM removem as chaves afetadas no flush e novamente após o commit, para
+    que uma leitura concorrente não regrave o valor antigo no meio da transação.
+    Com o backend local cada worker tem o seu cache; o TTL limita por quanto
+    tempo um worker pode ver um valor alterado por outro.
+    """
+
+    def __init__(self, app=None):
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        ttl = app.config["CACHE_TTL"]
+
+        if app.config.get("CACHE_URL"):
+            self.backend = CacheRedis.de_url(app.config["CACHE_URL"], ttl)
+        else:
+            self.backend = CacheLocal(app.config["CACHE_MAXIMO_ENTRADAS"], ttl)
+
+        app.extensions["cache"] = self
+
+    def obtem(self, chave, carrega):
+        """Retorna o valor em cache ou chama `carrega()` e guarda o resultado.
+
+        `carrega()` lê do primário, nunca de uma réplica de leitura.
+        """
+        valor = self.backend.obtem(chave)
+
+        with self.trava:
+            if valor is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+
+        if valor is None:
+            with leitura_no_primario(db.session):
+                valor = carrega()
+
+            self.backend.grava(chave, valor)
+
+        return valor
+
+    def invalida(self, *chaves):
+        self.backend.remove(chaves)
+
+    def metricas(self):
+        with self.trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "entradas": len(self.backend)}
+
+def chaves_afetadas(objeto):
+    """Chaves de cache que dependem do objeto alterado."""
+    if isinstance(objeto, Usuario):
+        # Nome e e-mail aparecem nas visões de paciente e profissional
+        return [f"pacientes:{objeto.id}", f"profissionais:{objeto.id}"]
+
+    return [f"{objeto.__tablename__}:{objeto.id}"]
+
+def cache_atual():
+    return current_app.extensions.get("cache") if has_app_context() else None
+
+def marca_alteracao(mapper, conexao, objeto):
+    cache = cache_atual()
+
+    if cache is None:
+        return
+
+    chaves = chaves_afetadas(objeto)
+    cache.invalida(*chaves)
+
+    sessao = Session.object_session(objeto)
+
+    if sessao is not None:
+        sessao.info.setdefault("cache_invalidar", set()).update(chaves)
+
+for modelo in (Usuario, Paciente, Profissional, Consulta):
+    event.listen(modelo, "after_update", marca_alteracao)
+    event.listen(modelo, "after_delete", marca_alteracao)
+
+@event.listens_for(Session, "after_commit")
+def invalida_apos_commit(sessao):
+    chaves = sessao.info.pop("cache_invalidar", None)
+    cache = cache_atual()
+
+    if chaves and cache is not None:
+        cache.invalida(*chaves)
+
+@event.listens_for(Session, "after_rollback")
+def descarta_invalidacoes(sessao):
+    sessao.info.pop("cache_invalidar", None)
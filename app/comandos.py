@@ -0,0 +1,71 @@
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+manutencao = AppGroup("manutencao", help="Tarefas de manutenção do banco de dados.")
+
+@manutencao.command("reindexa-prontuarios")
+@click.option("--lote", default=500, show_default=True, help="Prontuários por transação.")
+def reindexa_prontuarios_comando(lote):
+    """Reconstrói o índice da busca textual dos prontuários."""
+    from app.services.busca import reindexa_prontuarios
+
+    total = reindexa_prontuarios(lote)
+    click.echo(f"{total} prontuários indexados.")
+
+@manutencao.command("particoes-auditoria")
+@click.option("--meses", default=3, show_default=True, help="Meses futuros com partição criada antecipadamente.")
+def particoes_auditoria_comando(meses):
+    """Cria as partições mensais da auditoria (PostgreSQL e MySQL)."""
+    from app.services.auditoria import cria_particoes
+
+    criadas = cria_particoes(meses)
+    click.echo(f"{len(criadas)} partições criadas." if criadas else "Nenhuma partição criada.")
+
+@manutencao.command("arquiva-auditoria")
+@click.option("--retencao-meses", type=int, help="Meses completos mantidos no banco (padrão: AUDITORIA_RETENCAO_MESES).")
+@click.option("--diretorio", help="Destino dos arquivos .ndjson.gz (padrão: AUDITORIA_DIRETORIO_ARQUIVO).")
+@click.option("--lote", default=5000, show_default=True, help="Linhas lidas/removidas por vez.")
+def arquiva_auditoria_comando(retencao_meses, diretorio, lote):
+    """Exporta os logs de auditoria antigos para arquivos compactados e os remove do banco."""
+    from app.services.auditoria import arquiva_auditoria
+
+    if retencao_meses is None:
+        retencao_meses = current_app.config["AUDITORIA_RETENCAO_MESES"]
+
+    diretorio = (
+        diretorio
+        or current_app.config.get("AUDITORIA_DIRETORIO_ARQUIVO")
+        or os.path.join(current_app.instance_path, "auditoria_arquivo")
+    )
+
+    for mes, total, caminho in arquiva_auditoria(retencao_meses, diretorio, lote):
+        click.echo(f"{mes:%Y-%m}: {total} logs arquivados" + (f" em {caminho}" if caminho else ""))
+
+@manutencao.command("gera-dados")
+@click.option("--pacientes", default=1000, show_default=True)
+@click.option("--profissionais", default=10, show_default=True)
+@click.option("--consultas", default=10000, show_default=True)
+@click.option("--logs", default=50000, show_default=True, help="Logs de auditoria.")
+@click.option("--administradores", default=0, show_default=True)
+@click.option("--sessoes-ativas", default=100, show_default=True, help="Sessões de telemedicina em andamento.")
+@click.option("--semente", default=42, show_default=True, help="A mesma semente gera os mesmos dados.")
+@click.option("--senha", default="senha123", show_default=True, help="Senha de todos os usuários gerados.")
+@click.option("--lote", default=10000, show_default=True, help="Linhas por transação.")
+def gera_dados_comando(pacientes, profissionais, consultas, logs, administradores, sessoes_ativas, semente, senha, lote):
+    """Popula o banco com dados sintéticos para testes de desempenho."""
+    from app.services.geracao import gera_dados
+
+    try:
+        resultados = gera_dados(
+            pacientes, profissionais, consultas, logs, administradores=administradores,
+            sessoes_ativas=sessoes_ativas, semente=semente, senha=senha, tamanho_lote=lote
+        )
+    except ValueError as erro:
+        raise click.UsageError(str(erro))
+
+    for tabela, total, duracao in resultados:
+        click.echo(f"{tabela:<22} {total:>10} linhas  {total / max(duracao, 1e-9):>12,.0f} linhas/s")
+
+    click.echo("Rode 'flask manutencao reindexa-prontuarios' para incluir os prontuários na busca textual.")
@@ -0,0 +1,99 @@
+import zlib
+from flask import current_app, has_app_context
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Formato gravado na coluna:
+#   sem byte 0x00 no início  texto UTF-8 puro (linhas antigas e textos curtos)
+#   0x00 "z" + dados         zlib
+#   0x00 "s" + dados         zstd
+#   0x00 "n" + texto         UTF-8 puro que começaria com 0x00
+# Texto clínico nunca começa com NUL, então as linhas gravadas antes da
+# compressão continuam legíveis sem conversão.
+MARCADOR = b"\x00"
+
+def comprime(texto, algoritmo="zlib", tamanho_minimo=128):
+    """Converte o texto para o formato da coluna, comprimindo quando compensa."""
+    dados = texto.encode("utf-8")
+
+    if len(dados) >= tamanho_minimo:
+        if algoritmo == "zstd" and zstandard is not None:
+            comprimido = MARCADOR + b"s" + zstandard.ZstdCompressor(level=3).compress(dados)
+        else:
+            comprimido = MARCADOR + b"z" + zlib.compress(dados, 6)
+
+        if len(comprimido) < len(dados):
+            return comprimido
+
+    if dados.startswith(MARCADOR):
+        return MARCADOR + b"n" + dados
+
+    return dados
+
+def descomprime(valor):
+    if isinstance(valor, str):
+        # SQLite devolve como texto as linhas gravadas antes da compressão
+        return valor
+
+    valor = bytes(valor)
+
+    if not valor.startswith(MARCADOR):
+        return valor.decode("utf-8")
+
+    formato, dados = valor[1:2], valor[2:]
+
+    match formato:
+        case b"z":
+            return zlib.decompress(dados).decode("utf-8")
+        case b"s":
+            if zstandard is None:
+                raise RuntimeError("Valor comprimido com zstd; instale o pacote zstandard para lê-lo.")
+            return zstandard.ZstdDecompressor().decompress(dados).decode("utf-8")
+        case b"n":
+            return dados.decode("utf-8")
+        case _:
+            raise ValueError(f"Formato de compressão desconhecido: {formato!r}")
+
+class TextoComprimido(TypeDecorator):
+    """Texto gravado comprimido em uma coluna binária, de forma transparente para o ORM.
+
+    O algoritmo de escrita vem de COMPRESSAO_ALGORITMO ("zlib" ou "zstd", se
+    o pacote zstandard estiver instalado); a leitura reconhece qualquer formato
+    pelo cabeçalho. Como o banco só vê bytes, filtros como LIKE nessas colunas
+    não funcionam; a busca textual usa o índice de app/services/busca.py.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialeto):
+        # BLOB do MySQL vai só até 64 KB
+        if dialeto.name in ("mysql", "mariadb"):
+            return dialeto.type_descriptor(mysql.LONGBLOB())
+
+        return dialeto.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, valor, dialeto):
+        if valor is None:
+            return None
+
+        if has_app_context():
+            return comprime(
+                valor,
+                current_app.config.get("COMPRESSAO_ALGORITMO", "zlib"),
+                current_app.config.get("COMPRESSAO_TAMANHO_MINIMO", 128)
+            )
+
+        return comprime(valor)
+
+    def process_result_value(self, valor, dialeto):
+        if valor is None:
+            return None
+
+        return descomprime(valor)
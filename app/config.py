@@ -5,4 +5,96 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
     JWT_SECRET_KEY = SECRET_KEY
-    JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hora
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hora
+
+    # Pool de conexões por worker (não se aplica ao SQLite em memória).
+    # Com N workers o banco recebe até N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexões.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # segundos esperando uma conexão livre
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # segundos; -1 desativa
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 0))  # milissegundos; 0 desativa (Postgres/MySQL)
+
+    # Réplicas de leitura (URIs separadas por vírgula) usadas pelas requisições GET.
+    # Após escrever, o usuário lê do primário durante REPLICA_JANELA_ESCRITA segundos
+    # (marca assinada devolvida no cookie vidaplus_escrita e no cabeçalho X-Ultima-Escrita).
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if uri.strip()]
+    REPLICA_JANELA_ESCRITA = float(os.getenv("REPLICA_JANELA_ESCRITA", 5))
+    REPLICA_INTERVALO_SAUDE = float(os.getenv("REPLICA_INTERVALO_SAUDE", 30))  # segundos entre testes de saúde
+
+    # Paginação por cursor (keyset) das listagens
+    PAGINACAO_LIMITE_PADRAO = int(os.getenv("PAGINACAO_LIMITE_PADRAO", 50))
+    PAGINACAO_LIMITE_MAXIMO = int(os.getenv("PAGINACAO_LIMITE_MAXIMO", 500))
+
+    # Quantidade de linhas buscadas por vez nas exportações em streaming
+    EXPORTACAO_TAMANHO_LOTE = int(os.getenv("EXPORTACAO_TAMANHO_LOTE", 1000))
+
+    # Auditoria assíncrona: os logs são gravados em lote por uma thread
+    AUDITORIA_ASSINCRONA = os.getenv("AUDITORIA_ASSINCRONA", "true").lower() == "true"
+    AUDITORIA_TAMANHO_LOTE = int(os.getenv("AUDITORIA_TAMANHO_LOTE", 500))
+    AUDITORIA_INTERVALO_FLUSH = float(os.getenv("AUDITORIA_INTERVALO_FLUSH", 1.0))  # segundos
+    AUDITORIA_TAMANHO_FILA = int(os.getenv("AUDITORIA_TAMANHO_FILA", 100000))
+    # Lotes que falharam (auditoria-*.ndjson, reprocessados) e linhas recusadas pelo banco (descartados-*.ndjson)
+    AUDITORIA_DIRETORIO_SPOOL = os.getenv("AUDITORIA_DIRETORIO_SPOOL")
+
+    # Retenção da auditoria: meses completos mantidos no banco antes de arquivar em .ndjson.gz
+    AUDITORIA_RETENCAO_MESES = int(os.getenv("AUDITORIA_RETENCAO_MESES", 12))
+    AUDITORIA_DIRETORIO_ARQUIVO = os.getenv("AUDITORIA_DIRETORIO_ARQUIVO")
+
+    # Máximo de linhas aceitas por requisição de importação em massa
+    IMPORTACAO_LIMITE_LINHAS = int(os.getenv("IMPORTACAO_LIMITE_LINHAS", 10000))
+
+    # Hash de senhas (formato de método do Werkzeug, ex.: "scrypt:32768:8:1" ou "pbkdf2:sha256:600000")
+    SENHA_METODO = os.getenv("SENHA_METODO", "scrypt:32768:8:1")
+    SENHA_TAMANHO_SALT = int(os.getenv("SENHA_TAMANHO_SALT", 16))
+    SENHA_PROCESSOS = int(os.getenv("SENHA_PROCESSOS", 0))  # 0 = todos os núcleos
+    SENHA_LOTE_MINIMO_PARALELO = int(os.getenv("SENHA_LOTE_MINIMO_PARALELO", 32))
+
+    # Pool limitado para verificação de senha no login. Só tem efeito com workers
+    # que atendem várias requisições por processo (gunicorn -k gthread ou ASGI);
+    # em workers sync (wsgi.multithread falso) a senha é verificada na própria requisição.
+    LOGIN_VERIFICACAO_THREADS = int(os.getenv("LOGIN_VERIFICACAO_THREADS", 0))  # 0 = todos os núcleos
+    LOGIN_VERIFICACAO_FILA_MAXIMA = int(os.getenv("LOGIN_VERIFICACAO_FILA_MAXIMA", 32))
+    LOGIN_VERIFICACAO_TIMEOUT = float(os.getenv("LOGIN_VERIFICACAO_TIMEOUT", 5.0))  # segundos
+
+    # Período máximo (em dias) aceito na consulta de horários livres
+    AGENDA_DIAS_MAXIMOS = int(os.getenv("AGENDA_DIAS_MAXIMOS", 31))
+
+    # TTL (segundos) do cache que confere se o usuário do token ainda existe com o mesmo perfil.
+    # 0 desativa a verificação (apenas as claims do JWT são usadas).
+    PERFIL_CACHE_TTL = int(os.getenv("PERFIL_CACHE_TTL", 0))
+
+    # Cache das consultas da administração por id. Sem CACHE_URL usa um LRU em memória
+    # por worker; com CACHE_URL (ex.: redis://localhost:6379/0) o cache é compartilhado.
+    CACHE_URL = os.getenv("CACHE_URL")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 60))  # segundos
+    CACHE_MAXIMO_ENTRADAS = int(os.getenv("CACHE_MAXIMO_ENTRADAS", 10000))
+
+    # Índice das sessões de telemedicina ativas. Sem URL usa o CACHE_URL ou, sem ele,
+    # um cache por worker das sessões encontradas no banco, válido por TELEMEDICINA_REGISTRO_TTL
+    # segundos (o tempo que um worker pode levar para ver o encerramento feito por outro).
+    TELEMEDICINA_REGISTRO_URL = os.getenv("TELEMEDICINA_REGISTRO_URL")
+    TELEMEDICINA_REGISTRO_TTL = float(os.getenv("TELEMEDICINA_REGISTRO_TTL", 30))
+
+    # Server-Sent Events (estado das sessões de telemedicina). Com EVENTOS_URL (ou CACHE_URL)
+    # o pub/sub passa por um Redis e os eventos chegam às conexões de todos os workers;
+    # sem eles, com mais de um worker, a rota de eventos responde 503.
+    EVENTOS_URL = os.getenv("EVENTOS_URL")
+    EVENTOS_MAXIMO_CONEXOES = int(os.getenv("EVENTOS_MAXIMO_CONEXOES", 1000))  # por processo
+    EVENTOS_MAXIMO_POR_USUARIO = int(os.getenv("EVENTOS_MAXIMO_POR_USUARIO", 3))
+    EVENTOS_TAMANHO_FILA = int(os.getenv("EVENTOS_TAMANHO_FILA", 16))
+    EVENTOS_HEARTBEAT = float(os.getenv("EVENTOS_HEARTBEAT", 15.0))  # segundos
+    EVENTOS_DURACAO_MAXIMA = float(os.getenv("EVENTOS_DURACAO_MAXIMA", 3600.0))  # segundos
+
+    # Modo ASGI (asgi.py): threads por processo para as requisições que acessam o banco.
+    # Mantenha DB_POOL_SIZE + DB_MAX_OVERFLOW >= ASGI_THREADS.
+    ASGI_THREADS = int(os.getenv("ASGI_THREADS", 32))
+
+    # Compressão de anotações/prescrições dos prontuários e detalhes da auditoria.
+    # "zstd" exige o pacote zstandard; textos menores que o mínimo (bytes) ficam sem compressão.
+    COMPRESSAO_ALGORITMO = os.getenv("COMPRESSAO_ALGORITMO", "zlib")
+    COMPRESSAO_TAMANHO_MINIMO = int(os.getenv("COMPRESSAO_TAMANHO_MINIMO", 128))
+
+    # Loga um aviso quando uma requisição executa mais queries que o limite (0 desativa)
+    METRICAS_LIMITE_QUERIES = int(os.getenv("METRICAS_LIMITE_QUERIES", 20))
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+import weakref
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.pool import QueuePool
+
+# Engines criados pela aplicação, descartados no processo filho após um fork
+engines_registrados = weakref.WeakSet()
+
+class PoolMonitorado(QueuePool):
+    """QueuePool que mede quanto tempo as requisições esperam por uma conexão."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trava_metricas = threading.Lock()
+        self.checkouts = 0
+        self.tempo_espera = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except TimeoutPool:
+            with self.trava_metricas:
+                self.timeouts += 1
+            raise
+        finally:
+            with self.trava_metricas:
+                self.checkouts += 1
+                self.tempo_espera += time.perf_counter() - inicio
+
+    def metricas(self):
+        with self.trava_metricas:
+            return {
+                "tamanho": self.size(),
+                "em_uso": self.checkedout(),
+                "ociosas": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "tempo_espera_segundos": self.tempo_espera
+            }
+
+def banco_em_memoria(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def opcoes_engine(config):
+    """Monta o SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis DB_POOL_*.
+
+    Opções definidas explicitamente em SQLALCHEMY_ENGINE_OPTIONS têm prioridade.
+    O SQLite em memória fica com o pool padrão do Flask-SQLAlchemy.
+    """
+    opcoes = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+
+    if not config.get("SQLALCHEMY_DATABASE_URI") or banco_em_memoria(config["SQLALCHEMY_DATABASE_URI"]):
+        return opcoes
+
+    return {
+        "poolclass": PoolMonitorado,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "pool_use_lifo": True,
+        **opcoes
+    }
+
+def comando_timeout(dialeto, milissegundos):
+    if dialeto == "postgresql":
+        return f"SET statement_timeout = {int(milissegundos)}"
+
+    if dialeto in ("mysql", "mariadb"):
+        return f"SET SESSION max_execution_time = {int(milissegundos)}"
+
+def aplica_statement_timeout(engine, milissegundos):
+    comando = comando_timeout(engine.dialect.name, milissegundos)
+
+    if comando is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def define_timeout(conexao_dbapi, registro):
+        executa_fora_de_transacao(conexao_dbapi, comando, engine.dialect.name)
+
+def executa_fora_de_transacao(conexao_dbapi, comando, dialeto):
+    """Executa um SET de sessão que não pode ser desfeito pelo rollback do pool.
+
+    No PostgreSQL o SET dentro da transação implícita do driver é desfeito pelo
+    rollback feito na devolução da conexão ao pool, então ele roda em autocommit.
+    No MySQL o SET SESSION não é transacional.
+    """
+    autocommit = None
+
+    if dialeto == "postgresql":
+        autocommit = conexao_dbapi.autocommit
+        conexao_dbapi.autocommit = True
+
+    try:
+        cursor = conexao_dbapi.cursor()
+        cursor.execute(comando)
+        cursor.close()
+    finally:
+        if autocommit is not None:
+            conexao_dbapi.autocommit = autocommit
+
+def descarta_engines_apos_fork():
+    # As conexões herdadas pertencem ao processo pai: o filho abre as suas
+    for engine in list(engines_registrados):
+        engine.dispose(close=False)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=descarta_engines_apos_fork)
+
+def prepara_engines(app, engines):
+    """Aplica o statement timeout e o descarte pós-fork aos engines da aplicação."""
+    for engine in engines:
+        if app.config["DB_STATEMENT_TIMEOUT"]:
+            aplica_statement_timeout(engine, app.config["DB_STATEMENT_TIMEOUT"])
+
+        engines_registrados.add(engine)
+
+def metricas_pool(engines):
+    """Métricas dos pools monitorados, no formato esperado por `registra_gauge`."""
+    resultado = []
+
+    for nome, engine in engines.items():
+        if isinstance(engine.pool, PoolMonitorado):
+            for chave, valor in engine.pool.metricas().items():
+                resultado.append(({"bind": nome or "padrao", "metrica": chave}, valor))
+
+    return resultado
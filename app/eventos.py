@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from app.serializacao import dumps
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_REDIS = "vidaplus:eventos:"
+
+class ConexoesEsgotadas(Exception):
+    def __init__(self, por_usuario):
+        super().__init__()
+        self.por_usuario = por_usuario
+
+class Assinatura:
+    """Fila de eventos de uma conexão SSE."""
+
+    def __init__(self, canal, nome, usuario_id, tamanho_fila):
+        self.canal = canal
+        self.nome = nome
+        self.usuario_id = usuario_id
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.atrasada = False
+        self.cancelada = False
+
+    def entrega(self, mensagem):
+        try:
+            self.fila.put_nowait(mensagem)
+        except queue.Full:
+            # Cliente lento: encerra o fluxo para que ele reconecte e receba o estado atual
+            self.atrasada = True
+
+    def proxima(self, timeout):
+        try:
+            return self.fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cancela(self):
+        self.canal.cancela(self)
+
+class AssinaturaAssincrona(Assinatura):
+    """Assinatura lida por uma corrotina no loop do servidor ASGI, sem ocupar uma thread.
+
+    Os eventos são publicados por threads (requisições ou ouvinte do Redis) e
+    entram na fila pelo próprio loop.
+    """
+
+    def __init__(self, canal, nome, usuario_id, tamanho_fila, loop):
+        super().__init__(canal, nome, usuario_id, tamanho_fila)
+        self.loop = loop
+        self.fila = asyncio.Queue(maxsize=tamanho_fila)
+
+    def entrega(self, mensagem):
+        self.loop.call_soon_threadsafe(self.coloca, mensagem)
+
+    def coloca(self, mensagem):
+        try:
+            self.fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            self.atrasada = True
+
+    async def proxima(self, timeout):
+        try:
+            return await asyncio.wait_for(self.fila.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class CanalEventos:
+    """Pub/sub dos eventos enviados por Server-Sent Events.
+
+    Sem EVENTOS_URL (ou CACHE_URL) os eventos só chegam às conexões do próprio
+    processo, e a rota SSE recusa conexões quando o servidor tem mais de um
+    worker (ver `entrega_entre_processos`). Com um servidor compatível com Redis
+    cada processo mantém uma thread inscrita em "vidaplus:eventos:*" que
+    repassa as mensagens às suas conexões, então um evento publicado por
+    qualquer worker chega a todos.
+    As conexões abertas são limitadas por processo e por usuário.
+    """
+
+    def __init__(self, app=None):
+        self.trava = threading.Lock()
+        self.assinantes = {}
+        self.conexoes_por_usuario = {}
+        self.conexoes = 0
+        self.publicados = 0
+        self.recusadas = 0
+        self.redis = None
+        self.thread = None
+        self.pid = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maximo_conexoes = app.config["EVENTOS_MAXIMO_CONEXOES"]
+        self.maximo_por_usuario = app.config["EVENTOS_MAXIMO_POR_USUARIO"]
+        self.tamanho_fila = app.config["EVENTOS_TAMANHO_FILA"]
+        url = app.config.get("EVENTOS_URL") or app.config.get("CACHE_URL")
+
+        if url:
+            import redis
+            self.redis = redis.Redis.from_url(url)
+
+        app.extensions["eventos"] = self
+
+    @property
+    def entrega_entre_processos(self):
+        return self.redis is not None
+
+    def assina(self, nome, usuario_id, loop=None):
+        """Registra uma conexão; com `loop` a assinatura é lida de forma assíncrona (modo ASGI)."""
+        with self.trava:
+            por_usuario = self.conexoes_por_usuario.get(usuario_id, 0)
+
+            if self.conexoes >= self.maximo_conexoes or por_usuario >= self.maximo_por_usuario:
+                self.recusadas += 1
+                raise ConexoesEsgotadas(por_usuario=self.conexoes < self.maximo_conexoes)
+
+            if loop is not None:
+                assinatura = AssinaturaAssincrona(self, nome, usuario_id, self.tamanho_fila, loop)
+            else:
+                assinatura = Assinatura(self, nome, usuario_id, self.tamanho_fila)
+
+            self.assinantes.setdefault(nome, set()).add(assinatura)
+            self.conexoes_por_usuario[usuario_id] = por_usuario + 1
+            self.conexoes += 1
+
+        if self.redis is not None:
+            self.garante_ouvinte()
+
+        return assinatura
+
+    def cancela(self, assinatura):
+        with self.trava:
+            if assinatura.cancelada:
+                return
+
+            assinatura.cancelada = True
+            self.assinantes[assinatura.nome].discard(assinatura)
+
+            if not self.assinantes[assinatura.nome]:
+                del self.assinantes[assinatura.nome]
+
+            self.conexoes_por_usuario[assinatura.usuario_id] -= 1
+
+            if not self.conexoes_por_usuario[assinatura.usuario_id]:
+                del self.conexoes_por_usuario[assinatura.usuario_id]
+
+            self.conexoes -= 1
+
+    def publica(self, nome, evento, dados):
+        mensagem = {"evento": evento, "dados": dados}
+
+        with self.trava:
+            self.publicados += 1
+
+        if self.redis is not None:
+            self.redis.publish(PREFIXO_REDIS + nome, dumps(mensagem))
+        else:
+            self.distribui(nome, mensagem)
+
+    def distribui(self, nome, mensagem):
+        with self.trava:
+            destinos = list(self.assinantes.get(nome, ()))
+
+        for assinatura in destinos:
+            assinatura.entrega(mensagem)
+
+    def garante_ouvinte(self):
+        """Inicia a thread inscrita no Redis (também após o fork dos workers)."""
+        with self.trava:
+            if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+                return
+
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.ouve, name="eventos", daemon=True)
+            self.thread.start()
+
+    def ouve(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(PREFIXO_REDIS + "*")
+
+                for mensagem in pubsub.listen():
+                    nome = mensagem["channel"].decode()[len(PREFIXO_REDIS):]
+                    self.distribui(nome, loads(mensagem["data"]))
+            except Exception:
+                logger.exception("Conexão de eventos com o Redis perdida; reconectando.")
+                time.sleep(1)
+
+    def metricas(self):
+        with self.trava:
+            return {"conexoes": self.conexoes, "publicados": self.publicados, "recusadas": self.recusadas}
+
+def formata_evento(evento, dados):
+    return f"event: {evento}\ndata: {dumps(dados).decode()}\n\n"
+
+def fluxo_sse(assinatura, evento_inicial, heartbeat, duracao_maxima, eventos_finais=()):
+    """Gera o corpo text/event-stream de uma assinatura.
+
+    Envia `evento_inicial` (nome, dados) logo ao conectar, um comentário a cada
+    `heartbeat` segundos sem eventos (mantém proxies abertos e detecta o cliente
+    desconectado) e termina após `duracao_maxima` segundos, depois de um evento
+    de `eventos_finais` ou se o cliente ficar para trás; o EventSource reconecta
+    sozinho quando for o caso.
+    """
+    limite = time.monotonic() + duracao_maxima
+
+    try:
+        yield "retry: 3000\n" + formata_evento(*evento_inicial)
+
+        while time.monotonic() < limite and not assinatura.atrasada:
+            mensagem = assinatura.proxima(timeout=min(heartbeat, max(0, limite - time.monotonic())))
+
+            if mensagem is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            yield formata_evento(mensagem["evento"], mensagem["dados"])
+
+            if mensagem["evento"] in eventos_finais:
+                break
+    finally:
+        assinatura.cancela()
+
+class FluxoAssincrono:
+    """Versão assíncrona de `fluxo_sse`, transmitida pelo servidor ASGI (ver app/asgi.py).
+
+    `fecha()` libera a conexão e é chamado pelo servidor mesmo que o fluxo
+    nunca chegue a ser iniciado.
+    """
+
+    def __init__(self, assinatura, evento_inicial, heartbeat, duracao_maxima, eventos_finais=()):
+        self.assinatura = assinatura
+        self.evento_inicial = evento_inicial
+        self.heartbeat = heartbeat
+        self.duracao_maxima = duracao_maxima
+        self.eventos_finais = eventos_finais
+
+    def __aiter__(self):
+        return self.gera()
+
+    async def gera(self):
+        limite = time.monotonic() + self.duracao_maxima
+
+        yield "retry: 3000\n" + formata_evento(*self.evento_inicial)
+
+        while time.monotonic() < limite and not self.assinatura.atrasada:
+            mensagem = await self.assinatura.proxima(timeout=min(self.heartbeat, max(0, limite - time.monotonic())))
+
+            if mensagem is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            yield formata_evento(mensagem["evento"], mensagem["dados"])
+
+            if mensagem["evento"] in self.eventos_finais:
+                break
+
+    def fecha(self):
+        self.assinatura.cancela()
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from flask import g, request, Response, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_QUERIES = (1, 2, 3, 5, 10, 20, 50, 100)
+
+def formata_labels(labels):
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in labels.items()) + "}"
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observa(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas(self, nome, labels):
+        for limite, contagem in zip(self.buckets, self.contagens):
+            yield f"{nome}_bucket{formata_labels({**labels, 'le': limite})} {contagem}"
+        yield f"{nome}_bucket{formata_labels({**labels, 'le': '+Inf'})} {self.total}"
+        yield f"{nome}_sum{formata_labels(labels)} {self.soma}"
+        yield f"{nome}_count{formata_labels(labels)} {self.total}"
+
+def antes_do_cursor(conn, cursor, statement, parameters, context, executemany):
+    context.metricas_inicio = time.perf_counter()
+
+def depois_do_cursor(conn, cursor, statement, parameters, context, executemany):
+    # Só contabiliza statements executados dentro de uma requisição instrumentada
+    if has_app_context() and "metricas_queries" in g:
+        g.metricas_queries += 1
+        g.metricas_tempo_db += time.perf_counter() - context.metricas_inicio
+
+class Metricas:
+    """Latência por rota, quantidade de SQL e tempo de banco por requisição.
+
+    Os valores ficam em memória no processo e são expostos em /metrics no
+    formato texto do Prometheus (com vários workers, cada processo expõe os seus).
+    Outros módulos podem publicar valores próprios com `registra_gauge`.
+    """
+
+    def __init__(self, app=None):
+        self.trava = threading.Lock()
+        self.duracao = {}
+        self.queries = {}
+        self.tempo_db = {}
+        self.requisicoes = {}
+        self.gauges = []
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.limite_queries = app.config["METRICAS_LIMITE_QUERIES"]
+
+        if not event.contains(Engine, "before_cursor_execute", antes_do_cursor):
+            event.listen(Engine, "before_cursor_execute", antes_do_cursor)
+            event.listen(Engine, "after_cursor_execute", depois_do_cursor)
+
+        app.before_request(self.inicio_requisicao)
+        app.after_request(self.fim_requisicao)
+        app.add_url_rule("/metrics", "metrics", self.exporta)
+
+        app.extensions["metricas"] = self
+
+    def registra_gauge(self, nome, ajuda, funcao, tipo="gauge"):
+        """`funcao` retorna um número ou uma lista de pares (labels, valor)."""
+        self.gauges.append((nome, ajuda, tipo, funcao))
+
+    def inicio_requisicao(self):
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_queries = 0
+        g.metricas_tempo_db = 0.0
+
+    def fim_requisicao(self, resposta):
+        if "metricas_inicio" not in g:
+            return resposta
+
+        duracao = time.perf_counter() - g.metricas_inicio
+        rota = request.url_rule.rule if request.url_rule else "desconhecida"
+        chave = (request.method, rota)
+
+        with self.trava:
+            self.duracao.setdefault(chave, Histograma(BUCKETS_DURACAO)).observa(duracao)
+            self.queries.setdefault(chave, Histograma(BUCKETS_QUERIES)).observa(g.metricas_queries)
+            self.tempo_db[chave] = self.tempo_db.get(chave, 0.0) + g.metricas_tempo_db
+            chave_status = chave + (resposta.status_code,)
+            self.requisicoes[chave_status] = self.requisicoes.get(chave_status, 0) + 1
+
+        if self.limite_queries and g.metricas_queries > self.limite_queries:
+            logger.warning(
+                "%s %s executou %s queries (limite %s): possível N+1.",
+                request.method, rota, g.metricas_queries, self.limite_queries
+            )
+
+        return resposta
+
+    def linhas(self):
+        with self.trava:
+            yield "# HELP vidaplus_requisicoes_total Requisições atendidas por rota e status."
+            yield "# TYPE vidaplus_requisicoes_total counter"
+            for (metodo, rota, status), total in sorted(self.requisicoes.items()):
+                yield f"vidaplus_requisicoes_total{formata_labels({'metodo': metodo, 'rota': rota, 'status': status})} {total}"
+
+            yield "# HELP vidaplus_requisicao_duracao_segundos Latência das requisições por rota."
+            yield "# TYPE vidaplus_requisicao_duracao_segundos histogram"
+            for (metodo, rota), histograma in sorted(self.duracao.items()):
+                yield from histograma.linhas("vidaplus_requisicao_duracao_segundos", {"metodo": metodo, "rota": rota})
+
+            yield "# HELP vidaplus_requisicao_queries Statements SQL executados por requisição."
+            yield "# TYPE vidaplus_requisicao_queries histogram"
+            for (metodo, rota), histograma in sorted(self.queries.items()):
+                yield from histograma.linhas("vidaplus_requisicao_queries", {"metodo": metodo, "rota": rota})
+
+            yield "# HELP vidaplus_requisicao_tempo_db_segundos_total Tempo total gasto no banco por rota."
+            yield "# TYPE vidaplus_requisicao_tempo_db_segundos_total counter"
+            for (metodo, rota), total in sorted(self.tempo_db.items()):
+                yield f"vidaplus_requisicao_tempo_db_segundos_total{formata_labels({'metodo': metodo, 'rota': rota})} {total}"
+
+        for nome, ajuda, tipo, funcao in self.gauges:
+            yield f"# HELP {nome} {ajuda}"
+            yield f"# TYPE {nome} {tipo}"
+            valor = funcao()
+
+            if isinstance(valor, (int, float)):
+                yield f"{nome} {valor}"
+            else:
+                for labels, v in valor:
+                    yield f"{nome}{formata_labels(labels)} {v}"
+
+    def exporta(self):
+        return Response("\n".join(self.linhas()) + "\n", mimetype="text/plain; version=0.0.4")
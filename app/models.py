@@ -1,8 +1,20 @@
 from app import db
+from app.compressao import TextoComprimido
 from sqlalchemy import Enum
+from sqlalchemy.dialects import mysql
 import enum
 from datetime import datetime
 
+# DATETIME do MySQL descarta os microssegundos por padrão; as versões (ETag) precisam deles
+DataHoraPrecisa = db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
+def coluna_atualizado_em():
+    """Momento da última alteração da linha, usado para montar ETag/Last-Modified."""
+    return db.Column(
+        DataHoraPrecisa, nullable=False,
+        default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
 class PerfilEnum(enum.Enum):
     paciente = "paciente"
     profissional = "profissional"
@@ -22,6 +34,7 @@ class Usuario(db.Model):
     email = db.Column(db.String(150), unique=True, nullable=False)
     senha = db.Column(db.String(255), nullable=False)
     perfil = db.Column(Enum(PerfilEnum, name="perfil_enum"), nullable=False)
+    atualizado_em = coluna_atualizado_em()
 
 class Administrador(db.Model):
     __tablename__ = 'administradores'
@@ -45,6 +58,7 @@ class Paciente(db.Model):
     data_nascimento = db.Column(db.Date, nullable=False)
     endereco = db.Column(db.Text)
     telefone = db.Column(db.String(20))
+    atualizado_em = coluna_atualizado_em()
 
     usuario = db.relationship("Usuario", backref=db.backref("paciente", uselist=False))
 
@@ -56,12 +70,42 @@ class Profissional(db.Model):
     conselho = db.Column(db.String(50), nullable=False)
     numero_conselho = db.Column(db.String(50), nullable=False)
     especialidade = db.Column(db.String(50))
+    atualizado_em = coluna_atualizado_em()
 
     usuario = db.relationship("Usuario", backref=db.backref("profissional", uselist=False))
 
+class AgendaProfissional(db.Model):
+    __tablename__ = 'agendas_profissionais'
+    __table_args__ = (
+        db.Index("ix_agendas_profissionais_profissional_dia", "profissional_id", "dia_semana"),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    profissional_id = db.Column(db.Integer, db.ForeignKey("profissionais.id"), nullable=False)
+    dia_semana = db.Column(db.Integer, nullable=False)  # 0 = segunda ... 6 = domingo
+    hora_inicio = db.Column(db.Time, nullable=False)
+    hora_fim = db.Column(db.Time, nullable=False)
+    duracao_minutos = db.Column(db.Integer, nullable=False, default=30)
+
+    profissional = db.relationship("Profissional", backref="agenda")
+
 class Consulta(db.Model):
     __tablename__ = 'consultas'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_consultas_paciente_data_hora", "paciente_id", "data", "hora"),
+        db.Index("ix_consultas_profissional_data_hora", "profissional_id", "data", "hora"),
+        # Impede duas consultas ativas no mesmo horário do profissional.
+        # Índice parcial (Postgres/SQLite); no MySQL a reserva depende do lock da linha do profissional
+        # e o índice não é criado, como na migration 9c1d4a7e3b52.
+        db.Index(
+            "uq_consultas_profissional_horario", "profissional_id", "data", "hora",
+            unique=True,
+            postgresql_where=db.text("status <> 'cancelada'"),
+            sqlite_where=db.text("status <> 'cancelada'")
+        ).ddl_if(dialect=("postgresql", "sqlite")),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     paciente_id = db.Column(db.Integer, db.ForeignKey("pacientes.id"), nullable=False)
@@ -70,25 +114,49 @@ class Consulta(db.Model):
     hora = db.Column(db.Time, nullable=True)
     status = db.Column(Enum(StatusEnum), default="agendada", nullable=False)
     tipo = db.Column(Enum("presencial", "online", name="tipo_consulta_enum"), nullable=False)
+    atualizado_em = coluna_atualizado_em()
 
     paciente = db.relationship("Paciente", backref="consultas")
     profissional = db.relationship("Profissional", backref="consultas")
 
 class Prontuario(db.Model):
     __tablename__ = 'prontuarios'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_prontuarios_consulta_id", "consulta_id"),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     consulta_id = db.Column(db.Integer, db.ForeignKey("consultas.id"), nullable=False)
-    anotacoes = db.Column(db.Text)
-    prescricao = db.Column(db.Text)
+    anotacoes = db.Column(TextoComprimido)
+    prescricao = db.Column(TextoComprimido)
     data_registro = db.Column(db.DateTime, nullable=False)
 
     consulta = db.relationship("Consulta", backref="prontuario")
 
+class TermoProntuario(db.Model):
+    """Índice invertido da busca textual nos prontuários (ver app/services/busca.py)."""
+    __tablename__ = "termos_prontuarios"
+    __table_args__ = (
+        # A busca sempre filtra por termo e profissional (e às vezes por paciente)
+        db.Index("ix_termos_prontuarios_termo_profissional", "termo", "profissional_id", "paciente_id"),
+        db.Index("ix_termos_prontuarios_prontuario_id", "prontuario_id"),
+        {'extend_existing': True}
+    )
+
+    termo = db.Column(db.String(64), primary_key=True)
+    prontuario_id = db.Column(db.Integer, db.ForeignKey("prontuarios.id"), primary_key=True)
+    # Copiados da consulta para restringir a busca sem join com prontuários e consultas
+    profissional_id = db.Column(db.Integer, db.ForeignKey("profissionais.id"), nullable=False)
+    paciente_id = db.Column(db.Integer, db.ForeignKey("pacientes.id"), nullable=False)
+    frequencia = db.Column(db.Integer, nullable=False)
+
 class Telemedicina(db.Model):
     __tablename__ = "telemedicinas"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_telemedicinas_consulta_ativa", "consulta_id", "ativa"),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     consulta_id = db.Column(db.Integer, db.ForeignKey("consultas.id"), nullable=False)
@@ -104,13 +172,19 @@ class Telemedicina(db.Model):
     consulta = db.relationship("Consulta", backref="telemedicina", uselist=False)
 
 class LogAuditoria(db.Model):
+    # No PostgreSQL e no MySQL a tabela é particionada por mês de data_hora e a
+    # chave primária no banco é (id, data_hora); ver app/services/auditoria.py
     __tablename__ = "logs_auditoria"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index("ix_logs_auditoria_usuario_data_hora", "usuario_id", "data_hora"),
+        db.Index("ix_logs_auditoria_data_hora", "data_hora"),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, autoincrement=True, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=False)
     acao = db.Column(db.String(255))
-    detalhes = db.Column(db.Text)
+    detalhes = db.Column(TextoComprimido)
     data_hora = db.Column(db.DateTime, nullable=False)
 
     usuario = db.relationship("Usuario", backref="logs_auditoria")
@@ -0,0 +1,226 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+METODOS_LEITURA = ("GET", "HEAD")
+
+# Marca da última escrita, devolvida ao cliente em cookie e em cabeçalho
+COOKIE_ESCRITA = "vidaplus_escrita"
+CABECALHO_ESCRITA = "X-Ultima-Escrita"
+
+def usuario_da_requisicao():
+    if "usuario_id" in g:
+        return g.usuario_id
+
+    try:
+        return get_jwt().get("id")
+    except RuntimeError:
+        # Rota sem JWT verificado
+        return None
+
+class SessaoRoteada(Session):
+    """Sessão que envia as leituras das requisições GET para uma réplica.
+
+    Escritas, flushes, leituras dentro de `leitura_no_primario` e qualquer
+    leitura feita depois de uma escrita na mesma sessão continuam indo para o
+    primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        primario = self._flushing or isinstance(clause, UpdateBase) or self.info.get("escreveu") or self.info.get("leitura_primario")
+
+        if bind is None and not primario:
+            roteador = current_app.extensions.get("replicas")
+            engine = roteador.engine_leitura() if roteador else None
+
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@contextmanager
+def leitura_no_primario(sessao):
+    """Envia ao primário as leituras da sessão feitas dentro do bloco.
+
+    Usado ao carregar valores que serão guardados em cache: uma réplica
+    atrasada regravaria o valor antigo por todo o TTL.
+    """
+    anterior = sessao.info.get("leitura_primario")
+    sessao.info["leitura_primario"] = True
+
+    try:
+        yield sessao
+    finally:
+        sessao.info["leitura_primario"] = anterior
+
+@event.listens_for(SessaoRoteada, "after_flush")
+def marca_escrita(sessao, contexto):
+    sessao.info["escreveu"] = True
+
+@event.listens_for(SessaoRoteada, "after_commit")
+def registra_escrita_usuario(sessao):
+    if not sessao.info.get("escreveu") or not has_request_context():
+        return
+
+    roteador = current_app.extensions.get("replicas")
+    usuario_id = usuario_da_requisicao()
+
+    if roteador and usuario_id is not None:
+        g.escrita_usuario = usuario_id
+
+class RoteadorReplicas:
+    """Escolhe a réplica de leitura de cada requisição.
+
+    As réplicas são usadas em round-robin; uma réplica que falha no teste de
+    saúde (ou perde a conexão) fica fora do rodízio até a próxima verificação.
+    Depois de escrever, o usuário lê do primário durante REPLICA_JANELA_ESCRITA
+    segundos para enxergar as próprias alterações mesmo com atraso de replicação.
+    A marca da escrita vai com o cliente (cookie assinado e cabeçalho
+    X-Ultima-Escrita, com data), então vale em qualquer worker que atender a
+    próxima requisição.
+    """
+
+    def __init__(self, app=None):
+        self.trava = threading.Lock()
+        self.proxima = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.janela_escrita = app.config["REPLICA_JANELA_ESCRITA"]
+        self.intervalo_saude = app.config["REPLICA_INTERVALO_SAUDE"]
+
+        # Os engines das réplicas ficam fora do SQLALCHEMY_BINDS, para que
+        # create_all e as migrações nunca sejam executados nelas
+        self.engines = {
+            f"replica_{i}": create_engine(uri, **app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+            for i, uri in enumerate(app.config["SQLALCHEMY_REPLICA_URIS"])
+        }
+        self.binds = list(self.engines)
+        self.disponivel = {bind: True for bind in self.binds}
+        self.verificar_em = {bind: 0.0 for bind in self.binds}
+        self.leituras = {bind: 0 for bind in self.binds}
+
+        for bind, engine in self.engines.items():
+            event.listen(engine, "handle_error", self.erro_na_replica(bind))
+
+        self.assinador = URLSafeTimedSerializer(app.config["SECRET_KEY"], salt="vidaplus-escrita")
+        app.after_request(self.devolve_marca_escrita)
+        app.extensions["replicas"] = self
+
+    def erro_na_replica(self, bind):
+        def trata(contexto):
+            if contexto.is_disconnect:
+                self.marca_indisponivel(bind)
+
+        return trata
+
+    def marca_indisponivel(self, bind):
+        logger.warning("Réplica %s indisponível; leituras voltam para o primário.", bind)
+
+        with self.trava:
+            self.disponivel[bind] = False
+            self.verificar_em[bind] = time.monotonic() + self.intervalo_saude
+
+    def saudavel(self, bind):
+        with self.trava:
+            if time.monotonic() < self.verificar_em[bind]:
+                return self.disponivel[bind]
+
+            # Só uma thread faz o teste; as demais usam o último estado conhecido
+            self.verificar_em[bind] = time.monotonic() + self.intervalo_saude
+
+        try:
+            with self.engines[bind].connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+            ok = True
+        except Exception:
+            logger.warning("Falha no teste de saúde da réplica %s.", bind, exc_info=True)
+            ok = False
+
+        with self.trava:
+            self.disponivel[bind] = ok
+
+        return ok
+
+    def escolhe_replica(self):
+        with self.trava:
+            inicio = self.proxima
+            self.proxima = (self.proxima + 1) % len(self.binds)
+
+        for i in range(len(self.binds)):
+            bind = self.binds[(inicio + i) % len(self.binds)]
+
+            if self.saudavel(bind):
+                return bind
+
+    def devolve_marca_escrita(self, resposta):
+        usuario_id = g.pop("escrita_usuario", None)
+
+        if usuario_id is not None and self.binds:
+            marca = self.assinador.dumps(usuario_id)
+            resposta.set_cookie(
+                COOKIE_ESCRITA, marca, max_age=math.ceil(self.janela_escrita),
+                httponly=True, samesite="Lax", secure=request.is_secure
+            )
+            resposta.headers[CABECALHO_ESCRITA] = marca
+
+        return resposta
+
+    def escreveu_recentemente(self, usuario_id):
+        """Confere a marca enviada pelo cliente: assinada, do mesmo usuário e dentro da janela."""
+        if usuario_id is None:
+            return False
+
+        if g.get("escrita_usuario") == usuario_id:
+            return True
+
+        marca = request.headers.get(CABECALHO_ESCRITA) or request.cookies.get(COOKIE_ESCRITA)
+
+        if not marca:
+            return False
+
+        try:
+            return self.assinador.loads(marca, max_age=self.janela_escrita) == usuario_id
+        except BadSignature:
+            return False
+
+    def engine_leitura(self):
+        """Engine da réplica para a requisição atual, ou None para usar o primário."""
+        if not self.binds or not has_request_context() or request.method not in METODOS_LEITURA:
+            return None
+
+        if self.escreveu_recentemente(usuario_da_requisicao()):
+            return None
+
+        # A réplica é escolhida uma vez por requisição, para leituras consistentes entre si
+        if "replica_leitura" not in g:
+            g.replica_leitura = self.escolhe_replica()
+
+            if g.replica_leitura is not None:
+                with self.trava:
+                    self.leituras[g.replica_leitura] += 1
+
+        if g.replica_leitura is not None:
+            return self.engines[g.replica_leitura]
+
+    def metricas(self):
+        with self.trava:
+            return [
+                ({"replica": bind, "metrica": "disponivel"}, int(self.disponivel[bind]))
+                for bind in self.binds
+            ] + [
+                ({"replica": bind, "metrica": "leituras"}, self.leituras[bind])
+                for bind in self.binds
+            ]
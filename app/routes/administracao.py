@@ -1,8 +1,16 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt
+from flask import Response, request, stream_with_context, current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Administrador, Usuario, Paciente, Profissional, Consulta
-from app.utils import valida_perfil_usuario, converte_data, mensagem_criacao_sucesso
+from app.utils import (
+    requer_perfil, converte_data, mensagem_criacao_sucesso, parametros_paginacao, parametros_paginacao_limite,
+    pagina_keyset, resposta_paginada, condicional, versao_registros, valida_data_hora
+)
+from app.services.auditoria import consulta_logs
+from app.services.exportacao import FORMATOS_EXPORTACAO
+from app.serializacao import Serializador
 
 api = Namespace("administracao", description="Operações relacionadas aos administradores")
 
@@ -30,52 +38,87 @@ atualizacao_administrador_entrada = api.model("AdminAtulizacao", {
     "telefone": fields.String
 })
 
+parametros_paginacao_doc = {
+    "limit": "Quantidade máxima de registros por página",
+    "after": "Cursor retornado em next_cursor pela página anterior"
+}
+
+# Datas, horas e enums são convertidos pelo encoder JSON da API
+serializa_administrador = Serializador({
+    "id": "id",
+    "nome": "usuario.nome",
+    "email": "usuario.email",
+    "cpf": "cpf",
+    "data_nascimento": "data_nascimento",
+    "endereco": "endereco",
+    "telefone": "telefone"
+})
+
+serializa_paciente = Serializador({
+    "id": "id",
+    "nome": "usuario.nome",
+    "email": "usuario.email",
+    "cpf": "cpf",
+    "data_nascimento": "data_nascimento",
+    "endereco": "endereco",
+    "telefone": "telefone"
+})
+
+serializa_profissional = Serializador({
+    "id": "id",
+    "nome": "usuario.nome",
+    "email": "usuario.email",
+    "conselho": "conselho",
+    "numero_conselho": "numero_conselho",
+    "especialidade": "especialidade"
+})
+
+serializa_consulta = Serializador({
+    "id": "id",
+    "paciente_id": "paciente_id",
+    "profissional_id": "profissional_id",
+    "data": "data",
+    "hora": "hora",
+    "status": "status",
+    "tipo": "tipo"
+})
+
 @api.route("/cadastro/administrador")
 class AdministradorCadastro(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
     @api.expect(cadastro_administrador_entrada)
     @api.response(201, "Novo administrador cadastrado.", cadastro_administrador_saida)
     @api.response(400, "Administrador já existente.")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
 
     def post(self):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            payload = api.payload
+        payload = api.payload
 
-            if Usuario.query.filter_by(email=payload["email"]).first():
-                api.abort(400, "E-mail já cadastrado.")
+        if Usuario.query.filter_by(email=payload["email"]).first():
+            api.abort(400, "E-mail já cadastrado.")
 
-            if Administrador.query.filter_by(cpf=payload["cpf"]).first():
-                api.abort(400, "CPF já cadastrado.")
+        if Administrador.query.filter_by(cpf=payload["cpf"]).first():
+            api.abort(400, "CPF já cadastrado.")
 
-            usuario = Usuario(
-                nome=payload["nome"],
-                email=payload["email"],
-                senha=payload["senha"],
-                perfil="administrador"
-            )
+        usuario = Usuario(
+            nome=payload["nome"],
+            email=payload["email"],
+            senha=payload["senha"],
+            perfil="administrador"
+        )
 
-            db.session.add(usuario)
-            db.session.commit()
+        administrador = Administrador(
+            usuario=usuario,
+            cpf=payload["cpf"],
+            data_nascimento=converte_data(payload["data_nascimento"]),
+            endereco=payload["endereco"],
+            telefone=payload["telefone"]
+        )
 
-            administrador = Administrador(
-                id=usuario.id,
-                cpf=payload["cpf"],
-                data_nascimento=converte_data(payload["data_nascimento"]),
-                endereco=payload["endereco"],
-                telefone=payload["telefone"]
-            )
+        # Usuário e perfil gravados na mesma transação
+        db.session.add(administrador)
+        db.session.commit()
 
-            db.session.add(administrador)
-            db.session.commit()
-        
         return {
             "id": usuario.id,
             "nome": usuario.nome,
@@ -85,279 +128,262 @@ class AdministradorCadastro(Resource):
     
 @api.route("/lista_administradores")
 class AdministradoresList(Resource):
-    @api.doc(security="Bearer Auth")
-    @jwt_required()
+    @api.doc(security="Bearer Auth", params=parametros_paginacao_doc)
+    @requer_perfil("administrador")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self):
         """Retorna uma lista de administradores"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consultas_administradores = Administrador.query.all()
-            resposta = []
-
-            for a in consultas_administradores:
-                resposta.append({
-                    "id": a.id,
-                    "nome": a.usuario.nome,
-                    "email": a.usuario.email,
-                    "cpf": a.cpf,
-                    "data_nascimento": a.data_nascimento.strftime("%Y-%m-%d"),
-                    "endereco": a.endereco,
-                    "telefone": a.telefone
-                })
+        limite, after = parametros_paginacao()
+        consulta = Administrador.query.options(joinedload(Administrador.usuario))
+        administradores, proximo_cursor = pagina_keyset(consulta, Administrador.id, limite, after)
 
-        return resposta, 200
+        return resposta_paginada(serializa_administrador.lista(administradores), proximo_cursor)
 
 @api.route("/lista_administradores/<int:id>")
 class AdministradorResource(Resource):
     @api.doc(security="Bearer Auth")
-    @jwt_required()
+    @requer_perfil("administrador")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(404, "Administrador não encontrado.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self, id):
         """Retorna os dados de um administrador específico"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            administrador = Administrador.query.get_or_404(id)
-
-            resposta = {
-                "id": administrador.id,
-                "nome": administrador.usuario.nome,
-                "email": administrador.usuario.email,
-                "cpf": administrador.cpf,
-                "data_nascimento": administrador.data_nascimento.strftime("%Y-%m-%d"),
-                "endereco": administrador.endereco,
-                "telefone": administrador.telefone
-            }
+        administrador = Administrador.query.get_or_404(id)
+        resposta = serializa_administrador(administrador)
 
         return resposta, 200
 
     @api.expect(atualizacao_administrador_entrada)
-    @jwt_required()
+    @requer_perfil("administrador")
     def put(self, id):
         """Atualiza informações de um administrador"""
+        administrador = Administrador.query.get_or_404(id)
+
+        payload = api.payload
+
+        if "nome" in payload:
+            administrador.usuario.nome = payload["nome"]
+
+        if "email" in payload:
+            if Usuario.query.filter(Usuario.email == payload["email"], Usuario.id != administrador.id).first():
+                return {"message": "E-mail já cadastrado."}, 400
+            else:
+                administrador.usuario.email = payload["email"]
+
+        if "endereco" in payload:
+            administrador.endereco = payload["endereco"]
+
+        if "telefone" in payload:
+            administrador.telefone = payload["telefone"]
+
+        db.session.commit()
 
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            administrador = Administrador.query.get_or_404(id)
-
-            payload = api.payload
-            
-            if "nome" in payload:
-                administrador.usuario.nome = payload["nome"]
-
-            if "email" in payload:
-                if Usuario.query.filter(Usuario.email == payload["email"], Usuario.id != administrador.id).first():
-                    return {"message": "E-mail já cadastrado."}, 400
-                else:
-                    administrador.usuario.email = payload["email"]
-            
-            if "endereco" in payload:
-                administrador.endereco = payload["endereco"]
-
-            if "telefone" in payload:
-                administrador.telefone = payload["telefone"]
-
-            db.session.commit()
-    
         return {"message": f"Administrador {id} atualizado"}, 200   
     
 @api.route("/lista_pacientes")
 class AdministradorListaPacientes(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda: versao_registros(Paciente))
+    @api.doc(params=parametros_paginacao_doc)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self):
         """Retorna uma lista de pacientes"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consulta_pacientes = Paciente.query.all()
-            resposta = []
-
-            for p in consulta_pacientes:
-                resposta.append({
-                    "id": p.id,
-                    "nome": p.usuario.nome,
-                    "email": p.usuario.email,
-                    "cpf": p.cpf,
-                    "data_nascimento": p.data_nascimento.strftime("%Y-%m-%d"),
-                    "endereco": p.endereco,
-                    "telefone": p.telefone
-                })
+        limite, after = parametros_paginacao()
+        consulta = Paciente.query.options(joinedload(Paciente.usuario))
+        pacientes, proximo_cursor = pagina_keyset(consulta, Paciente.id, limite, after)
 
-        return resposta, 200
+        return resposta_paginada(serializa_paciente.lista(pacientes), proximo_cursor)
     
 @api.route("/lista_pacientes/<int:id>")
 class AdministradorPacienteResource(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda id: versao_registros(Paciente, Paciente.id == id), entidade=True)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(404, "Paciente não encontrado.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self, id):
         """Retorna os dados de um paciente específico"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            paciente = Paciente.query.get_or_404(id)
-
-            resposta = {
-                "id": paciente.id,
-                "nome": paciente.usuario.nome,
-                "email": paciente.usuario.email,
-                "cpf": paciente.cpf,
-                "data_nascimento": paciente.data_nascimento.strftime("%Y-%m-%d"),
-                "endereco": paciente.endereco,
-                "telefone": paciente.telefone
-            }
+        resposta = current_app.extensions["cache"].obtem(
+            f"pacientes:{id}",
+            lambda: serializa_paciente(Paciente.query.options(joinedload(Paciente.usuario)).get_or_404(id))
+        )
 
         return resposta, 200
     
 @api.route("/lista_profissionais")
 class AdministradorListaProfissionais(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda: versao_registros(Profissional))
+    @api.doc(params=parametros_paginacao_doc)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self):
         """Retorna uma lista de profissionais de saúde"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consulta_profissionais = Profissional.query.all()
-            resposta = []
-
-            for p in consulta_profissionais:
-                resposta.append({
-                    "id": p.id,
-                    "nome": p.usuario.nome,
-                    "email": p.usuario.email,
-                    "conselho": p.conselho,
-                    "numero_conselho": p.numero_conselho,
-                    "especialidade": p.especialidade
-                })
+        limite, after = parametros_paginacao()
+        consulta = Profissional.query.options(joinedload(Profissional.usuario))
+        profissionais, proximo_cursor = pagina_keyset(consulta, Profissional.id, limite, after)
 
-        return resposta, 200
+        return resposta_paginada(serializa_profissional.lista(profissionais), proximo_cursor)
 
 @api.route("/lista_profissionais/<int:id>")
 class AdministradorProfissionalResource(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda id: versao_registros(Profissional, Profissional.id == id), entidade=True)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(404, "Profissional não encontrado.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self, id):
         """Retorna os dados de um profissional específico"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            profissional = Profissional.query.get_or_404(id)
-
-            resposta = {
-                "id": profissional.id,
-                "nome": profissional.usuario.nome,
-                "email": profissional.usuario.email,
-                "conselho": profissional.conselho,
-                "numero_conselho": profissional.numero_conselho,
-                "especialidade": profissional.especialidade
-            }
+        resposta = current_app.extensions["cache"].obtem(
+            f"profissionais:{id}",
+            lambda: serializa_profissional(Profissional.query.options(joinedload(Profissional.usuario)).get_or_404(id))
+        )
 
         return resposta, 200
 
 @api.route("/lista_consultas")
 class AdministradorListaConsultas(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda: versao_registros(Consulta))
+    @api.doc(params=parametros_paginacao_doc)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self):
         """Retorna uma lista de todas as consultas agendadas"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consulta_consultas = Consulta.query.all()
-            resposta = []
-
-            for c in consulta_consultas:
-                resposta.append({
-                    "id": c.id,
-                    "paciente_id": c.paciente_id,
-                    "profissional_id": c.profissional_id,
-                    "data": c.data.strftime("%Y-%m-%d"),
-                    "hora": c.hora.strftime("%H:%M:%S"),
-                    "status": c.status.value,
-                    "tipo": c.tipo
-                })
+        limite, after = parametros_paginacao()
+        consultas, proximo_cursor = pagina_keyset(Consulta.query, Consulta.id, limite, after)
 
-        return resposta, 200
+        return resposta_paginada(serializa_consulta.lista(consultas), proximo_cursor)
     
 @api.route("/lista_consultas/<int:id>")
 class AdministradorConsultaResource(Resource):
-    @jwt_required()
+    @requer_perfil("administrador")
+    @condicional(lambda id: versao_registros(Consulta, Consulta.id == id), entidade=True)
+    @api.response(304, "Não modificado desde a última consulta (ETag).")
     @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
     @api.response(404, "Consulta não encontrada.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self, id):
         """Retorna os dados de uma consulta específica"""
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "administrador")
-        
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consulta = Consulta.query.get_or_404(id)
-
-            resposta = {
-                "id": consulta.id,
-                "paciente_id": consulta.paciente_id,
-                "profissional_id": consulta.profissional_id,
-                "data": consulta.data.strftime("%Y-%m-%d"),
-                "hora": consulta.hora.strftime("%H:%M:%S"),
-                "status": consulta.status.value,
-                "tipo": consulta.tipo
-            }
-
-        return resposta, 200
\ No newline at end of file
+        resposta = current_app.extensions["cache"].obtem(
+            f"consultas:{id}",
+            lambda: serializa_consulta(Consulta.query.get_or_404(id))
+        )
+
+        return resposta, 200
+
+@api.route("/auditoria")
+class AdministradorAuditoria(Resource):
+    @requer_perfil("administrador")
+    @api.doc(params={
+        "usuario_id": "Filtra pelo usuário que executou a ação",
+        "acao": "Filtra pela ação (valor exato)",
+        "inicio": "Data/hora inicial, inclusiva (ISO 8601)",
+        "fim": "Data/hora final, exclusiva (ISO 8601)",
+        **parametros_paginacao_doc
+    })
+    @api.response(400, "Parâmetros inválidos.")
+    @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
+    @api.response(500, "Erro interno do servidor.")
+
+    def get(self):
+        """Consulta os logs de auditoria, do mais recente para o mais antigo"""
+        limite = parametros_paginacao_limite()
+        filtros = {"acao": request.args.get("acao")}
+
+        usuario_id = request.args.get("usuario_id")
+
+        if usuario_id:
+            if not usuario_id.isdigit():
+                return {"message": "O parâmetro usuario_id deve ser um número."}, 400
+
+            filtros["usuario_id"] = int(usuario_id)
+
+        for parametro in ("inicio", "fim"):
+            if request.args.get(parametro):
+                data_hora = valida_data_hora(request.args[parametro])
+
+                if isinstance(data_hora, tuple):
+                    return data_hora
+
+                filtros[parametro] = data_hora
+
+        logs, proximo_cursor = consulta_logs(limite, request.args.get("after"), **filtros)
+
+        return resposta_paginada(logs, proximo_cursor)
+
+def consulta_exportacao(entidade):
+    """Retorna as colunas e o SELECT de cada entidade exportável."""
+    match entidade:
+        case "pacientes":
+            colunas = ["id", "nome", "email", "cpf", "data_nascimento", "endereco", "telefone"]
+            consulta = (
+                select(Paciente.id, Usuario.nome, Usuario.email, Paciente.cpf,
+                       Paciente.data_nascimento, Paciente.endereco, Paciente.telefone)
+                .join(Usuario, Usuario.id == Paciente.id)
+                .order_by(Paciente.id)
+            )
+        case "profissionais":
+            colunas = ["id", "nome", "email", "conselho", "numero_conselho", "especialidade"]
+            consulta = (
+                select(Profissional.id, Usuario.nome, Usuario.email, Profissional.conselho,
+                       Profissional.numero_conselho, Profissional.especialidade)
+                .join(Usuario, Usuario.id == Profissional.id)
+                .order_by(Profissional.id)
+            )
+        case "consultas":
+            colunas = ["id", "paciente_id", "profissional_id", "data", "hora", "status", "tipo"]
+            consulta = (
+                select(Consulta.id, Consulta.paciente_id, Consulta.profissional_id, Consulta.data,
+                       Consulta.hora, Consulta.status, Consulta.tipo)
+                .order_by(Consulta.id)
+            )
+        case _:
+            return None, None
+
+    return colunas, consulta
+
+@api.route("/export/<string:entidade>")
+class AdministradorExportacao(Resource):
+    @requer_perfil("administrador")
+    @api.doc(params={"format": "Formato da exportação: ndjson (padrão) ou csv"})
+    @api.response(200, "Exportação em streaming.")
+    @api.response(400, "Formato inválido.")
+    @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
+    @api.response(404, "Entidade não encontrada.")
+
+    def get(self, entidade):
+        """Exporta pacientes, profissionais ou consultas em streaming (NDJSON ou CSV)"""
+        formato = request.args.get("format", "ndjson")
+
+        if formato not in FORMATOS_EXPORTACAO:
+            return {"message": "Formato inválido. Use ndjson ou csv."}, 400
+
+        colunas, consulta = consulta_exportacao(entidade)
+
+        if consulta is None:
+            return {"message": "Entidade não encontrada."}, 404
+
+        gerador, mimetype = FORMATOS_EXPORTACAO[formato]
+        tamanho_lote = current_app.config["EXPORTACAO_TAMANHO_LOTE"]
+
+        return Response(
+            stream_with_context(gerador(consulta, colunas, tamanho_lote)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename={entidade}.{formato}"}
+        )
@@ -1,7 +1,9 @@
 from flask_restx import Namespace, Resource, fields
+from flask import current_app
 from flask_jwt_extended import create_access_token
+from app import db
 from app.models import Usuario
-from app.services.security import verificar_senha
+from app.services.security import precisa_rehash, FilaVerificacaoCheia
 
 api = Namespace("auth", description="Autenticação e geração de JWT")
 
@@ -19,6 +21,7 @@ class Login(Resource):
     @api.expect(login_model, validate=True)
     @api.response(200, "Login bem-sucedido", token_model)
     @api.response(401, "E-mail ou senha inválidos")
+    @api.response(503, "Muitos logins simultâneos, tente novamente.")
 
     def post(self):
         payload = api.payload
@@ -27,8 +30,24 @@ class Login(Resource):
         if not usuario:
             return {"message": "E-mail ou senha inválidos."}, 401
         
-        if not verificar_senha(payload["senha"], usuario.senha):
+        verificador = current_app.extensions["verificador_senhas"]
+
+        try:
+            senha_valida = verificador.verifica(payload["senha"], usuario.senha)
+        except FilaVerificacaoCheia:
+            return {"message": "Muitos logins simultâneos, tente novamente."}, 503, {"Retry-After": "1"}
+
+        if not senha_valida:
             return {"message": "E-mail ou senha inválidos."}, 401
+
+        # Atualiza o hash gravado com parâmetros antigos aproveitando a senha em texto.
+        # Com o pool cheio o rehash fica para um próximo login, sem recusar este.
+        if precisa_rehash(usuario.senha):
+            try:
+                usuario.senha = verificador.gera_hash(payload["senha"])
+                db.session.commit()
+            except FilaVerificacaoCheia:
+                pass
         
         token = create_access_token(identity=str(usuario.id),
                                     additional_claims={"id": usuario.id, "perfil": usuario.perfil.value})
@@ -1,10 +1,14 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
-from flask_jwt_extended import jwt_required, get_jwt
+from flask import request, current_app, g
+from flask_jwt_extended import jwt_required
+from datetime import date, time, timedelta
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models import Consulta, Profissional
-from app.utils import valida_perfil_usuario, valida_data_hora
+from app.utils import requer_perfil, condicional, versao_registros
 from app.audit import registrar_auditoria
+from app.services.agenda import horarios_livres, verifica_horario
+from app.serializacao import Serializador
 
 api = Namespace("consultas", description="Operações relacionadas a consultas médicas")
 
@@ -31,102 +35,161 @@ consulta_update_model = api.model("ConsultaUpdate", {
     "tipo": fields.String(description="Tipo da consulta: presencial ou online")
 })
 
+serializa_consulta = Serializador.de_modelo(consulta_output)
+
+def converte_data_hora(data, hora):
+    """Converte data (YYYY-MM-DD) e hora (HH:MM) da requisição, abortando com 400 se inválidas."""
+    try:
+        return date.fromisoformat(data), time.fromisoformat(hora)
+    except (TypeError, ValueError):
+        api.abort(400, "Data ou hora inválida. Use YYYY-MM-DD e HH:MM.")
+
 @api.route("/")
 class ConsultaCollection(Resource):
-    @jwt_required()
-    @api.marshal_list_with(consulta_output)
+    @requer_perfil("paciente")
+    @condicional(lambda: versao_registros(Consulta, Consulta.paciente_id == g.usuario_id))
+    @api.response(200, "Consultas do paciente logado.", [consulta_output])
+    @api.response(304, "Nenhuma consulta alterada desde a última listagem (ETag).")
     def get(self):
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            id_paciente = identificacao["id"]
-            consultas = Consulta.query.filter_by(paciente_id=id_paciente).all()
+        id_paciente = g.usuario_id
+        consultas = (
+            Consulta.query
+            .filter_by(paciente_id=id_paciente)
+            .order_by(Consulta.data, Consulta.hora)
+            .all()
+        )
 
-            return consultas, 200
+        return serializa_consulta.lista(consultas), 200
 
 
-    @jwt_required()
+    @requer_perfil("paciente")
     @api.expect(consulta_input, validate=True)
-    @api.marshal_with(consulta_output)
+    @api.response(201, "Consulta agendada.", consulta_output)
     def post(self):
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            payload = request.json
-            profissional_id = payload["profissional_id"]
-            data = payload["data"]
-            hora = payload["hora"]
-            tipo = payload["tipo"]
-
-            valida_data_hora(data)
-
-            profissional = Profissional.query.get(profissional_id)
-            if not profissional:
-                api.abort(404, "Profissional não encontrado.")
-
-            nova_consulta = Consulta(
-                paciente_id=identificacao["id"],
-                profissional_id=profissional_id,
-                data=data,
-                hora=hora,
-                tipo=tipo,
-                status="agendada"
-            )
-
-            db.session.add(nova_consulta)
+        payload = request.json
+        profissional_id = payload["profissional_id"]
+        data = payload["data"]
+        hora = payload["hora"]
+        tipo = payload["tipo"]
+
+        data, hora = converte_data_hora(data, hora)
+
+        # Trava a linha do profissional: reservas simultâneas na mesma agenda são serializadas
+        profissional = Profissional.query.filter_by(id=profissional_id).with_for_update().first()
+        if not profissional:
+            api.abort(404, "Profissional não encontrado.")
+
+        conflito = verifica_horario(profissional_id, data, hora)
+        if conflito:
+            api.abort(409, conflito)
+
+        nova_consulta = Consulta(
+            paciente_id=g.usuario_id,
+            profissional_id=profissional_id,
+            data=data,
+            hora=hora,
+            tipo=tipo,
+            status="agendada"
+        )
+
+        db.session.add(nova_consulta)
+
+        try:
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            api.abort(409, "Horário já reservado.")
 
-            registrar_auditoria(
-                usuario_id=identificacao["id"],
-                acao="NOVA_CONSULTA",
-                detalhes=f"Consulta criada para o paciente {identificacao['id']}"
-            )
+        registrar_auditoria(
+            usuario_id=g.usuario_id,
+            acao="NOVA_CONSULTA",
+            detalhes=f"Consulta criada para o paciente {g.usuario_id}"
+        )
 
-            return nova_consulta, 201
+        return serializa_consulta(nova_consulta), 201
 
 
 @api.route("/<int:id_consulta>")
 class ConsultaUpdate(Resource):
-    @jwt_required()
+    @requer_perfil("paciente")
     @api.expect(consulta_update_model)
-    @api.marshal_with(consulta_output)
+    @api.response(200, "Consulta atualizada.", consulta_output)
+    @api.response(403, "A consulta não é do paciente logado.")
 
     def put(self, id_consulta):
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
+        consulta = Consulta.query.get_or_404(id_consulta)
+
+        if consulta.paciente_id != g.usuario_id:
+            api.abort(403, "Não tem permissão para alterar esta consulta.")
 
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            consulta = Consulta.query.get_or_404(id_consulta)
+        payload = request.json
+
+        if "data" in payload or "hora" in payload:
+            # Sem o campo no corpo vale o valor gravado, que pode ser nulo (400 na conversão)
+            data_atual = consulta.data.isoformat() if consulta.data else None
+            hora_atual = consulta.hora.isoformat() if consulta.hora else None
+            data, hora = converte_data_hora(
+                payload["data"] if "data" in payload else data_atual,
+                payload["hora"] if "hora" in payload else hora_atual
+            )
 
-            payload = request.json
+            Profissional.query.filter_by(id=consulta.profissional_id).with_for_update().first()
 
-            if "data" in payload:
-                consulta.data = payload["data"]
+            conflito = verifica_horario(consulta.profissional_id, data, hora, ignorar_id=consulta.id)
+            if conflito:
+                api.abort(409, conflito)
 
-            if "hora" in payload:
-                consulta.hora = payload["hora"]
+            consulta.data = data
+            consulta.hora = hora
 
-            if "tipo" in payload:
-                consulta.tipo = payload["tipo"]
+        if "tipo" in payload:
+            consulta.tipo = payload["tipo"]
 
+        try:
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            api.abort(409, "Horário já reservado.")
 
-            registrar_auditoria(
-                usuario_id=identificacao["id"],
-                acao="ATUALIZAR_CONSULTA",
-                detalhes=f"Consulta {id_consulta} atualizada"
-            )
+        registrar_auditoria(
+            usuario_id=g.usuario_id,
+            acao="ATUALIZAR_CONSULTA",
+            detalhes=f"Consulta {id_consulta} atualizada"
+        )
+
+        return serializa_consulta(consulta), 200
 
-            return consulta, 200
 
+@api.route("/disponibilidade/<int:profissional_id>")
+class ConsultaDisponibilidade(Resource):
+    @jwt_required()
+    @api.doc(params={
+        "inicio": "Data inicial (YYYY-MM-DD), padrão hoje",
+        "fim": "Data final (YYYY-MM-DD), padrão 7 dias após o início"
+    })
+    @api.response(400, "Período inválido.")
+    @api.response(404, "Profissional não encontrado.")
+
+    def get(self, profissional_id):
+        """Lista os horários livres de um profissional no período"""
+        try:
+            inicio = date.fromisoformat(request.args.get("inicio", date.today().isoformat()))
+            fim = date.fromisoformat(request.args.get("fim", (inicio + timedelta(days=7)).isoformat()))
+        except ValueError:
+            return {"message": "Período inválido. Use YYYY-MM-DD."}, 400
+
+        dias_maximos = current_app.config["AGENDA_DIAS_MAXIMOS"]
+
+        if fim < inicio or (fim - inicio).days >= dias_maximos:
+            return {"message": f"Período inválido. Consulte no máximo {dias_maximos} dias."}, 400
+
+        if not db.session.get(Profissional, profissional_id):
+            return {"message": "Profissional não encontrado."}, 404
+
+        return {
+            "profissional_id": profissional_id,
+            "horarios": [
+                {"data": dia["data"].isoformat(), "horas": [h.strftime("%H:%M") for h in dia["horas"]]}
+                for dia in horarios_livres(profissional_id, inicio, fim)
+            ]
+        }, 200
@@ -1,10 +1,11 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt
-from flask import request
+from flask import request, g
 from app import db
 from app.models import Paciente, Usuario
 from app.audit import registrar_auditoria
-from app.utils import valida_perfil_usuario
+from app.utils import requer_perfil, condicional, versao_registros, parametros_paginacao_limite, resposta_paginada
+from app.serializacao import Serializador
+from app.services.historico import historico
 
 api = Namespace("pacientes", description="Operações relacionadas a pacientes")
 
@@ -25,46 +26,29 @@ paciente_update_model = api.model("PacienteUpdate", {
     "telefone": fields.String
 })
 
+serializa_paciente = Serializador.de_modelo(paciente_model, nome="usuario.nome", email="usuario.email")
 
 @api.route("/")
 class PacienteResource(Resource):
 
-    @jwt_required()
-    @api.marshal_with(paciente_model, code=200)
+    @requer_perfil("paciente")
+    @condicional(lambda: versao_registros(Paciente, Paciente.id == g.usuario_id), entidade=True)
+    @api.response(200, "Dados do paciente logado.", paciente_model)
+    @api.response(304, "Dados não modificados desde a última consulta (ETag).")
     @api.response(401, "Você não tem permissão.")
     @api.response(404, "Paciente não encontrado.")
     def get(self):
-        identificacao = get_jwt()
-        validacao = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao:
-            return {"message": "Não autorizado"}, 401
-
-        id_paciente = identificacao["id"]
+        id_paciente = g.usuario_id
         paciente = Paciente.query.get_or_404(id_paciente)
 
-        return {
-            "id": paciente.id,
-            "nome": paciente.usuario.nome,
-            "email": paciente.usuario.email,
-            "cpf": paciente.cpf,
-            "data_nascimento": paciente.data_nascimento.strftime("%Y-%m-%d") if paciente.data_nascimento else None,
-            "endereco": paciente.endereco,
-            "telefone": paciente.telefone
-        }, 200
+        return serializa_paciente(paciente), 200
 
 
-    @jwt_required()
+    @requer_perfil("paciente")
     @api.expect(paciente_update_model)
     @api.response(200, "Paciente atualizado.")
     def put(self):
-        identificacao = get_jwt()
-        validacao = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao:
-            return {"message": "Não autorizado"}, 401
-
-        id_paciente = identificacao["id"]
+        id_paciente = g.usuario_id
         paciente = Paciente.query.get_or_404(id_paciente)
 
         data = request.json or {}
@@ -96,3 +80,21 @@ class PacienteResource(Resource):
         )
 
         return {"message": f"Paciente {id_paciente} atualizado"}, 200
+
+@api.route("/historico")
+class PacienteHistorico(Resource):
+    @requer_perfil("paciente")
+    @api.doc(params={
+        "limit": "Quantidade máxima de consultas por página",
+        "after": "Cursor retornado em next_cursor pela página anterior"
+    })
+    @api.response(200, "Consultas do paciente com prontuários e telemedicina, da mais recente para a mais antiga.")
+    @api.response(400, "Parâmetros de paginação inválidos.")
+    @api.response(401, "Você não tem permissão.")
+
+    def get(self):
+        """Linha do tempo do paciente logado"""
+        limite = parametros_paginacao_limite()
+        itens, proximo_cursor = historico("paciente", g.usuario_id, limite, request.args.get("after"))
+
+        return resposta_paginada(itens, proximo_cursor)
\ No newline at end of file
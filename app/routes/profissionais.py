@@ -1,9 +1,12 @@
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt
-from app.models import Profissional
+from flask import g, request
+from datetime import time
+from app.models import Profissional, AgendaProfissional
 from app import db
-from app.utils import valida_perfil_usuario
+from app.utils import requer_perfil, condicional, versao_registros, parametros_paginacao_limite, resposta_paginada
 from app.audit import registrar_auditoria
+from app.serializacao import Serializador
+from app.services.historico import historico
 
 api = Namespace("profissionais", description="Operações relacionadas aos profissionais de saúde")
 
@@ -22,75 +25,145 @@ atualiza_profissional_input = api.model("AtualizaProfissional", {
     "especialidade": fields.String
 })
 
+janela_agenda_model = api.model("JanelaAgenda", {
+    "dia_semana": fields.Integer(required=True, description="0 = segunda ... 6 = domingo"),
+    "hora_inicio": fields.String(required=True, example="08:00"),
+    "hora_fim": fields.String(required=True, example="12:00"),
+    "duracao_minutos": fields.Integer(description="Duração de cada consulta", default=30)
+})
+
+agenda_input = api.model("AgendaProfissional", {
+    "janelas": fields.List(fields.Nested(janela_agenda_model), required=True)
+})
+
+serializa_profissional = Serializador.de_modelo(
+    consulta_profissional_output, nome="usuario.nome", email="usuario.email"
+)
+
+def serializa_janela(janela):
+    return {
+        "dia_semana": janela.dia_semana,
+        "hora_inicio": janela.hora_inicio.strftime("%H:%M"),
+        "hora_fim": janela.hora_fim.strftime("%H:%M"),
+        "duracao_minutos": janela.duracao_minutos
+    }
+
 @api.route("/")
 class ProfissionalResource(Resource):
-    @jwt_required()
+    @requer_perfil("profissional")
+    @condicional(lambda: versao_registros(Profissional, Profissional.id == g.usuario_id), entidade=True)
+    @api.response(304, "Dados não modificados desde a última consulta (ETag).")
     @api.response(200, "Profissional retornado com sucesso", consulta_profissional_output)
     @api.response(401, "Você não tem permissão para este acesso.")
     @api.response(404, "Não foi possível encontrar o profissional de saúde solicitado.")
     @api.response(500, "Erro interno do servidor.")
 
     def get(self):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            id_profissional = identificacao["id"]
-            profissional = Profissional.query.get_or_404(id_profissional)
-
-            return {
-                "id": profissional.id,
-                "nome": profissional.usuario.nome,
-                "email": profissional.usuario.email,
-                "conselho": profissional.conselho,
-                "numero_conselho": profissional.numero_conselho,
-                "especialidade": profissional.especialidade
-            }, 200
-    
-    @jwt_required()
+        id_profissional = g.usuario_id
+        profissional = Profissional.query.get_or_404(id_profissional)
+
+        return serializa_profissional(profissional), 200
+
+    @requer_perfil("profissional")
     @api.expect(atualiza_profissional_input)
     @api.response(401, "Apenas profissionais podem acessar esta funcionalidade.")
     @api.response(404, "Não foi possível encontrar o profissional de saúde solicitado.")
     @api.response(500, "Erro interno do servidor.")
     def put(self):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return validacao_usuario
-        
-        else:
-            id_profissional = identificacao["id"]
-            profissional = Profissional.query.get_or_404(id_profissional)
-            payload = api.payload
-
-            if "conselho" in payload:
-                profissional.conselho = payload["conselho"]
-
-            if "numero_conselho" in payload:
-                profissional.numero_conselho = payload["numero_conselho"]
-
-            if "especialidade" in payload:
-                profissional.especialidade = payload["especialidade"]
-
-            db.session.commit()
-
-            registrar_auditoria (
-                usuario_id=id_profissional,
-                acao = "ATUALIZAR_PROFISSIONAL",
-                detalhes= f"Profissional atualizado: {id_profissional}"
-            )            
-
-            return {
-                "id": profissional.id,
-                "nome": profissional.usuario.nome,
-                "email": profissional.usuario.email,
-                "conselho": profissional.conselho,
-                "numero_conselho": profissional.numero_conselho,
-                "especialidade": profissional.especialidade
-            }, 200
+        id_profissional = g.usuario_id
+        profissional = Profissional.query.get_or_404(id_profissional)
+        payload = api.payload
+
+        if "conselho" in payload:
+            profissional.conselho = payload["conselho"]
+
+        if "numero_conselho" in payload:
+            profissional.numero_conselho = payload["numero_conselho"]
+
+        if "especialidade" in payload:
+            profissional.especialidade = payload["especialidade"]
+
+        db.session.commit()
+
+        registrar_auditoria (
+            usuario_id=id_profissional,
+            acao = "ATUALIZAR_PROFISSIONAL",
+            detalhes= f"Profissional atualizado: {id_profissional}"
+        )            
+
+        return serializa_profissional(profissional), 200
+
+@api.route("/agenda")
+class ProfissionalAgenda(Resource):
+    @requer_perfil("profissional")
+    @api.response(200, "Agenda do profissional logado.")
+    @api.response(401, "Apenas profissionais podem acessar esta funcionalidade.")
+
+    def get(self):
+        janelas = (
+            AgendaProfissional.query
+            .filter_by(profissional_id=g.usuario_id)
+            .order_by(AgendaProfissional.dia_semana, AgendaProfissional.hora_inicio)
+            .all()
+        )
+
+        return {"janelas": [serializa_janela(j) for j in janelas]}, 200
+
+    @requer_perfil("profissional")
+    @api.expect(agenda_input, validate=True)
+    @api.response(200, "Agenda atualizada.")
+    @api.response(400, "Janela de atendimento inválida.")
+    @api.response(401, "Apenas profissionais podem acessar esta funcionalidade.")
+
+    def put(self):
+        """Substitui a agenda semanal de atendimento do profissional logado"""
+        id_profissional = g.usuario_id
+        Profissional.query.get_or_404(id_profissional)
+        janelas = []
+
+        for j in api.payload["janelas"]:
+            try:
+                janela = AgendaProfissional(
+                    profissional_id=id_profissional,
+                    dia_semana=j["dia_semana"],
+                    hora_inicio=time.fromisoformat(j["hora_inicio"]),
+                    hora_fim=time.fromisoformat(j["hora_fim"]),
+                    duracao_minutos=j.get("duracao_minutos") or 30
+                )
+            except ValueError:
+                return {"message": "Horário inválido. Use HH:MM."}, 400
+
+            if not 0 <= janela.dia_semana <= 6 or janela.hora_inicio >= janela.hora_fim or janela.duracao_minutos <= 0:
+                return {"message": "Janela de atendimento inválida."}, 400
+
+            janelas.append(janela)
+
+        AgendaProfissional.query.filter_by(profissional_id=id_profissional).delete()
+        db.session.add_all(janelas)
+        db.session.commit()
+
+        registrar_auditoria(
+            usuario_id=id_profissional,
+            acao="ATUALIZAR_AGENDA",
+            detalhes=f"Agenda atualizada: {len(janelas)} janelas"
+        )
+
+        return {"janelas": [serializa_janela(j) for j in janelas]}, 200
+
+@api.route("/historico")
+class ProfissionalHistorico(Resource):
+    @requer_perfil("profissional")
+    @api.doc(params={
+        "limit": "Quantidade máxima de consultas por página",
+        "after": "Cursor retornado em next_cursor pela página anterior"
+    })
+    @api.response(200, "Consultas do profissional com prontuários e telemedicina, da mais recente para a mais antiga.")
+    @api.response(400, "Parâmetros de paginação inválidos.")
+    @api.response(401, "Apenas profissionais podem acessar esta funcionalidade.")
+
+    def get(self):
+        """Linha do tempo dos atendimentos do profissional logado"""
+        limite = parametros_paginacao_limite()
+        itens, proximo_cursor = historico("profissional", g.usuario_id, limite, request.args.get("after"))
+
+        return resposta_paginada(itens, proximo_cursor)
\ No newline at end of file
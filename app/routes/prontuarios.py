@@ -1,11 +1,12 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
-from flask_jwt_extended import jwt_required, get_jwt
+from flask import request, g
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Consulta, Prontuario
-from app.utils import valida_perfil_usuario
+from app.utils import requer_perfil, parametros_paginacao, resposta_paginada
 from datetime import datetime
 from app.audit import registrar_auditoria
+from app.services.busca import indexa_prontuario, busca_prontuarios
 
 api = Namespace("prontuarios", description="Operações relacionadas a prontuários médicos")
 
@@ -24,133 +25,150 @@ prontuario_output = api.model("ProntuarioOut", {
 
 @api.route("/")
 class ProntuariosCreate(Resource):
-    @jwt_required()
+    @requer_perfil("profissional")
     @api.expect(prontuario_input, validate=True)
     @api.response(500, "Erro interno do servidor.")	
 
     def post(self):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return {"messagem": "Apenas profissionais podem acessar esta funcionalidade."}, 401
-        
-        else:
-            data = request.json
-            id_profissional = identificacao["id"]
-            consulta_id = data["consulta_id"]
-            anotacoes = data["anotacoes"]
-            prescricao = data["prescricao"]
-
-            consulta = Consulta.query.get(consulta_id)
-
-            if not consulta:
-                return {"messagem": "Prontuário não encontrado"}, 404
-            
-            if consulta.profissional_id != id_profissional:
-                return {"messagem": "Este prontuário não é do seu paciente."}, 401
-            
-            if consulta.prontuario:
-                return {"messagem": "Já existe um prntuário para este paciente."}, 400
-            
-            prontuario = Prontuario(
-                consulta_id=consulta_id,
-                anotacoes=anotacoes,
-                prescricao=prescricao,
-                data_registro=datetime.now()
-            )
-
-            db.session.add(prontuario)
-            db.session.commit()
-
-            registrar_auditoria (
-                usuario_id=id_profissional,
-                acao = "CRIAR_PRONTUARIO",
-                detalhes= f"Prontuário criado para consulta {prontuario.consulta_id}"
-            )
-
-            return {
-                "consulta_id": prontuario.consulta_id,
-                "anotacoes": prontuario.anotacoes,
-                "prescricao": prontuario.prescricao
-            }, 201
-        
+        data = request.json
+        id_profissional = g.usuario_id
+        consulta_id = data["consulta_id"]
+        anotacoes = data["anotacoes"]
+        prescricao = data["prescricao"]
+
+        consulta = Consulta.query.get(consulta_id)
+
+        if not consulta:
+            return {"messagem": "Prontuário não encontrado"}, 404
+
+        if consulta.profissional_id != id_profissional:
+            return {"messagem": "Este prontuário não é do seu paciente."}, 401
+
+        if consulta.prontuario:
+            return {"messagem": "Já existe um prntuário para este paciente."}, 400
+
+        prontuario = Prontuario(
+            consulta_id=consulta_id,
+            anotacoes=anotacoes,
+            prescricao=prescricao,
+            data_registro=datetime.now()
+        )
+
+        db.session.add(prontuario)
+        indexa_prontuario(prontuario, consulta)
+        db.session.commit()
+
+        registrar_auditoria (
+            usuario_id=id_profissional,
+            acao = "CRIAR_PRONTUARIO",
+            detalhes= f"Prontuário criado para consulta {prontuario.consulta_id}"
+        )
+
+        return {
+            "consulta_id": prontuario.consulta_id,
+            "anotacoes": prontuario.anotacoes,
+            "prescricao": prontuario.prescricao
+        }, 201
+
+@api.route("/busca")
+class ProntuarioBusca(Resource):
+    @requer_perfil("profissional")
+    @api.doc(params={
+        "q": "Texto buscado nas anotações e prescrições",
+        "paciente_id": "Restringe a busca a um paciente",
+        "limit": "Quantidade máxima de resultados por página",
+        "after": "Cursor retornado em next_cursor pela página anterior"
+    })
+    @api.response(200, "Prontuários encontrados, do mais relevante para o menos relevante.")
+    @api.response(400, "Parâmetro q ausente ou inválido.")
+    @api.response(401, "Apenas profissionais podem acessar esta funcionalidade.")
+
+    def get(self):
+        """Busca textual nos prontuários das consultas do profissional"""
+        texto = request.args.get("q", "").strip()
+
+        if not texto:
+            return {"message": "Informe o texto da busca no parâmetro q."}, 400
+
+        paciente_id = request.args.get("paciente_id")
+
+        if paciente_id is not None and not paciente_id.isdigit():
+            return {"message": "paciente_id inválido."}, 400
+
+        limite, after = parametros_paginacao()
+
+        # Na busca o cursor é o deslocamento no ranking
+        if after is not None and after < 0:
+            return {"message": "Parâmetros de paginação inválidos."}, 400
+
+        resultados, proximo = busca_prontuarios(
+            texto, g.usuario_id, limite, after or 0, int(paciente_id) if paciente_id else None
+        )
+
+        return resposta_paginada(resultados, proximo)
+
 @api.route("/<int:id>")
 class ProntuarioResource(Resource):
-    @jwt_required()
+    @requer_perfil("profissional")
     @api.response(401, "Você não tem permissão visualizar este prontuário.")
     @api.response(404, "Prontuário não encontrado.")
     @api.response(403, "Você não tem permissão para acessar este prontuário.")
 
     def get(self, id):
-        identificacao = get_jwt()
-        id_profissional = identificacao["id"]
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return 401
-        
-        else:
-            consulta = Consulta.query.get(id)
-
-            if not consulta:
-                return 404
-            
-            if consulta.profissional_id != id_profissional:
-                return 403
-            
-            if not consulta.prontuario:
-                return {"message": "Esta consulta não possui prontuário."}, 200
-
-            resultado = []
-
-            for p in consulta.prontuario:
-                resultado.append({
-                    "consulta_id": p.consulta_id,
-                    "anotacoes": p.anotacoes,
-                    "prescricao": p.prescricao,
-                    "data_registro": p.data_registro.strftime("%Y-%m-%d %H:%M:%S")
-            })
-
-            return resultado, 200
-        
+        id_profissional = g.usuario_id
+        # Prontuários no mesmo SELECT da consulta
+        consulta = Consulta.query.options(joinedload(Consulta.prontuario)).get(id)
+
+        if not consulta:
+            return 404
+
+        if consulta.profissional_id != id_profissional:
+            return 403
+
+        if not consulta.prontuario:
+            return {"message": "Esta consulta não possui prontuário."}, 200
+
+        resultado = []
+
+        for p in consulta.prontuario:
+            resultado.append({
+                "consulta_id": p.consulta_id,
+                "anotacoes": p.anotacoes,
+                "prescricao": p.prescricao,
+                "data_registro": p.data_registro.strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+        return resultado, 200
+
 @api.route("/paciente/<int:consulta_id>")
 class ProntuarioPacienteResource(Resource):
-    @jwt_required()
+    @requer_perfil("paciente")
     @api.response(401, "Você não tem permissão visualizar este prontuário.")
     @api.response(404, "Prontuário não encontrado.")
     @api.response(403, "Você não tem permissão para acessar este prontuário.")
     @api.response(204, "Esta consulta não possui prontuário.")
 
     def get(self, consulta_id):
-        identificacao = get_jwt()
-        id_paciente = identificacao["id"]
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao_usuario:
-            return {"message": "Apenas pacientes podem acessar esta funcionalidade."}, 401
-        
-        else:
-            consulta = Consulta.query.get(consulta_id)
-
-            if not consulta:
-                return {"message": "Consulta não encontrada"}, 404
-            
-            if consulta.paciente_id != id_paciente:
-                return {"message": "Sem permissão para acessar este prontuário"}, 403
-            
-            if not consulta.prontuario:
-                return {"message": "Não existe prontuário para esta consulta."}, 200
-
-            resultado = []
-
-            for p in consulta.prontuario:
-                resultado.append({
-                    "consulta_id": p.consulta_id,
-                    "anotacoes": p.anotacoes,
-                    "prescricao": p.prescricao,
-                    "data_registro": p.data_registro.strftime("%Y-%m-%d %H:%M:%S")
-            })
-
-            return resultado, 200
\ No newline at end of file
+        id_paciente = g.usuario_id
+        consulta = Consulta.query.options(joinedload(Consulta.prontuario)).get(consulta_id)
+
+        if not consulta:
+            return {"message": "Consulta não encontrada"}, 404
+
+        if consulta.paciente_id != id_paciente:
+            return {"message": "Sem permissão para acessar este prontuário"}, 403
+
+        if not consulta.prontuario:
+            return {"message": "Não existe prontuário para esta consulta."}, 200
+
+        resultado = []
+
+        for p in consulta.prontuario:
+            resultado.append({
+                "consulta_id": p.consulta_id,
+                "anotacoes": p.anotacoes,
+                "prescricao": p.prescricao,
+                "data_registro": p.data_registro.strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+        return resultado, 200
\ No newline at end of file
@@ -1,41 +1,32 @@
 from flask_restx import Namespace, Resource
-from flask_restx import Namespace, Resource
-from flask_jwt_extended import jwt_required, get_jwt
+import logging
+from flask import Response, g, current_app, request
 from app import db
-from app.models import Consulta, Telemedicina, Usuario
-from app.utils import valida_perfil_usuario
+from app.asgi import CHAVE_FLUXO, CHAVE_LOOP
+from app.eventos import ConexoesEsgotadas, FluxoAssincrono, fluxo_sse
+from app.models import Consulta, Telemedicina
+from app.utils import requer_perfil
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 api = Namespace("telemedicina", description="Serviços relacionados à telemedicina")
 
 @api.route("/iniciar/<int:consulta_id>")
 class TelemedicinaService(Resource):
-    @jwt_required()
+    @requer_perfil("profissional")
     @api.response(500, "Erro no servidor.")
 
     def post(self, consulta_id):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return {"message": "Apenas profissionais podem iniciar a sessão"}, 401
-        
-        else:
-            id_usuario = identificacao["id"]
-            usuario = Usuario.query.get(id_usuario)
-
-            if not usuario.profissional:
-                return {"message": "Não tem permissão para iniciar esta sessão"}, 403
-            
-            consulta = Consulta.query.get_or_404(consulta_id)
-            
-            if consulta.profissional_id != usuario.profissional.id:
-                return {"message": "Não tem permissão para iniciar esta sessão"}, 403
-
-            if consulta.telemedicina:
-                return {"erro": "Sessão já criada", "sessao": consulta.telemedicina[0].url_sala}, 400
-            
+        consulta = Consulta.query.get_or_404(consulta_id)
+
+        # O perfil já foi validado pelo token: o id do profissional é o id do usuário
+        if consulta.profissional_id != g.usuario_id:
+            return {"message": "Não tem permissão para iniciar esta sessão"}, 403
+
+        if consulta.telemedicina:
+            return {"erro": "Sessão já criada", "sessao": consulta.telemedicina[0].url_sala}, 400
+
         import uuid
         codigo_sala = str(uuid.uuid4())
         url = f"https://meet.jit.si/{codigo_sala}" #url fake apenas para exemplo
@@ -48,6 +39,11 @@ class TelemedicinaService(Resource):
 
         db.session.add(sessao)
         db.session.commit()
+        current_app.extensions["telemedicina"].registra(sessao, consulta)
+        current_app.extensions["eventos"].publica(f"telemedicina:{consulta_id}", "iniciada", {
+            "consulta_id": consulta_id,
+            "url_sala": url
+        })
 
         return {"mensagem": "Sessão iniciada",
                 "url_sala": url,
@@ -55,57 +51,135 @@ class TelemedicinaService(Resource):
     
 @api.route("/entrar/<int:consulta_id>")
 class TelemedicinaPacienteService(Resource):
-    @jwt_required()
+    @requer_perfil("paciente")
+    @api.response(403, "Não tem permissão para essa sessão.")
+    @api.response(404, "Não há sessão ativa para esta consulta.")
+
+    def get(self, consulta_id):
+        # Consulta o índice de sessões ativas, sem ir ao banco
+        sessao = current_app.extensions["telemedicina"].sessao_ativa(consulta_id)
+
+        if sessao is None:
+            return {"message": "Não há sessão ativa para esta consulta."}, 404
+
+        if g.usuario_id not in (sessao["paciente_id"], sessao["profissional_id"]):
+            return {"message": "Não tem permissão para essa sessão"}, 403
+
+        return {"url_sala": sessao["url_sala"],
+                "consulta_id": consulta_id}, 200
+
+@api.route("/eventos/<int:consulta_id>")
+class TelemedicinaEventos(Resource):
+    @requer_perfil("paciente", locais=["headers", "query_string"])
+    @api.doc(params={"jwt": "Token de acesso, para clientes EventSource que não enviam o cabeçalho Authorization"})
+    @api.response(200, "Fluxo text/event-stream com os eventos estado, iniciada e encerrada.")
+    @api.response(403, "Não tem permissão para essa sessão.")
+    @api.response(404, "Consulta não encontrada.")
+    @api.response(429, "Conexões demais abertas por este usuário.")
+    @api.response(503, "Limite de conexões atingido, ou vários workers sem EVENTOS_URL.")
 
     def get(self, consulta_id):
-        identificacao = get_jwt()
-
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "paciente")
-
-        if validacao_usuario:
-            return {"message": "Apenas paciente autorizado pode entrar na sala."}, 401
-        
-        else:
-            usuario_id = identificacao["id"]
-            consulta = Consulta.query.get_or_404(consulta_id)
-            sessao = consulta.telemedicina[0]
-
-            if not sessao or not sessao.ativa:
-                return {"message": "Já existe uma sessão ativa"}, 400
-            
-            if consulta.paciente.id != usuario_id and consulta.profissional.usuario.id != usuario_id:
-                return {"message": "Não tem permissão para essa sessão"}, 403
-            
-            return {"url_sala": sessao.url_sala,
-                    "consulta_id": consulta_id}, 200
-        
+        """Avisa o paciente, por Server-Sent Events, quando a sessão da consulta começa ou termina"""
+        canal = current_app.extensions["eventos"]
+
+        # Sem broker o evento publicado por um worker não chega às conexões dos outros:
+        # em vez de deixar o paciente esperando um aviso que nunca vem, recusa a conexão
+        if request.environ.get("wsgi.multiprocess") and not canal.entrega_entre_processos:
+            logger.error("SSE da telemedicina com vários workers exige EVENTOS_URL ou CACHE_URL.")
+            return {"message": "Eventos indisponíveis neste servidor; consulte /telemedicina/entrar."}, 503
+
+        consulta = db.session.get(Consulta, consulta_id)
+
+        if consulta is None:
+            return {"message": "Consulta não encontrada."}, 404
+
+        if consulta.paciente_id != g.usuario_id:
+            return {"message": "Não tem permissão para essa sessão"}, 403
+
+        # Servido pelo adaptador ASGI: a espera roda no loop de eventos, não nesta thread
+        loop = request.environ.get(CHAVE_LOOP)
+
+        try:
+            assinatura = canal.assina(f"telemedicina:{consulta_id}", g.usuario_id, loop)
+        except ConexoesEsgotadas as erro:
+            if erro.por_usuario:
+                return {"message": "Conexões demais abertas para este usuário."}, 429
+
+            return {"message": "Servidor sem conexões disponíveis, tente novamente."}, 503, {"Retry-After": "5"}
+
+        try:
+            # Lido depois da inscrição, para não perder um evento publicado entre as duas
+            sessao = current_app.extensions["telemedicina"].sessao_ativa(consulta_id)
+        except Exception:
+            assinatura.cancela()
+            raise
+
+        estado = {
+            "consulta_id": consulta_id,
+            "ativa": sessao is not None,
+            "url_sala": sessao["url_sala"] if sessao else None
+        }
+        parametros = (
+            assinatura, ("estado", estado),
+            current_app.config["EVENTOS_HEARTBEAT"], current_app.config["EVENTOS_DURACAO_MAXIMA"], ("encerrada",)
+        )
+        cabecalhos = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+        if loop is not None:
+            request.environ[CHAVE_FLUXO] = FluxoAssincrono(*parametros)
+            return Response(mimetype="text/event-stream", headers=cabecalhos)
+
+        resposta = Response(fluxo_sse(*parametros), mimetype="text/event-stream", headers=cabecalhos)
+        # Libera a conexão mesmo se o cliente desconectar antes do primeiro evento
+        resposta.call_on_close(assinatura.cancela)
+
+        return resposta
+
 @api.route("/encerrar/<int:consulta_id>")
 class TelemedicinaProfissionalService(Resource):
-    @jwt_required()
+    @requer_perfil("profissional")
     @api.response(401, "Apenas profissionais podem encerrar sessão.")
+    @api.response(403, "Não tem permissão para encerrar esta sessão.")
     @api.response(404, "Não foi encontrado sessão em aberto.")
     @api.response(200, "Sessão encerrada com sucesso.")
 
     def post(self, consulta_id):
-        identificacao = get_jwt()
-        validacao_usuario = valida_perfil_usuario(identificacao, identificacao.get("perfil"), "profissional")
-
-        if validacao_usuario:
-            return {"message": "Você não tem permissão para essa requisição."}, 401
-        
-        else:
-            consulta = Consulta.query.get_or_404(consulta_id)
-            sessao = consulta.telemedicina[0]
-
-            if not sessao:
-                return {"message": "Sessão não encontrada."}, 404
-            
-            sessao.ativa = False
-            sessao.encerrada_em = datetime.now()
-
-            db.session.commit()
-
-            return {
-                "ativa": sessao.ativa,
-                "encerrada_em": sessao.encerrada_em.isoformat()
-            }, 200
\ No newline at end of file
+        sessao, profissional_id = db.session.execute(
+            db.select(Telemedicina, Consulta.profissional_id)
+            .join(Consulta, Consulta.id == Telemedicina.consulta_id)
+            .where(Telemedicina.consulta_id == consulta_id, Telemedicina.ativa.is_(True))
+        ).first() or (None, None)
+
+        if not sessao:
+            # Remove do índice uma entrada que tenha ficado para trás
+            current_app.extensions["telemedicina"].encerra(consulta_id)
+            return {"message": "Sessão não encontrada."}, 404
+
+        if profissional_id != g.usuario_id:
+            return {"message": "Não tem permissão para encerrar esta sessão"}, 403
+
+        sessao.ativa = False
+        sessao.encerrada_em = datetime.now()
+
+        db.session.commit()
+        current_app.extensions["telemedicina"].encerra(consulta_id)
+        current_app.extensions["eventos"].publica(f"telemedicina:{consulta_id}", "encerrada", {
+            "consulta_id": consulta_id,
+            "encerrada_em": sessao.encerrada_em
+        })
+
+        return {
+            "ativa": sessao.ativa,
+            "encerrada_em": sessao.encerrada_em.isoformat()
+        }, 200
+
+@api.route("/ativas")
+class TelemedicinaAtivas(Resource):
+    @requer_perfil("administrador")
+    @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
+
+    def get(self):
+        """Lista as sessões de telemedicina em andamento, da mais antiga para a mais recente"""
+        sessoes = current_app.extensions["telemedicina"].ativas()
+
+        return {"total": len(sessoes), "dados": sessoes}, 200
@@ -1,8 +1,10 @@
 from flask_restx import Namespace, Resource, fields
+from flask import request, current_app, g
 from app import db
 from app.models import Usuario, Paciente, Profissional
 from app.services.security import gerar_hash_senha
-from app.utils import converte_data, mensagem_criacao_sucesso
+from app.services.importacao import le_linhas_importacao, importa_usuarios, ErroImportacao, CAMPOS_OBRIGATORIOS
+from app.utils import converte_data, mensagem_criacao_sucesso, requer_perfil
 from app.audit import registrar_auditoria
 
 api = Namespace('usuarios', description="Gerenciamento de usuários")
@@ -65,15 +67,14 @@ class UsuarioCreateProfissional(Resource):
             perfil="profissional"
         )
 
-        db.session.add(usuario)
-        db.session.commit()
-
         profissional = Profissional(
-            id=usuario.id,
+            usuario=usuario,
             conselho=data["conselho"],
             numero_conselho=data["numero_conselho"],
             especialidade=data["especialidade"]
         )
+
+        # Usuário e perfil gravados na mesma transação
         db.session.add(profissional)
         db.session.commit()
 
@@ -116,17 +117,15 @@ class UsuarioCreate(Resource):
             perfil="paciente"
         )
 
-        db.session.add(usuario)
-        db.session.commit()
-
         paciente = Paciente(
-                id=usuario.id,
+                usuario=usuario,
                 cpf=data["cpf"],
                 data_nascimento=converte_data(data["data_nascimento"]),
                 endereco=data["endereco"],
                 telefone=data["telefone"]
             )
-        
+
+        # Usuário e perfil gravados na mesma transação
         db.session.add(paciente)
         db.session.commit()
         
@@ -145,5 +144,45 @@ class UsuarioCreate(Resource):
             "data_nascimento": paciente.data_nascimento,
             "endereco": paciente.endereco,
             "telefone": paciente.telefone
-        }, 201  
+        }, 201
+
 
+@api.route('/importacao/<string:perfil>')
+class UsuarioImportacao(Resource):
+    @requer_perfil("administrador")
+    @api.doc(params={"perfil": "pacientes ou profissionais"})
+    @api.response(200, "Importação processada; o resultado de cada linha é retornado.")
+    @api.response(400, "Conteúdo inválido.")
+    @api.response(401, "Apenas administradores podem acessar esta funcionalidade.")
+    @api.response(404, "Perfil não encontrado.")
+    @api.response(413, "Quantidade de linhas acima do limite.")
+
+    def post(self, perfil):
+        """Importa pacientes ou profissionais em massa (array JSON ou CSV)"""
+        if perfil not in CAMPOS_OBRIGATORIOS:
+            return {"message": "Perfil não encontrado. Use pacientes ou profissionais."}, 404
+
+        try:
+            linhas = le_linhas_importacao(request)
+        except ErroImportacao as erro:
+            return {"message": str(erro)}, 400
+
+        limite = current_app.config["IMPORTACAO_LIMITE_LINHAS"]
+
+        if len(linhas) > limite:
+            return {"message": f"Envie no máximo {limite} linhas por importação."}, 413
+
+        resultados = importa_usuarios(perfil, linhas)
+        criados = sum(1 for r in resultados if r["status"] == "criado")
+
+        registrar_auditoria(
+            usuario_id=g.usuario_id,
+            acao="IMPORTACAO_USUARIOS",
+            detalhes=f"Importação de {perfil}: {criados} criados, {len(resultados) - criados} com erro"
+        )
+
+        return {
+            "criados": criados,
+            "erros": len(resultados) - criados,
+            "resultados": resultados
+        }, 200
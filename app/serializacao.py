@@ -0,0 +1,77 @@
+import json
+from datetime import date, time
+from decimal import Decimal
+from enum import Enum
+from operator import attrgetter
+from flask import make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def converte_valor(valor):
+    """Converte os tipos que o json da biblioteca padrão não sabe serializar."""
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+
+    if isinstance(valor, Enum):
+        return valor.value
+
+    if isinstance(valor, Decimal):
+        return str(valor)
+
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def dumps(dados):
+    """Serializa para JSON (bytes), com orjson quando estiver instalado.
+
+    date, time, datetime e Enum são tratados nativamente, então as rotas podem
+    devolver os valores do banco sem formatá-los linha a linha.
+    """
+    if orjson is not None:
+        return orjson.dumps(dados, default=converte_valor)
+
+    return json.dumps(dados, default=converte_valor, ensure_ascii=False, separators=(",", ":")).encode()
+
+def saida_json(dados, codigo, headers=None):
+    """Representação application/json usada por todos os namespaces do flask-restx."""
+    resposta = make_response(dumps(dados), codigo)
+    resposta.headers.extend(headers or {})
+    resposta.mimetype = "application/json"
+    return resposta
+
+class Serializador:
+    """Serializador compilado a partir dos campos de saída de um recurso.
+
+    `campos` mapeia o nome no JSON para o atributo de origem (aceita caminhos
+    como "usuario.nome"). Todos os atributos são lidos por um único attrgetter,
+    o que funciona tanto para objetos do ORM quanto para `Row` de consultas
+    com colunas nomeadas.
+    """
+
+    def __init__(self, campos):
+        self.nomes = tuple(campos)
+        origens = [campos[nome] or nome for nome in self.nomes]
+
+        if len(origens) == 1:
+            getter = attrgetter(origens[0])
+            self.valores = lambda obj: (getter(obj),)
+        else:
+            self.valores = attrgetter(*origens)
+
+    @classmethod
+    def de_modelo(cls, modelo, **origens):
+        """Compila a partir de um `api.model`; `origens` sobrescreve o atributo de cada campo."""
+        return cls({
+            nome: origens.get(nome) or getattr(campo, "attribute", None) or nome
+            for nome, campo in modelo.items()
+        })
+
+    def __call__(self, obj):
+        return dict(zip(self.nomes, self.valores(obj)))
+
+    def lista(self, objs):
+        nomes = self.nomes
+        valores = self.valores
+        return [dict(zip(nomes, valores(obj))) for obj in objs]
@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from app.models import AgendaProfissional, Consulta, StatusEnum
+
+# Duração assumida para consultas fora de qualquer janela da agenda
+DURACAO_PADRAO_MINUTOS = 30
+
+def minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+class IntervalosOcupados:
+    """Conjunto de intervalos [inicio, fim) em minutos, mantidos ordenados e sem sobreposição.
+
+    A verificação de conflito é uma busca binária, então calcular os horários
+    livres de um dia custa O(h log n) para h horários candidatos e n consultas.
+    """
+
+    def __init__(self, intervalos=()):
+        self.inicios = []
+        self.fins = []
+
+        for inicio, fim in sorted(intervalos):
+            if self.fins and inicio <= self.fins[-1]:
+                self.fins[-1] = max(self.fins[-1], fim)
+            else:
+                self.inicios.append(inicio)
+                self.fins.append(fim)
+
+    def sobrepoe(self, inicio, fim):
+        i = bisect_right(self.inicios, inicio) - 1
+
+        if i >= 0 and self.fins[i] > inicio:
+            return True
+
+        return i + 1 < len(self.inicios) and self.inicios[i + 1] < fim
+
+def duracao_no_horario(janelas, hora):
+    """Duração da janela da agenda que contém o horário (ou a padrão)."""
+    m = minutos(hora)
+
+    for janela in janelas:
+        if minutos(janela.hora_inicio) <= m < minutos(janela.hora_fim):
+            return janela.duracao_minutos
+
+    return DURACAO_PADRAO_MINUTOS
+
+def janelas_por_dia(agendas):
+    dias = {}
+
+    for janela in agendas:
+        dias.setdefault(janela.dia_semana, []).append(janela)
+
+    return dias
+
+def ocupacao_por_data(consultas, janelas_dia):
+    """Agrupa as consultas por data como intervalos ocupados."""
+    por_data = {}
+
+    for data, hora in consultas:
+        inicio = minutos(hora)
+        duracao = duracao_no_horario(janelas_dia.get(data.weekday(), []), hora)
+        por_data.setdefault(data, []).append((inicio, inicio + duracao))
+
+    return {data: IntervalosOcupados(intervalos) for data, intervalos in por_data.items()}
+
+def calcula_horarios_livres(agendas, consultas, inicio, fim, agora=None):
+    """Calcula os horários livres entre as datas `inicio` e `fim` (inclusive).
+
+    `agendas` são as janelas de atendimento do profissional e `consultas` os
+    pares (data, hora) já reservados. Não faz nenhuma consulta ao banco.
+    """
+    agora = agora or datetime.now()
+    janelas_dia = janelas_por_dia(agendas)
+    ocupados = ocupacao_por_data(consultas, janelas_dia)
+    vazio = IntervalosOcupados()
+    resultado = []
+
+    data = inicio
+    while data <= fim:
+        horas = []
+        ocupados_dia = ocupados.get(data, vazio)
+
+        for janela in sorted(janelas_dia.get(data.weekday(), []), key=lambda j: j.hora_inicio):
+            slot = minutos(janela.hora_inicio)
+            limite = minutos(janela.hora_fim)
+
+            while slot + janela.duracao_minutos <= limite:
+                horario = datetime.combine(data, datetime.min.time()) + timedelta(minutes=slot)
+
+                if horario > agora and not ocupados_dia.sobrepoe(slot, slot + janela.duracao_minutos):
+                    horas.append(horario.time())
+
+                slot += janela.duracao_minutos
+
+        if horas:
+            resultado.append({"data": data, "horas": horas})
+
+        data += timedelta(days=1)
+
+    return resultado
+
+def consultas_ativas(profissional_id, inicio, fim, ignorar_id=None):
+    consulta = Consulta.query.with_entities(Consulta.data, Consulta.hora).filter(
+        Consulta.profissional_id == profissional_id,
+        Consulta.data >= inicio,
+        Consulta.data <= fim,
+        Consulta.status != StatusEnum.cancelada
+    )
+
+    if ignorar_id is not None:
+        consulta = consulta.filter(Consulta.id != ignorar_id)
+
+    return consulta.all()
+
+def horarios_livres(profissional_id, inicio, fim):
+    """Horários livres do profissional no período, com duas consultas ao banco."""
+    agendas = AgendaProfissional.query.filter_by(profissional_id=profissional_id).all()
+    return calcula_horarios_livres(agendas, consultas_ativas(profissional_id, inicio, fim), inicio, fim)
+
+def verifica_horario(profissional_id, data, hora, ignorar_id=None):
+    """Retorna uma mensagem de erro se o horário não puder ser reservado.
+
+    Sem nenhuma agenda cadastrada o profissional aceita qualquer horário, desde
+    que não conflite com outra consulta; com agenda, dias sem janela são recusados.
+    """
+    todas = AgendaProfissional.query.filter_by(profissional_id=profissional_id).all()
+    agendas = [j for j in todas if j.dia_semana == data.weekday()]
+    duracao = duracao_no_horario(agendas, hora)
+    inicio = minutos(hora)
+
+    if todas and not any(
+        minutos(j.hora_inicio) <= inicio and inicio + j.duracao_minutos <= minutos(j.hora_fim)
+        for j in agendas
+    ):
+        return "Horário fora da agenda do profissional."
+
+    ocupados = ocupacao_por_data(consultas_ativas(profissional_id, data, data, ignorar_id), {data.weekday(): agendas})
+
+    if ocupados.get(data, IntervalosOcupados()).sobrepoe(inicio, inicio + duracao):
+        return "Horário já reservado."
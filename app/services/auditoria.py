@@ -0,0 +1,259 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, time
+from flask_restx import abort
+from sqlalchemy import delete, func, select, text, tuple_
+from app import db
+from app.models import LogAuditoria
+from app.serializacao import Serializador
+from app.services.exportacao import gera_ndjson
+
+serializa_log = Serializador({
+    "id": "id",
+    "usuario_id": "usuario_id",
+    "acao": "acao",
+    "detalhes": "detalhes",
+    "data_hora": "data_hora"
+})
+
+COLUNAS_ARQUIVO = ["id", "usuario_id", "acao", "detalhes", "data_hora"]
+
+def codifica_cursor(log):
+    return f"{log.data_hora.isoformat()}_{log.id}"
+
+def decodifica_cursor(cursor):
+    """Converte o cursor "<data_hora ISO>_id" em (data_hora, id)."""
+    try:
+        data_hora, log_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(data_hora), int(log_id)
+    except (AttributeError, ValueError):
+        abort(400, "Cursor inválido.")
+
+def consulta_logs(limite, cursor=None, usuario_id=None, acao=None, inicio=None, fim=None):
+    """Logs de auditoria do mais recente para o mais antigo.
+
+    `inicio` é inclusivo e `fim` exclusivo. A paginação usa (data_hora, id)
+    como cursor, apoiada nos índices ix_logs_auditoria_data_hora e
+    ix_logs_auditoria_usuario_data_hora; com a tabela particionada o filtro
+    por data_hora também limita as partições lidas.
+    """
+    filtros = []
+
+    if usuario_id is not None:
+        filtros.append(LogAuditoria.usuario_id == usuario_id)
+    if acao:
+        filtros.append(LogAuditoria.acao == acao)
+    if inicio is not None:
+        filtros.append(LogAuditoria.data_hora >= inicio)
+    if fim is not None:
+        filtros.append(LogAuditoria.data_hora < fim)
+    if cursor:
+        filtros.append(tuple_(LogAuditoria.data_hora, LogAuditoria.id) < decodifica_cursor(cursor))
+
+    consulta = (
+        select(LogAuditoria)
+        .where(*filtros)
+        .order_by(LogAuditoria.data_hora.desc(), LogAuditoria.id.desc())
+        .limit(limite + 1)
+    )
+    logs = db.session.execute(consulta).scalars().all()
+    proximo_cursor = codifica_cursor(logs[limite - 1]) if len(logs) > limite else None
+
+    return serializa_log.lista(logs[:limite]), proximo_cursor
+
+# --- Partições mensais ---
+#
+# No PostgreSQL e no MySQL a tabela é particionada por intervalo de data_hora
+# (migração a3d5f8c1e927), com uma partição por mês. Nos demais bancos ela
+# continua única e o arquivamento remove as linhas por intervalo de data_hora.
+
+def primeiro_dia(valor):
+    return date(valor.year, valor.month, 1)
+
+def soma_meses(mes, quantidade):
+    total = mes.year * 12 + mes.month - 1 + quantidade
+    return date(total // 12, total % 12 + 1, 1)
+
+def nome_particao(dialeto, mes):
+    if dialeto == "postgresql":
+        return f"logs_auditoria_p{mes:%Y%m}"
+
+    return f"p{mes:%Y%m}"
+
+def ddl_particao(dialeto, mes):
+    """Comando que cria a partição do mês, ou None se o banco não particiona."""
+    nome = nome_particao(dialeto, mes)
+    fim = soma_meses(mes, 1)
+
+    match dialeto:
+        case "postgresql":
+            return (
+                f"CREATE TABLE IF NOT EXISTS {nome} PARTITION OF logs_auditoria "
+                f"FOR VALUES FROM ('{mes}') TO ('{fim}')"
+            )
+        case "mysql" | "mariadb":
+            # pmax (MAXVALUE) é sempre a última partição: o novo mês é separado dela
+            return (
+                f"ALTER TABLE logs_auditoria REORGANIZE PARTITION pmax INTO ("
+                f"PARTITION {nome} VALUES LESS THAN ('{fim}'), "
+                f"PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+            )
+        case _:
+            return None
+
+def ddl_remove_particao(dialeto, mes):
+    nome = nome_particao(dialeto, mes)
+
+    if dialeto == "postgresql":
+        return [f"ALTER TABLE logs_auditoria DETACH PARTITION {nome}", f"DROP TABLE {nome}"]
+
+    return [f"ALTER TABLE logs_auditoria DROP PARTITION {nome}"]
+
+def particoes_existentes(conexao):
+    """Meses que têm partição própria (vazio se a tabela não é particionada)."""
+    match conexao.dialect.name:
+        case "postgresql":
+            nomes = conexao.execute(text(
+                "SELECT filha.relname FROM pg_inherits "
+                "JOIN pg_class filha ON filha.oid = pg_inherits.inhrelid "
+                "JOIN pg_class mae ON mae.oid = pg_inherits.inhparent "
+                "WHERE mae.relname = 'logs_auditoria'"
+            )).scalars()
+        case "mysql" | "mariadb":
+            nomes = conexao.execute(text(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'logs_auditoria' "
+                "AND PARTITION_NAME IS NOT NULL"
+            )).scalars()
+        case _:
+            return set()
+
+    meses = set()
+
+    for nome in nomes:
+        encontrado = re.search(r"p(\d{4})(\d{2})$", nome)
+
+        if encontrado:
+            meses.add(date(int(encontrado[1]), int(encontrado[2]), 1))
+
+    return meses
+
+def cria_particoes(meses_adiante, hoje=None):
+    """Garante as partições do mês atual e dos próximos `meses_adiante` meses."""
+    conexao = db.session.connection()
+    dialeto = conexao.dialect.name
+    mes = primeiro_dia(hoje or date.today())
+
+    if ddl_particao(dialeto, mes) is None:
+        return []
+
+    existentes = particoes_existentes(conexao)
+    criadas = []
+
+    for i in range(meses_adiante + 1):
+        atual = soma_meses(mes, i)
+
+        if atual not in existentes:
+            conexao.execute(text(ddl_particao(dialeto, atual)))
+            criadas.append(nome_particao(dialeto, atual))
+
+    db.session.commit()
+    return criadas
+
+# --- Arquivamento ---
+
+def exporta_mes(mes, diretorio, tamanho_lote):
+    """Grava os logs do mês em <diretorio>/auditoria-AAAA-MM-<carimbo>.ndjson.gz.
+
+    O arquivo é escrito com outro nome, sincronizado em disco e só então
+    renomeado, para que as linhas nunca sejam removidas do banco antes de
+    estarem gravadas por completo. O carimbo evita sobrescrever o arquivo de
+    uma execução anterior que tenha sido interrompida no meio.
+    """
+    inicio = datetime.combine(mes, time())
+    fim = datetime.combine(soma_meses(mes, 1), time())
+    consulta = (
+        select(*[getattr(LogAuditoria, c) for c in COLUNAS_ARQUIVO])
+        .where(LogAuditoria.data_hora >= inicio, LogAuditoria.data_hora < fim)
+        .order_by(LogAuditoria.data_hora, LogAuditoria.id)
+    )
+
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, f"auditoria-{mes:%Y-%m}-{datetime.now():%Y%m%dT%H%M%S}.ndjson.gz")
+    temporario = f"{caminho}.tmp"
+    total = 0
+
+    with open(temporario, "wb") as arquivo:
+        with gzip.GzipFile(fileobj=arquivo, mode="wb") as compactado:
+            for bloco in gera_ndjson(consulta, COLUNAS_ARQUIVO, tamanho_lote):
+                compactado.write(bloco)
+                total += bloco.count(b"\n")
+
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+
+    if total == 0:
+        os.remove(temporario)
+        return None, 0
+
+    os.replace(temporario, caminho)
+    return caminho, total
+
+def remove_mes(mes, particionado, tamanho_lote):
+    """Remove os logs do mês: descarta a partição ou apaga em lotes por id."""
+    conexao = db.session.connection()
+
+    if particionado:
+        for comando in ddl_remove_particao(conexao.dialect.name, mes):
+            conexao.execute(text(comando))
+
+        db.session.commit()
+        return
+
+    inicio = datetime.combine(mes, time())
+    fim = datetime.combine(soma_meses(mes, 1), time())
+
+    while True:
+        ids = db.session.execute(
+            select(LogAuditoria.id)
+            .where(LogAuditoria.data_hora >= inicio, LogAuditoria.data_hora < fim)
+            .limit(tamanho_lote)
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        db.session.execute(delete(LogAuditoria).where(LogAuditoria.id.in_(ids)))
+        db.session.commit()
+
+def arquiva_auditoria(retencao_meses, diretorio, tamanho_lote, hoje=None):
+    """Move para arquivos compactados os meses anteriores ao período de retenção.
+
+    Mantém no banco o mês atual e os `retencao_meses` meses completos
+    anteriores. Os meses são processados do mais antigo para o mais novo, para
+    que linhas que ficaram fora das partições mensais (partição padrão do
+    PostgreSQL, primeira partição do MySQL) sejam arquivadas antes.
+    Retorna uma lista de (mes, linhas, caminho do arquivo).
+    """
+    limite = soma_meses(primeiro_dia(hoje or date.today()), -retencao_meses)
+    particoes = particoes_existentes(db.session.connection())
+    meses = {mes for mes in particoes if mes < limite}
+
+    mais_antigo = db.session.execute(select(func.min(LogAuditoria.data_hora))).scalar()
+
+    if mais_antigo is not None:
+        mes = primeiro_dia(mais_antigo)
+
+        while mes < limite:
+            meses.add(mes)
+            mes = soma_meses(mes, 1)
+
+    arquivados = []
+
+    for mes in sorted(meses):
+        caminho, total = exporta_mes(mes, diretorio, tamanho_lote)
+        remove_mes(mes, mes in particoes, tamanho_lote)
+        arquivados.append((mes, total, caminho))
+
+    return arquivados
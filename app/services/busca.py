@@ -0,0 +1,160 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import Consulta, Prontuario, TermoProntuario
+
+TAMANHO_MAXIMO_TERMO = 64
+MAXIMO_TERMOS_BUSCA = 10
+
+PALAVRAS_IGNORADAS = frozenset("""
+a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelas pelo pelos
+por que se sem sob um uma umas uns mg ml cada dia dias vez vezes
+""".split())
+
+PALAVRA = re.compile(r"\w+")
+
+def normaliza(texto):
+    """Minúsculas e sem acentos: "Hipertensão" e "hipertensao" viram o mesmo termo."""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+def termos(texto):
+    for palavra in PALAVRA.findall(normaliza(texto or "")):
+        if len(palavra) > 1 and palavra not in PALAVRAS_IGNORADAS and not palavra.isdigit():
+            yield palavra[:TAMANHO_MAXIMO_TERMO]
+
+def indexa_prontuario(prontuario, consulta):
+    """Atualiza as entradas do prontuário no índice (na transação da sessão atual)."""
+    if prontuario.id is None:
+        db.session.flush()
+
+    db.session.execute(delete(TermoProntuario).where(TermoProntuario.prontuario_id == prontuario.id))
+
+    contagem = Counter(termos(prontuario.anotacoes)) + Counter(termos(prontuario.prescricao))
+
+    db.session.add_all(
+        TermoProntuario(
+            termo=termo, prontuario_id=prontuario.id, profissional_id=consulta.profissional_id,
+            paciente_id=consulta.paciente_id, frequencia=frequencia
+        )
+        for termo, frequencia in contagem.items()
+    )
+
+def reindexa_prontuarios(tamanho_lote=500):
+    """Reconstrói o índice de todos os prontuários, com um commit por lote."""
+    total = 0
+    ultimo_id = 0
+
+    while True:
+        lote = (
+            Prontuario.query
+            .options(joinedload(Prontuario.consulta))
+            .filter(Prontuario.id > ultimo_id)
+            .order_by(Prontuario.id)
+            .limit(tamanho_lote)
+            .all()
+        )
+
+        if not lote:
+            return total
+
+        for prontuario in lote:
+            indexa_prontuario(prontuario, prontuario.consulta)
+
+        total += len(lote)
+        ultimo_id = lote[-1].id
+
+        db.session.commit()
+        db.session.expunge_all()
+
+def trecho(texto, termos_busca, tamanho=160):
+    """Trecho do texto em volta da primeira ocorrência de algum dos termos."""
+    if not texto:
+        return None
+
+    normalizado = normaliza(texto)
+    posicoes = [p for p in (normalizado.find(t) for t in termos_busca) if p >= 0]
+
+    if not posicoes:
+        return None
+
+    inicio = max(0, min(posicoes) - tamanho // 4)
+    fim = inicio + tamanho
+
+    return ("..." if inicio else "") + texto[inicio:fim] + ("..." if fim < len(texto) else "")
+
+def busca_prontuarios(texto, profissional_id, limite, deslocamento=0, paciente_id=None):
+    """Busca nos prontuários das consultas do profissional.
+
+    Mesma regra de GET /prontuarios/<id>: só entram prontuários de consultas
+    em que ele é o profissional. Os resultados vêm ordenados pela quantidade
+    de termos encontrados e, depois, por tf-idf. Retorna a página e o
+    deslocamento da próxima.
+    """
+    termos_busca = list(dict.fromkeys(termos(texto)))[:MAXIMO_TERMOS_BUSCA]
+
+    if not termos_busca:
+        return [], None
+
+    # O idf usa só o universo do profissional (as consultas dele estimam o total
+    # de prontuários), e as duas contagens leem apenas o trecho dele em
+    # ix_consultas_profissional_data_hora e ix_termos_prontuarios_termo_profissional
+    total = db.session.scalar(
+        select(func.count()).select_from(Consulta).where(Consulta.profissional_id == profissional_id)
+    ) or 1
+    documentos = dict(db.session.execute(
+        select(TermoProntuario.termo, func.count())
+        .where(TermoProntuario.termo.in_(termos_busca), TermoProntuario.profissional_id == profissional_id)
+        .group_by(TermoProntuario.termo)
+    ).all())
+
+    if not documentos:
+        return [], None
+
+    pesos = {termo: math.log(1 + total / quantidade) for termo, quantidade in documentos.items()}
+    encontrados = func.count(TermoProntuario.termo)
+    pontuacao = func.sum(TermoProntuario.frequencia * case(pesos, value=TermoProntuario.termo, else_=0.0))
+
+    consulta = (
+        select(TermoProntuario.prontuario_id, pontuacao)
+        .where(
+            TermoProntuario.termo.in_(list(pesos)),
+            TermoProntuario.profissional_id == profissional_id
+        )
+        .group_by(TermoProntuario.prontuario_id)
+        .order_by(encontrados.desc(), pontuacao.desc(), TermoProntuario.prontuario_id.desc())
+        .limit(limite + 1)
+        .offset(deslocamento)
+    )
+
+    if paciente_id is not None:
+        consulta = consulta.where(TermoProntuario.paciente_id == paciente_id)
+
+    ranking = db.session.execute(consulta).all()
+    proximo = deslocamento + limite if len(ranking) > limite else None
+    ranking = ranking[:limite]
+
+    prontuarios = {
+        p.id: p for p in
+        Prontuario.query.options(joinedload(Prontuario.consulta))
+        .filter(Prontuario.id.in_([linha[0] for linha in ranking]))
+    }
+
+    resultados = []
+
+    for prontuario_id, nota in ranking:
+        p = prontuarios[prontuario_id]
+        resultados.append({
+            "id": p.id,
+            "consulta_id": p.consulta_id,
+            "paciente_id": p.consulta.paciente_id,
+            "data_registro": p.data_registro,
+            "pontuacao": round(nota, 4),
+            "trecho": trecho(p.anotacoes, termos_busca) or trecho(p.prescricao, termos_busca)
+        })
+
+    return resultados, proximo
@@ -0,0 +1,46 @@
+import csv
+import enum
+import io
+from datetime import date, time, datetime
+from app import db
+from app.serializacao import dumps
+
+def valor_exportacao(valor):
+    """Converte os tipos do banco para valores serializáveis em texto."""
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, (date, time, datetime)):
+        return valor.isoformat()
+    return valor
+
+def linhas_banco(consulta, tamanho_lote):
+    """Percorre o resultado com cursor no servidor, entregando lotes de tamanho fixo."""
+    resultado = db.session.execute(consulta.execution_options(yield_per=tamanho_lote))
+
+    try:
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        resultado.close()
+
+def gera_ndjson(consulta, colunas, tamanho_lote):
+    for lote in linhas_banco(consulta, tamanho_lote):
+        yield b"".join(dumps(dict(zip(colunas, linha))) + b"\n" for linha in lote)
+
+def gera_csv(consulta, colunas, tamanho_lote):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    escritor.writerow(colunas)
+    yield buffer.getvalue()
+
+    for lote in linhas_banco(consulta, tamanho_lote):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([valor_exportacao(v) for v in linha] for linha in lote)
+        yield buffer.getvalue()
+
+FORMATOS_EXPORTACAO = {
+    "ndjson": (gera_ndjson, "application/x-ndjson"),
+    "csv": (gera_csv, "text/csv")
+}
@@ -0,0 +1,417 @@
+import bisect
+import csv
+import io
+import itertools
+import random
+import time as relogio
+import unicodedata
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from flask import current_app
+from sqlalchemy import func, insert, select, text
+from app import db
+from app.compressao import TextoComprimido, comprime
+from app.models import Administrador, Consulta, LogAuditoria, Paciente, Profissional, Prontuario, Telemedicina, Usuario
+from app.services.security import gerar_hash_senha
+
+PRIMEIROS_NOMES = (
+    "Maria", "José", "Ana", "João", "Francisca", "Antônio", "Juliana", "Carlos", "Márcia", "Paulo",
+    "Adriana", "Pedro", "Fernanda", "Lucas", "Patrícia", "Gabriel", "Aline", "Rafael", "Camila", "Marcos",
+    "Beatriz", "Luiz", "Larissa", "Felipe", "Vanessa", "Bruno", "Letícia", "Gustavo", "Sandra", "Rodrigo"
+)
+SOBRENOMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas"
+)
+CIDADES = (
+    ("São Paulo", "SP", "11"), ("Rio de Janeiro", "RJ", "21"), ("Belo Horizonte", "MG", "31"),
+    ("Salvador", "BA", "71"), ("Fortaleza", "CE", "85"), ("Curitiba", "PR", "41"), ("Recife", "PE", "81"),
+    ("Porto Alegre", "RS", "51"), ("Manaus", "AM", "92"), ("Goiânia", "GO", "62"), ("Brasília", "DF", "61")
+)
+PESOS_CIDADES = (30, 15, 9, 7, 7, 6, 6, 6, 5, 4, 5)
+LOGRADOUROS = ("Rua", "Avenida", "Travessa", "Alameda")
+NOMES_RUAS = ("das Flores", "Brasil", "Sete de Setembro", "XV de Novembro", "Santos Dumont", "da Paz", "Tiradentes", "São João")
+
+# (especialidade, conselho, peso)
+ESPECIALIDADES = (
+    ("Clínica Geral", "CRM", 25), ("Pediatria", "CRM", 12), ("Cardiologia", "CRM", 8), ("Ginecologia", "CRM", 9),
+    ("Dermatologia", "CRM", 6), ("Ortopedia", "CRM", 7), ("Psiquiatria", "CRM", 5), ("Psicologia", "CRP", 12),
+    ("Nutrição", "CRN", 8), ("Fisioterapia", "CREFITO", 8)
+)
+
+# Faixas de idade (anos) e peso de cada uma entre os pacientes
+FAIXAS_ETARIAS = (((0, 17), 20), ((18, 39), 33), ((40, 59), 28), ((60, 90), 19))
+
+# Horários de atendimento: 08:00 às 17:30, a cada 30 minutos
+HORARIOS = tuple(time(8 + m // 60, m % 60) for m in range(0, 600, 30))
+DIAS_HISTORICO = 730
+DIAS_AGENDA = 90
+VAGAS_PROFISSIONAL = (DIAS_HISTORICO + DIAS_AGENDA) * len(HORARIOS)
+
+FRASES_ANOTACOES = (
+    "Paciente relata dor de cabeça recorrente há duas semanas, pior no fim da tarde.",
+    "Nega febre, náuseas ou alterações visuais.",
+    "Pressão arterial 13x8 mmHg, frequência cardíaca 78 bpm.",
+    "Exame físico sem alterações significativas.",
+    "Retorno para avaliação de exames laboratoriais.",
+    "Hemograma e perfil lipídico dentro da normalidade; glicemia de jejum discretamente elevada.",
+    "Queixa de tosse seca e coriza há cinco dias, ausculta pulmonar limpa.",
+    "Refere melhora parcial dos sintomas após o início do tratamento.",
+    "Relata dificuldade para dormir e ansiedade relacionada ao trabalho.",
+    "Dor lombar mecânica, sem irradiação, piora ao permanecer sentado.",
+    "Orientado sobre dieta, hidratação e atividade física regular.",
+    "Reavaliar em três meses ou antes se houver piora."
+)
+PRESCRICOES = (
+    "Dipirona 500 mg, 1 comprimido a cada 6 horas se dor.",
+    "Paracetamol 750 mg, 1 comprimido a cada 8 horas se febre.",
+    "Losartana 50 mg, 1 comprimido ao dia.",
+    "Metformina 850 mg, 1 comprimido após o almoço e o jantar.",
+    "Lavagem nasal com soro fisiológico 3 vezes ao dia.",
+    "Ibuprofeno 400 mg, 1 comprimido a cada 8 horas por 5 dias.",
+    "Sertralina 50 mg, 1 comprimido pela manhã.",
+    "Solicitados hemograma, glicemia de jejum, TSH e perfil lipídico."
+)
+
+# (ação, peso, detalhes) no mesmo formato gravado pelas rotas
+ACOES_AUDITORIA = (
+    ("NOVA_CONSULTA", 30, "Consulta criada para o paciente {usuario_id}"),
+    ("ATUALIZAR_CONSULTA", 15, "Consulta {numero} atualizada"),
+    ("CRIAR_PRONTUARIO", 25, "Prontuário criado para consulta {numero}"),
+    ("PACIENTE_ATUALIZADO", 10, "Paciente {usuario_id} atualizado"),
+    ("ATUALIZAR_AGENDA", 5, "Agenda do profissional {usuario_id} atualizada"),
+    ("NOVO_PACIENTE", 12, "Paciente criado: {usuario_id}"),
+    ("NOVO_PROFISSIONAL", 3, "Funcionario criado: {usuario_id}")
+)
+
+def sem_acentos(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower().replace(" ", "")
+
+def digitos_cpf(base):
+    """Calcula os dois dígitos verificadores de um CPF a partir dos 9 primeiros dígitos."""
+    digitos = [int(d) for d in base]
+
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        digitos.append(soma * 10 % 11 % 10)
+
+    return digitos[9:]
+
+def gera_cpf(numero):
+    """CPF válido e formatado; números distintos (até 10^9) geram CPFs distintos."""
+    # 3^18 é primo com 10^9, então a multiplicação embaralha sem repetir
+    base = f"{(numero * 387420489 + 123456789) % 10**9:09d}"
+    d1, d2 = digitos_cpf(base)
+
+    return f"{base[:3]}.{base[3:6]}.{base[6:]}-{d1}{d2}"
+
+def cpf_valido(cpf):
+    numeros = "".join(c for c in cpf if c.isdigit())
+
+    if len(numeros) != 11 or len(set(numeros)) == 1:
+        return False
+
+    return digitos_cpf(numeros[:9]) == [int(numeros[9]), int(numeros[10])]
+
+def acumula(pesos):
+    return list(itertools.accumulate(pesos))
+
+def sorteia(rnd, itens, acumulados):
+    """Escolha ponderada; mais rápida que random.choices nos laços de milhões de linhas."""
+    return itens[bisect.bisect(acumulados, rnd.random() * acumulados[-1])]
+
+def nome_pessoa(rnd):
+    return f"{rnd.choice(PRIMEIROS_NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+
+def email_pessoa(nome, usuario_id):
+    partes = nome.split()
+    return f"{sem_acentos(partes[0])}.{sem_acentos(partes[-1])}{usuario_id}@exemplo.com.br"
+
+def proximo_id(modelo):
+    return (db.session.scalar(select(func.max(modelo.id))) or 0) + 1
+
+class PlanoGeracao:
+    """Faixas de ids e parâmetros de uma geração.
+
+    Os ids continuam a partir dos já existentes, então a geração pode ser
+    repetida sobre um banco com dados. Cada tabela tem um gerador aleatório
+    próprio, derivado da semente, e a mesma semente produz as mesmas linhas.
+    """
+
+    def __init__(self, administradores, pacientes, profissionais, consultas, logs, sessoes_ativas, semente, hoje):
+        if consultas and (not pacientes or not profissionais):
+            raise ValueError("Para gerar consultas informe pacientes e profissionais.")
+
+        if consultas > profissionais * VAGAS_PROFISSIONAL:
+            raise ValueError(f"No máximo {VAGAS_PROFISSIONAL} consultas por profissional.")
+
+        self.administradores = administradores
+        self.pacientes = pacientes
+        self.profissionais = profissionais
+        self.consultas = consultas
+        self.logs = logs
+        self.sessoes_ativas = sessoes_ativas
+        self.semente = semente
+        self.hoje = hoje
+
+        self.primeiro_usuario = proximo_id(Usuario)
+        self.primeiro_profissional = self.primeiro_usuario + administradores
+        self.primeiro_paciente = self.primeiro_profissional + profissionais
+        self.ultimo_usuario = self.primeiro_paciente + pacientes - 1
+        self.primeira_consulta = proximo_id(Consulta)
+        self.primeiro_prontuario = proximo_id(Prontuario)
+        self.primeira_telemedicina = proximo_id(Telemedicina)
+        self.primeiro_log = proximo_id(LogAuditoria)
+
+    def aleatorio(self, tabela):
+        return random.Random(f"{self.semente}:{tabela}")
+
+    def lista_usuarios(self, senha_hash):
+        rnd = self.aleatorio("usuarios")
+        agora = datetime.utcnow()
+
+        for usuario_id in range(self.primeiro_usuario, self.ultimo_usuario + 1):
+            nome = nome_pessoa(rnd)
+
+            if usuario_id < self.primeiro_profissional:
+                perfil = "administrador"
+            else:
+                perfil = "profissional" if usuario_id < self.primeiro_paciente else "paciente"
+
+            yield (usuario_id, nome, email_pessoa(nome, usuario_id), senha_hash, perfil, agora)
+
+    def lista_administradores(self):
+        rnd = self.aleatorio("administradores")
+
+        for usuario_id in range(self.primeiro_usuario, self.primeiro_profissional):
+            nascimento = self.hoje - timedelta(days=rnd.randrange(25 * 365, 60 * 365))
+            yield (usuario_id, gera_cpf(usuario_id), nascimento, None, None)
+
+    def lista_profissionais(self):
+        rnd = self.aleatorio("profissionais")
+        pesos = acumula(peso for _, _, peso in ESPECIALIDADES)
+        pesos_cidades = acumula(PESOS_CIDADES)
+        agora = datetime.utcnow()
+
+        for usuario_id in range(self.primeiro_profissional, self.primeiro_paciente):
+            especialidade, conselho, _ = sorteia(rnd, ESPECIALIDADES, pesos)
+            uf = sorteia(rnd, CIDADES, pesos_cidades)[1]
+            yield (usuario_id, conselho, f"{rnd.randrange(10000, 300000)}/{uf}", especialidade, agora)
+
+    def lista_pacientes(self):
+        rnd = self.aleatorio("pacientes")
+        faixas = [faixa for faixa, _ in FAIXAS_ETARIAS]
+        pesos = acumula(peso for _, peso in FAIXAS_ETARIAS)
+        pesos_cidades = acumula(PESOS_CIDADES)
+        agora = datetime.utcnow()
+
+        for usuario_id in range(self.primeiro_paciente, self.ultimo_usuario + 1):
+            minima, maxima = sorteia(rnd, faixas, pesos)
+            nascimento = self.hoje - timedelta(days=rnd.randrange(minima * 365, (maxima + 1) * 365))
+            cidade, uf, ddd = sorteia(rnd, CIDADES, pesos_cidades)
+            endereco = f"{rnd.choice(LOGRADOUROS)} {rnd.choice(NOMES_RUAS)}, {rnd.randrange(1, 3000)} - {cidade}/{uf}"
+            telefone = f"({ddd}) 9{rnd.randrange(10**8):08d}"
+            yield (usuario_id, gera_cpf(usuario_id), nascimento, endereco, telefone, agora)
+
+    def lista_consultas(self):
+        """Consultas dos últimos dois anos e dos próximos três meses.
+
+        O profissional de cada consulta é escolhido em rodízio e o horário
+        percorre uma permutação das suas vagas, então não há duas consultas no
+        mesmo horário do mesmo profissional. Os pacientes seguem uma
+        distribuição desigual: uma parte deles concentra a maioria das consultas.
+        """
+        rnd = self.aleatorio("consultas")
+        inicio = self.hoje - timedelta(days=DIAS_HISTORICO)
+        pesos_passado = acumula((78, 15, 7))
+        agora = datetime.utcnow()
+
+        for n in range(self.consultas):
+            vaga = (n // self.profissionais * 7919) % VAGAS_PROFISSIONAL
+            data = inicio + timedelta(days=vaga // len(HORARIOS))
+            tipo = "online" if rnd.random() < 0.35 else "presencial"
+
+            if data < self.hoje:
+                status = sorteia(rnd, ("concluida", "cancelada", "agendada"), pesos_passado)
+            else:
+                status = "cancelada" if rnd.random() < 0.08 else "agendada"
+
+            yield (
+                self.primeira_consulta + n,
+                self.primeiro_paciente + int(self.pacientes * rnd.random() ** 2),
+                self.primeiro_profissional + n % self.profissionais,
+                data, HORARIOS[vaga % len(HORARIOS)], status, tipo, agora
+            )
+
+    def lista_prontuarios(self):
+        # Percorre de novo as consultas (mesma semente) em vez de guardá-las na memória
+        rnd = self.aleatorio("prontuarios")
+        prontuario_id = self.primeiro_prontuario
+
+        for consulta_id, _, _, data, hora, status, _, _ in self.lista_consultas():
+            if status != "concluida":
+                continue
+
+            anotacoes = " ".join(rnd.sample(FRASES_ANOTACOES, rnd.randint(2, 5)))
+            prescricao = "\n".join(rnd.sample(PRESCRICOES, rnd.randint(1, 3)))
+            registro = datetime.combine(data, hora) + timedelta(minutes=rnd.randint(20, 60))
+            yield (prontuario_id, consulta_id, anotacoes, prescricao, registro)
+            prontuario_id += 1
+
+    def lista_telemedicinas(self):
+        rnd = self.aleatorio("telemedicinas")
+        agora = datetime.utcnow()
+        sessoes = (
+            (consulta_id, data) for consulta_id, _, _, data, _, status, tipo, _ in self.lista_consultas()
+            if status == "agendada" and tipo == "online" and data >= self.hoje
+        )
+
+        for n, (consulta_id, _) in enumerate(itertools.islice(sessoes, self.sessoes_ativas)):
+            codigo = f"{rnd.getrandbits(128):032x}"
+            yield (self.primeira_telemedicina + n, consulta_id, codigo, f"https://meet.jit.si/vidaplus-{codigo}", agora, None, True)
+
+    def lista_logs(self):
+        """Logs em ordem cronológica ao longo do último ano, como gravados pela aplicação."""
+        rnd = self.aleatorio("logs")
+        pesos = acumula(peso for _, peso, _ in ACOES_AUDITORIA)
+        inicio = datetime.combine(self.hoje, time()) - timedelta(days=365)
+        intervalo = 365 * 86400 / max(self.logs, 1)
+        usuarios = max(self.ultimo_usuario - self.primeiro_usuario + 1, 1)
+
+        for n in range(self.logs):
+            acao, _, detalhes = sorteia(rnd, ACOES_AUDITORIA, pesos)
+            usuario_id = self.primeiro_usuario + int(rnd.random() * usuarios)
+            data_hora = inicio + timedelta(seconds=n * intervalo + rnd.random() * intervalo)
+            yield (
+                self.primeiro_log + n, usuario_id, acao,
+                detalhes.format(usuario_id=usuario_id, numero=1 + int(rnd.random() * (self.consultas + 1))), data_hora
+            )
+
+def valor_copy(valor):
+    if isinstance(valor, bytes):
+        return "\\x" + valor.hex()
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+    return valor
+
+def conexao_primaria():
+    # Conexão da sessão no banco principal, renovada depois de cada commit
+    return db.session.connection(bind_arguments={"bind": db.engine})
+
+def carrega(tabela, colunas, linhas, tamanho_lote):
+    """Grava as linhas (tuplas na ordem de `colunas`) com um commit por lote.
+
+    No PostgreSQL (psycopg2) usa COPY; nos drivers de parâmetros posicionais
+    (MySQL, SQLite) um único INSERT executado para o lote inteiro, que o
+    mysqlclient transforma em INSERTs de várias linhas. Os valores passam
+    pelos tipos das colunas (compressão dos textos clínicos, enums, datas).
+    Retorna a quantidade de linhas gravadas.
+    """
+    dialeto = db.engine.dialect
+    usa_copy = dialeto.name == "postgresql" and dialeto.driver == "psycopg2"
+    # A configuração da compressão é lida uma vez por carga, não a cada valor
+    comprime_texto = partial(
+        comprime,
+        algoritmo=current_app.config.get("COMPRESSAO_ALGORITMO", "zlib"),
+        tamanho_minimo=current_app.config.get("COMPRESSAO_TAMANHO_MINIMO", 128)
+    )
+
+    def processador(tipo):
+        if isinstance(tipo, TextoComprimido):
+            return comprime_texto
+
+        # No COPY os demais valores vão como texto
+        return None if usa_copy else tipo.dialect_impl(dialeto).bind_processor(dialeto)
+
+    if usa_copy:
+        processadores = [processador(tabela.c[coluna].type) for coluna in colunas]
+        comando = f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)"
+    elif dialeto.positional:
+        processadores = [processador(tabela.c[coluna].type) for coluna in colunas]
+        comando = str(insert(tabela).compile(dialect=dialeto, column_keys=colunas))
+    else:
+        processadores = [None] * len(colunas)
+        comando = None
+
+    conversoes = [(i, processador) for i, processador in enumerate(processadores) if processador is not None]
+    total = 0
+
+    while True:
+        lote = list(itertools.islice(linhas, tamanho_lote))
+
+        if not lote:
+            break
+
+        if conversoes:
+            lote = [list(linha) for linha in lote]
+
+            for linha in lote:
+                for i, processador in conversoes:
+                    if linha[i] is not None:
+                        linha[i] = processador(linha[i])
+
+        conexao = conexao_primaria()
+
+        if usa_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows([valor_copy(v) for v in linha] for linha in lote)
+            buffer.seek(0)
+            conexao.connection.cursor().copy_expert(comando, buffer)
+        elif comando is not None:
+            conexao.exec_driver_sql(comando, [tuple(linha) for linha in lote])
+        else:
+            conexao.execute(insert(tabela), [dict(zip(colunas, linha)) for linha in lote])
+
+        db.session.commit()
+        total += len(lote)
+
+    return total
+
+def ajusta_sequencias(tabelas):
+    # Os ids são informados na carga; no PostgreSQL as sequências precisam acompanhar
+    if db.engine.dialect.name != "postgresql":
+        return
+
+    for tabela in tabelas:
+        conexao_primaria().execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela.name}', 'id'), (SELECT max(id) FROM {tabela.name}))"
+        ))
+
+    db.session.commit()
+
+def gera_dados(pacientes, profissionais, consultas, logs, administradores=0, sessoes_ativas=100, semente=42,
+               senha="senha123", tamanho_lote=10000, hoje=None):
+    """Popula o banco com dados sintéticos realistas, determinísticos pela semente.
+
+    Gera administradores, profissionais e pacientes (com CPFs válidos), consultas com
+    distribuição realista de status e tipo, prontuários das consultas
+    concluídas, sessões de telemedicina ativas e logs de auditoria. Todos os
+    usuários recebem a mesma `senha`. Retorna, tabela a tabela, tuplas
+    (nome da tabela, linhas gravadas, segundos).
+    """
+    plano = PlanoGeracao(administradores, pacientes, profissionais, consultas, logs, sessoes_ativas, semente, hoje or date.today())
+    senha_hash = gerar_hash_senha(senha)
+
+    cargas = (
+        (Usuario, ("id", "nome", "email", "senha", "perfil", "atualizado_em"), plano.lista_usuarios(senha_hash)),
+        (Administrador, ("id", "cpf", "data_nascimento", "endereco", "telefone"), plano.lista_administradores()),
+        (Profissional, ("id", "conselho", "numero_conselho", "especialidade", "atualizado_em"), plano.lista_profissionais()),
+        (Paciente, ("id", "cpf", "data_nascimento", "endereco", "telefone", "atualizado_em"), plano.lista_pacientes()),
+        (Consulta, ("id", "paciente_id", "profissional_id", "data", "hora", "status", "tipo", "atualizado_em"), plano.lista_consultas()),
+        (Prontuario, ("id", "consulta_id", "anotacoes", "prescricao", "data_registro"), plano.lista_prontuarios()),
+        (Telemedicina, ("id", "consulta_id", "codigo_sala", "url_sala", "iniciada_em", "encerrada_em", "ativa"), plano.lista_telemedicinas()),
+        (LogAuditoria, ("id", "usuario_id", "acao", "detalhes", "data_hora"), plano.lista_logs())
+    )
+    resultados = []
+
+    for modelo, colunas, linhas in cargas:
+        inicio = relogio.perf_counter()
+        total = carrega(modelo.__table__, colunas, linhas, tamanho_lote)
+        resultados.append((modelo.__tablename__, total, relogio.perf_counter() - inicio))
+
+    ajusta_sequencias([modelo.__table__ for modelo, _, _ in cargas if modelo not in (Administrador, Profissional, Paciente)])
+
+    return resultados
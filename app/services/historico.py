@@ -0,0 +1,88 @@
+from datetime import date, time
+from flask_restx import abort
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Consulta, Paciente, Profissional
+from app.serializacao import Serializador
+
+serializa_prontuario = Serializador({
+    "id": "id",
+    "anotacoes": "anotacoes",
+    "prescricao": "prescricao",
+    "data_registro": "data_registro"
+})
+
+serializa_telemedicina = Serializador({
+    "codigo_sala": "codigo_sala",
+    "url_sala": "url_sala",
+    "ativa": "ativa",
+    "iniciada_em": "iniciada_em",
+    "encerrada_em": "encerrada_em"
+})
+
+serializa_consulta_historico = Serializador({
+    "id": "id",
+    "data": "data",
+    "hora": "hora",
+    "status": "status",
+    "tipo": "tipo"
+})
+
+def codifica_cursor(consulta):
+    return f"{consulta.data.isoformat()}_{consulta.hora.isoformat()}_{consulta.id}"
+
+def decodifica_cursor(cursor):
+    """Converte o cursor "AAAA-MM-DD_HH:MM:SS_id" em (data, hora, id)."""
+    try:
+        data, hora, consulta_id = cursor.split("_")
+        return date.fromisoformat(data), time.fromisoformat(hora), int(consulta_id)
+    except (AttributeError, ValueError):
+        abort(400, "Cursor inválido.")
+
+def historico(perfil, usuario_id, limite, cursor=None):
+    """Consultas do paciente ou profissional, da mais recente para a mais antiga,
+    com prontuários e sessões de telemedicina.
+
+    São sempre três SELECTs por página (consultas com a outra parte via join e
+    prontuários/telemedicina via selectin), qualquer que seja o tamanho dela.
+    A paginação usa (data, hora, id) como cursor, apoiada nos índices
+    ix_consultas_paciente_data_hora / ix_consultas_profissional_data_hora.
+    """
+    if perfil == "paciente":
+        filtro = Consulta.paciente_id == usuario_id
+        outra_parte = joinedload(Consulta.profissional).joinedload(Profissional.usuario)
+    else:
+        filtro = Consulta.profissional_id == usuario_id
+        outra_parte = joinedload(Consulta.paciente).joinedload(Paciente.usuario)
+
+    consulta = (
+        Consulta.query
+        .options(outra_parte, selectinload(Consulta.prontuario), selectinload(Consulta.telemedicina))
+        .filter(filtro, Consulta.data.isnot(None), Consulta.hora.isnot(None))
+    )
+
+    if cursor:
+        consulta = consulta.filter(tuple_(Consulta.data, Consulta.hora, Consulta.id) < decodifica_cursor(cursor))
+
+    consultas = consulta.order_by(Consulta.data.desc(), Consulta.hora.desc(), Consulta.id.desc()).limit(limite + 1).all()
+    proximo_cursor = codifica_cursor(consultas[limite - 1]) if len(consultas) > limite else None
+
+    itens = []
+
+    for c in consultas[:limite]:
+        item = serializa_consulta_historico(c)
+
+        if perfil == "paciente":
+            item["profissional"] = {
+                "id": c.profissional_id,
+                "nome": c.profissional.usuario.nome,
+                "especialidade": c.profissional.especialidade
+            }
+        else:
+            item["paciente"] = {"id": c.paciente_id, "nome": c.paciente.usuario.nome}
+
+        item["prontuarios"] = serializa_prontuario.lista(c.prontuario)
+        item["telemedicina"] = serializa_telemedicina.lista(c.telemedicina)
+        itens.append(item)
+
+    return itens, proximo_cursor
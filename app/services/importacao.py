@@ -0,0 +1,197 @@
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Usuario, Paciente, Profissional
+from app.services.security import gerar_hashes_senha
+
+# Tamanho dos blocos usados nas verificações com IN (...)
+TAMANHO_BLOCO_IN = 500
+
+# Quantas vezes o INSERT é refeito após conflito com um cadastro simultâneo
+TENTATIVAS_IMPORTACAO = 3
+
+CAMPOS_OBRIGATORIOS = {
+    "pacientes": ("nome", "email", "senha", "cpf", "data_nascimento"),
+    "profissionais": ("nome", "email", "senha", "conselho", "numero_conselho")
+}
+
+CAMPOS_OPCIONAIS = {
+    "pacientes": ("endereco", "telefone"),
+    "profissionais": ("especialidade",)
+}
+
+# Colunas de cada campo, para recusar na validação os valores maiores que a coluna
+COLUNAS = {
+    "nome": Usuario.nome,
+    "email": Usuario.email,
+    "cpf": Paciente.cpf,
+    "telefone": Paciente.telefone,
+    "conselho": Profissional.conselho,
+    "numero_conselho": Profissional.numero_conselho,
+    "especialidade": Profissional.especialidade
+}
+
+class ErroImportacao(Exception):
+    pass
+
+def le_linhas_importacao(requisicao):
+    """Lê as linhas enviadas como array JSON, CSV no corpo ou arquivo CSV (campo `arquivo`)."""
+    arquivo = requisicao.files.get("arquivo")
+
+    if arquivo is not None:
+        try:
+            return list(csv.DictReader(io.TextIOWrapper(arquivo.stream, encoding="utf-8-sig")))
+        except UnicodeDecodeError:
+            raise ErroImportacao("O arquivo CSV deve estar codificado em UTF-8.")
+        except csv.Error as erro:
+            raise ErroImportacao(f"Arquivo CSV inválido: {erro}.")
+
+    if requisicao.mimetype == "text/csv":
+        return list(csv.DictReader(io.StringIO(requisicao.get_data(as_text=True))))
+
+    dados = requisicao.get_json(silent=True)
+
+    if not isinstance(dados, list):
+        raise ErroImportacao("Envie um array JSON ou um arquivo CSV.")
+
+    return dados
+
+def valores_existentes(coluna, valores):
+    """Retorna quais valores já existem no banco, consultando em blocos."""
+    valores = list(valores)
+    existentes = set()
+
+    for i in range(0, len(valores), TAMANHO_BLOCO_IN):
+        bloco = valores[i:i + TAMANHO_BLOCO_IN]
+        existentes.update(db.session.scalars(select(coluna).where(coluna.in_(bloco))))
+
+    return existentes
+
+def valida_linha(perfil, linha):
+    if not isinstance(linha, dict):
+        return "Linha inválida."
+
+    faltando = [c for c in CAMPOS_OBRIGATORIOS[perfil] if not linha.get(c)]
+
+    if faltando:
+        return f"Campos obrigatórios ausentes: {', '.join(faltando)}."
+
+    for campo in CAMPOS_OBRIGATORIOS[perfil] + CAMPOS_OPCIONAIS[perfil]:
+        valor = linha.get(campo)
+
+        if valor is None:
+            continue
+
+        if not isinstance(valor, str):
+            return f"{campo} deve ser um texto."
+
+        coluna = COLUNAS.get(campo)
+        tamanho = coluna.type.length if coluna is not None else None
+
+        if tamanho and len(valor) > tamanho:
+            return f"{campo} deve ter no máximo {tamanho} caracteres."
+
+    if perfil == "pacientes":
+        try:
+            datetime.strptime(linha["data_nascimento"], "%d/%m/%Y")
+        except (TypeError, ValueError):
+            return "data_nascimento inválida. Use DD/MM/YYYY."
+
+def monta_perfil(perfil, linha, senha_hash):
+    usuario = Usuario(
+        nome=linha["nome"],
+        email=linha["email"],
+        senha=senha_hash,
+        perfil="paciente" if perfil == "pacientes" else "profissional"
+    )
+
+    if perfil == "pacientes":
+        return Paciente(
+            usuario=usuario,
+            cpf=linha["cpf"],
+            data_nascimento=datetime.strptime(linha["data_nascimento"], "%d/%m/%Y").date(),
+            endereco=linha.get("endereco"),
+            telefone=linha.get("telefone")
+        )
+
+    return Profissional(
+        usuario=usuario,
+        conselho=linha["conselho"],
+        numero_conselho=linha["numero_conselho"],
+        especialidade=linha.get("especialidade")
+    )
+
+def marca_duplicidades(perfil, linhas, candidatas, erros):
+    """Marca em `erros` as linhas com e-mail/CPF já existente no banco ou repetido no lote."""
+    emails_banco = valores_existentes(Usuario.email, {linhas[i]["email"] for i in candidatas})
+    cpfs_banco = set()
+
+    if perfil == "pacientes":
+        cpfs_banco = valores_existentes(Paciente.cpf, {linhas[i]["cpf"] for i in candidatas})
+
+    emails_lote = set()
+    cpfs_lote = set()
+
+    for i in candidatas:
+        email = linhas[i]["email"]
+        cpf = linhas[i].get("cpf")
+
+        if email in emails_banco or email in emails_lote:
+            erros[i] = "E-mail já cadastrado."
+        elif perfil == "pacientes" and (cpf in cpfs_banco or cpf in cpfs_lote):
+            erros[i] = "CPF já cadastrado."
+        else:
+            emails_lote.add(email)
+            cpfs_lote.add(cpf)
+
+def importa_usuarios(perfil, linhas):
+    """Cadastra usuários em massa em uma única transação.
+
+    As duplicidades de e-mail/CPF são verificadas em conjunto (no lote e no
+    banco) antes de qualquer INSERT; as linhas válidas são inseridas juntas e
+    o resultado é devolvido linha a linha. Se um cadastro concorrente gravar o
+    mesmo e-mail/CPF entre a verificação e o commit, a transação é desfeita,
+    as duplicidades são verificadas de novo e as linhas restantes reenviadas.
+    """
+    resultados = [None] * len(linhas)
+    erros = {}
+
+    for i, linha in enumerate(linhas):
+        erro = valida_linha(perfil, linha)
+        if erro:
+            erros[i] = erro
+
+    validas = [i for i in range(len(linhas)) if i not in erros]
+    marca_duplicidades(perfil, linhas, validas, erros)
+
+    aceitas = [i for i in validas if i not in erros]
+    hashes = dict(zip(aceitas, gerar_hashes_senha(linhas[i]["senha"] for i in aceitas)))
+
+    for tentativa in range(TENTATIVAS_IMPORTACAO):
+        perfis = {i: monta_perfil(perfil, linhas[i], hashes[i]) for i in aceitas}
+        db.session.add_all(perfis.values())
+
+        try:
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            marca_duplicidades(perfil, linhas, aceitas, erros)
+            aceitas = [i for i in aceitas if i not in erros]
+    else:
+        # Conflitos seguidos: nenhuma das linhas restantes foi gravada
+        for i in aceitas:
+            erros[i] = "Conflito com um cadastro simultâneo. Tente novamente."
+
+    for i, linha in enumerate(linhas):
+        email = linha.get("email") if isinstance(linha, dict) else None
+
+        if i in erros:
+            resultados[i] = {"linha": i + 1, "email": email, "status": "erro", "mensagem": erros[i]}
+        else:
+            resultados[i] = {"linha": i + 1, "email": email, "status": "criado", "id": perfis[i].id}
+
+    return resultados
@@ -1,7 +1,201 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from functools import partial
+from flask import current_app, has_app_context, has_request_context, request
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+METODO_PADRAO = "scrypt:32768:8:1"
+
+# Parâmetros padrão do Werkzeug para completar métodos informados pela metade
+PARAMETROS_PADRAO = {
+    "scrypt": ["32768", "8", "1"],
+    "pbkdf2": ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+}
+
+pool_processos = None
+pool_pid = None
+
+def normaliza_metodo(metodo):
+    """Completa o método com os parâmetros padrão, no mesmo formato gravado no hash.
+
+    Ex.: "scrypt" -> "scrypt:32768:8:1" e "pbkdf2:sha256" -> "pbkdf2:sha256:1000000".
+    """
+    nome, *parametros = metodo.split(":")
+    padrao = PARAMETROS_PADRAO.get(nome, [])
+
+    return ":".join([nome] + parametros + padrao[len(parametros):])
+
+def configuracao_hash():
+    if has_app_context():
+        config = current_app.config
+        return normaliza_metodo(config["SENHA_METODO"]), config["SENHA_TAMANHO_SALT"]
+
+    return METODO_PADRAO, 16
 
 def gerar_hash_senha(senha: str) -> str:
-    return generate_password_hash(senha)
+    metodo, tamanho_salt = configuracao_hash()
+    return generate_password_hash(senha, method=metodo, salt_length=tamanho_salt)
 
 def verificar_senha(senha: str, hash_senha: str) -> bool:
-    return check_password_hash(hash_senha, senha)
\ No newline at end of file
+    return check_password_hash(hash_senha, senha)
+
+def precisa_rehash(hash_senha: str) -> bool:
+    """Indica se o hash foi gerado com um método/custo diferente do configurado."""
+    metodo, _ = configuracao_hash()
+    return hash_senha.split("$", 1)[0] != metodo
+
+def obtem_pool_processos(processos):
+    """Cria o pool sob demanda, recriando-o se o processo atual for um fork.
+
+    Os filhos não são criados com fork: a essa altura o worker já tem threads
+    (auditoria, verificação de senhas, ouvinte do Redis) e um fork poderia
+    herdar uma trava presa. Usa forkserver quando disponível, senão spawn.
+    """
+    global pool_processos, pool_pid
+
+    if pool_processos is None or pool_pid != os.getpid():
+        metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        pool_processos = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context(metodo))
+        pool_pid = os.getpid()
+
+    return pool_processos
+
+def gerar_hashes_senha(senhas):
+    """Gera os hashes de várias senhas, distribuindo o trabalho entre os núcleos.
+
+    Lotes pequenos são processados em série, pois não compensam o custo de
+    enviar as senhas para outros processos.
+    """
+    senhas = list(senhas)
+    metodo, tamanho_salt = configuracao_hash()
+    gera = partial(generate_password_hash, method=metodo, salt_length=tamanho_salt)
+
+    processos = os.cpu_count() or 1
+    lote_minimo = 1
+
+    if has_app_context():
+        processos = current_app.config["SENHA_PROCESSOS"] or processos
+        lote_minimo = current_app.config["SENHA_LOTE_MINIMO_PARALELO"]
+
+    if processos < 2 or len(senhas) < max(lote_minimo, 2):
+        return [gera(s) for s in senhas]
+
+    tamanho_bloco = max(1, len(senhas) // (processos * 4))
+    return list(obtem_pool_processos(processos).map(gera, senhas, chunksize=tamanho_bloco))
+
+class FilaVerificacaoCheia(Exception):
+    pass
+
+class VerificadorSenhas:
+    """Verifica senhas em um pool limitado de threads.
+
+    O KDF libera o GIL, então as threads rodam em paralelo, mas a quantidade
+    de verificações simultâneas (em execução + na fila) é limitada: acima do
+    limite a verificação é recusada na hora, em vez de acumular logins e
+    atrasar as demais rotas do worker.
+
+    Isso pressupõe um worker com várias requisições simultâneas (gunicorn
+    gthread ou ASGI). Em um worker sync (wsgi.multithread falso) não há outras
+    rotas a proteger e o limite nunca é atingido, então a verificação roda
+    direto na thread da requisição.
+    """
+
+    def __init__(self, app=None):
+        self.executor = None
+        self.pid = None
+        self.trava = threading.Lock()
+        self.pendentes = 0
+        self.em_execucao = 0
+        self.verificacoes = 0
+        self.rejeitadas = 0
+        self.tempo_verificacao = 0.0
+        self.tempo_espera = 0.0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.threads = app.config["LOGIN_VERIFICACAO_THREADS"] or os.cpu_count() or 1
+        self.fila_maxima = app.config["LOGIN_VERIFICACAO_FILA_MAXIMA"]
+        self.timeout = app.config["LOGIN_VERIFICACAO_TIMEOUT"]
+
+        app.extensions["verificador_senhas"] = self
+
+    def obtem_executor(self):
+        if self.executor is None or self.pid != os.getpid():
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="verifica-senha")
+            self.pid = os.getpid()
+
+        return self.executor
+
+    def executa(self, funcao, enviado_em, *args):
+        inicio = time.perf_counter()
+
+        with self.trava:
+            self.em_execucao += 1
+            self.tempo_espera += inicio - enviado_em
+
+        try:
+            return funcao(*args)
+        finally:
+            with self.trava:
+                self.em_execucao -= 1
+                self.pendentes -= 1
+                self.verificacoes += 1
+                self.tempo_verificacao += time.perf_counter() - inicio
+
+    def submete(self, funcao, *args):
+        with self.trava:
+            if self.pendentes >= self.threads + self.fila_maxima:
+                self.rejeitadas += 1
+                raise FilaVerificacaoCheia()
+
+            self.pendentes += 1
+
+        try:
+            return self.obtem_executor().submit(self.executa, funcao, time.perf_counter(), *args)
+        except Exception:
+            with self.trava:
+                self.pendentes -= 1
+            raise
+
+    def roda(self, funcao, *args):
+        if has_request_context() and not request.environ.get("wsgi.multithread", True):
+            with self.trava:
+                self.pendentes += 1
+
+            return self.executa(funcao, time.perf_counter(), *args)
+
+        futuro = self.submete(funcao, *args)
+
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutError:
+            with self.trava:
+                self.rejeitadas += 1
+            raise FilaVerificacaoCheia()
+
+    def verifica(self, senha, hash_senha):
+        return self.roda(verificar_senha, senha, hash_senha)
+
+    def gera_hash(self, senha):
+        """Gera o hash no mesmo pool das verificações (ex.: rehash no login).
+
+        A configuração é lida aqui, pois as threads do pool não têm o contexto da aplicação.
+        """
+        metodo, tamanho_salt = configuracao_hash()
+        return self.roda(partial(generate_password_hash, method=metodo, salt_length=tamanho_salt), senha)
+
+    def metricas(self):
+        with self.trava:
+            return {
+                "fila": self.pendentes - self.em_execucao,
+                "em_execucao": self.em_execucao,
+                "verificacoes": self.verificacoes,
+                "rejeitadas": self.rejeitadas,
+                "tempo_verificacao_segundos": self.tempo_verificacao,
+                "tempo_espera_segundos": self.tempo_espera
+            }
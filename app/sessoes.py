@@ -0,0 +1,197 @@
+import threading
+import time
+from sqlalchemy import select
+from app import db
+from app.models import Consulta, Telemedicina
+from app.serializacao import dumps
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+class RegistroLocal:
+    """Cache, no processo, das sessões ativas já encontradas.
+
+    Não é a fonte da verdade: outro worker pode iniciar ou encerrar sessões.
+    Uma ausência é confirmada no banco e as entradas expiram após o TTL.
+    """
+
+    compartilhado = False
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.trava = threading.Lock()
+        self.sessoes = {}
+
+    def obtem(self, consulta_id):
+        with self.trava:
+            item = self.sessoes.get(consulta_id)
+
+            if item is None:
+                return None
+
+            if item[1] <= time.monotonic():
+                del self.sessoes[consulta_id]
+                return None
+
+            return item[0]
+
+    def grava(self, consulta_id, sessao):
+        with self.trava:
+            self.sessoes[consulta_id] = (sessao, time.monotonic() + self.ttl)
+
+    def remove(self, consulta_id):
+        with self.trava:
+            self.sessoes.pop(consulta_id, None)
+
+class RegistroRedis:
+    """Sessões ativas em um hash de um servidor compatível com Redis, compartilhado entre os workers.
+
+    Depois da carga inicial o hash é a fonte da verdade: todos os workers o
+    atualizam ao iniciar e encerrar sessões.
+    """
+
+    compartilhado = True
+
+    # Validade da trava de carga: se o worker morrer no meio da carga, outro assume
+    VALIDADE_TRAVA_CARGA = 60
+
+    def __init__(self, cliente, chave="vidaplus:telemedicina:ativas"):
+        self.cliente = cliente
+        self.chave = chave
+
+    @classmethod
+    def de_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def carregado(self):
+        # A marca some junto com o hash se o Redis for esvaziado
+        return bool(self.cliente.exists(f"{self.chave}:carregado"))
+
+    def reivindica_carga(self):
+        if self.carregado():
+            return False
+
+        return bool(self.cliente.set(f"{self.chave}:carregando", 1, nx=True, ex=self.VALIDADE_TRAVA_CARGA))
+
+    def conclui_carga(self):
+        # Marcado só depois de gravar as sessões
+        self.cliente.set(f"{self.chave}:carregado", 1)
+        self.cliente.delete(f"{self.chave}:carregando")
+
+    def obtem(self, consulta_id):
+        valor = self.cliente.hget(self.chave, consulta_id)
+        return loads(valor) if valor is not None else None
+
+    def grava(self, consulta_id, sessao):
+        self.cliente.hset(self.chave, consulta_id, dumps(sessao))
+
+    def grava_varias(self, sessoes):
+        for consulta_id, sessao in sessoes.items():
+            self.cliente.hsetnx(self.chave, consulta_id, dumps(sessao))
+
+    def remove(self, consulta_id):
+        self.cliente.hdel(self.chave, consulta_id)
+
+    def todas(self):
+        return [loads(valor) for valor in self.cliente.hvals(self.chave)]
+
+def dados_sessao(consulta_id, paciente_id, profissional_id, codigo_sala, url_sala, iniciada_em):
+    return {
+        "consulta_id": consulta_id,
+        "paciente_id": paciente_id,
+        "profissional_id": profissional_id,
+        "codigo_sala": codigo_sala,
+        "url_sala": url_sala,
+        "iniciada_em": iniciada_em.isoformat() if iniciada_em else None
+    }
+
+class RegistroSessoes:
+    """Índice das sessões de telemedicina ativas, por consulta_id.
+
+    É atualizado pelas rotas ao iniciar e encerrar sessões, depois do commit.
+    Assim a entrada do paciente na sala, repetida enquanto ele aguarda o
+    profissional, não consulta o banco.
+
+    Com TELEMEDICINA_REGISTRO_URL (ou CACHE_URL) o índice fica em um Redis
+    compartilhado, carregado do banco uma vez, e é a fonte da verdade. Sem ele
+    cada worker guarda só as sessões que já encontrou, por até
+    TELEMEDICINA_REGISTRO_TTL segundos: uma sessão ausente é procurada no
+    banco, pois pode ter sido iniciada por outro worker.
+    """
+
+    def __init__(self, app=None):
+        self.trava = threading.Lock()
+        self.carregado = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        url = app.config.get("TELEMEDICINA_REGISTRO_URL") or app.config.get("CACHE_URL")
+        self.backend = RegistroRedis.de_url(url) if url else RegistroLocal(app.config["TELEMEDICINA_REGISTRO_TTL"])
+
+        app.extensions["telemedicina"] = self
+
+    def garante_carga(self):
+        """Carrega o Redis do banco, se nenhum worker o fez. Retorna se ele já está completo."""
+        if self.carregado:
+            return True
+
+        with self.trava:
+            if not self.carregado:
+                if self.backend.reivindica_carga():
+                    self.backend.grava_varias(self.busca_no_banco())
+                    self.backend.conclui_carga()
+
+                # Com a carga em andamento em outro worker, tenta de novo na próxima chamada
+                self.carregado = self.backend.carregado()
+
+        return self.carregado
+
+    def busca_no_banco(self, *filtros):
+        linhas = db.session.execute(
+            select(
+                Telemedicina.consulta_id, Consulta.paciente_id, Consulta.profissional_id,
+                Telemedicina.codigo_sala, Telemedicina.url_sala, Telemedicina.iniciada_em
+            )
+            .join(Consulta, Consulta.id == Telemedicina.consulta_id)
+            .where(Telemedicina.ativa.is_(True), *filtros)
+        ).all()
+
+        return {linha.consulta_id: dados_sessao(*linha) for linha in linhas}
+
+    def sessao_ativa(self, consulta_id):
+        sessao = self.backend.obtem(consulta_id)
+
+        if sessao is not None or (self.backend.compartilhado and self.garante_carga()):
+            return sessao
+
+        # Só as sessões encontradas vão para o índice local
+        sessao = self.busca_no_banco(Telemedicina.consulta_id == consulta_id).get(consulta_id)
+
+        if sessao is not None:
+            self.backend.grava(consulta_id, sessao)
+
+        return sessao
+
+    def registra(self, sessao, consulta):
+        self.backend.grava(consulta.id, dados_sessao(
+            consulta.id, consulta.paciente_id, consulta.profissional_id,
+            sessao.codigo_sala, sessao.url_sala, sessao.iniciada_em
+        ))
+
+    def encerra(self, consulta_id):
+        self.backend.remove(consulta_id)
+
+    def ativas(self):
+        if self.backend.compartilhado and self.garante_carga():
+            sessoes = self.backend.todas()
+        else:
+            sessoes = list(self.busca_no_banco().values())
+
+        return sorted(sessoes, key=lambda s: (s["iniciada_em"] or "", s["consulta_id"]))
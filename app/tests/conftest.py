@@ -1,7 +1,11 @@
 import pytest
+from contextlib import contextmanager
 from datetime import datetime, date
+from flask import has_request_context, request
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
 from app import create_app, db
-from app.models import Usuario, Paciente, Profissional, Consulta, PerfilEnum
+from app.models import Usuario, Administrador, Paciente, Profissional, Consulta, PerfilEnum
 from app.services.security import gerar_hash_senha
 
 
@@ -70,7 +74,7 @@ def profissional(app):
     db.session.commit()
 
     # FIX: o id do profissional é o mesmo do usuário
-    prof = Profissional(id=user.id)
+    prof = Profissional(id=user.id, conselho="CRM", numero_conselho="000000")
     db.session.add(prof)
     db.session.commit()
 
@@ -136,3 +140,110 @@ def token_profissional(client, profissional):
     }
     resp = client.post("/login", json=login_data)
     return resp.json["token"]
+
+
+# --- ADMINISTRADOR ---
+@pytest.fixture
+def administrador(app):
+    user = Usuario(
+        nome="Administrador Teste",
+        email="admin@example.com",
+        senha=gerar_hash_senha("123456"),
+        perfil=PerfilEnum.administrador
+    )
+    adm = Administrador(
+        usuario=user,
+        cpf="000.000.000-00",
+        data_nascimento=date(1985, 5, 5),
+        endereco="Rua Admin, 1",
+        telefone="11988888888"
+    )
+    db.session.add(adm)
+    db.session.commit()
+
+    return adm
+
+
+# --- TOKEN ADMINISTRADOR ---
+@pytest.fixture
+def token_administrador(app, administrador):
+    token = create_access_token(
+        identity=str(administrador.id),
+        additional_claims={"id": administrador.id, "perfil": "administrador"}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+# --- CABEÇALHO JWT PARA QUALQUER PERFIL ---
+@pytest.fixture
+def cabecalho_jwt(app):
+    def gera(usuario_id, perfil):
+        token = create_access_token(
+            identity=str(usuario_id),
+            additional_claims={"id": usuario_id, "perfil": perfil}
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    return gera
+
+
+# --- ORÇAMENTO DE QUERIES / DETECTOR DE N+1 ---
+class RegistroQueries:
+    """Statements SQL executados, com a requisição que os disparou."""
+
+    def __init__(self):
+        self.statements = []
+
+    def anota(self, conn, cursor, statement, parameters, context, executemany):
+        requisicao = f"{request.method} {request.full_path.rstrip('?')}" if has_request_context() else None
+        self.statements.append((requisicao, statement, parameters))
+
+    def repetidas(self):
+        """Statements iguais executados com parâmetros diferentes na mesma requisição (padrão N+1)."""
+        parametros = {}
+
+        for requisicao, statement, valores in self.statements:
+            parametros.setdefault((requisicao, statement), set()).add(repr(valores))
+
+        return {chave: len(valores) for chave, valores in parametros.items() if len(valores) > 1}
+
+    def relatorio(self):
+        return "\n".join(
+            f"  [{requisicao or 'fora de requisição'}] {' '.join(statement.split())} {valores!r}"
+            for requisicao, statement, valores in self.statements
+        )
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Falha se o bloco executar mais de `maximo` statements ou tiver um N+1.
+
+        with assert_max_queries(2):
+            client.get("/consultas/", headers=cabecalho)
+
+    Use `permite_repetidas=True` quando repetir o statement for intencional
+    (consultas em blocos, por exemplo).
+    """
+    @contextmanager
+    def verifica(maximo, permite_repetidas=False):
+        registro = RegistroQueries()
+        event.listen(db.engine, "before_cursor_execute", registro.anota)
+
+        try:
+            yield registro
+        finally:
+            event.remove(db.engine, "before_cursor_execute", registro.anota)
+
+        repetidas = registro.repetidas()
+
+        assert permite_repetidas or not repetidas, (
+            "Possível N+1: " + "; ".join(
+                f"{vezes}x em {requisicao or 'fora de requisição'}: {' '.join(statement.split())[:120]}"
+                for (requisicao, statement), vezes in repetidas.items()
+            ) + "\n" + registro.relatorio()
+        )
+        assert len(registro.statements) <= maximo, (
+            f"{len(registro.statements)} statements executados (máximo {maximo}):\n" + registro.relatorio()
+        )
+
+    return verifica
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date, time
+from app import db
+from app.models import Usuario, Paciente, Consulta, Profissional, PerfilEnum, StatusEnum
+
+
+# ------------------------------------------------------------
+# FIXTURES
+# ------------------------------------------------------------
+
+@pytest.fixture
+def varios_pacientes(app):
+    """Cria cinco pacientes para testar a paginação."""
+    pacientes = []
+
+    for i in range(5):
+        user = Usuario(
+            nome=f"Paciente {i}",
+            email=f"paciente{i}@example.com",
+            senha="hash",
+            perfil=PerfilEnum.paciente
+        )
+        pacientes.append(Paciente(
+            usuario=user,
+            cpf=f"{i:03d}.000.000-00",
+            data_nascimento=date(1990, 1, i + 1)
+        ))
+
+    db.session.add_all(pacientes)
+    db.session.commit()
+    return pacientes
+
+
+# ------------------------------------------------------------
+# TESTES
+# ------------------------------------------------------------
+
+def test_lista_pacientes_paginada(client, token_administrador, varios_pacientes):
+    """Deve retornar páginas de tamanho fixo encadeadas por next_cursor."""
+    resp = client.get("/administracao/lista_pacientes?limit=2", headers=token_administrador)
+
+    assert resp.status_code == 200
+    dados = resp.get_json()
+    assert [p["nome"] for p in dados["dados"]] == ["Paciente 0", "Paciente 1"]
+    assert dados["next_cursor"] == varios_pacientes[1].id
+
+    vistos = [p["id"] for p in dados["dados"]]
+    cursor = dados["next_cursor"]
+
+    while cursor:
+        resp = client.get(f"/administracao/lista_pacientes?limit=2&after={cursor}", headers=token_administrador)
+        dados = resp.get_json()
+        vistos += [p["id"] for p in dados["dados"]]
+        cursor = dados["next_cursor"]
+
+    assert vistos == [p.id for p in varios_pacientes]
+
+
+def test_lista_pacientes_ultima_pagina_sem_cursor(client, token_administrador, varios_pacientes):
+    """A última página não deve informar próximo cursor."""
+    resp = client.get("/administracao/lista_pacientes?limit=10", headers=token_administrador)
+
+    dados = resp.get_json()
+    assert len(dados["dados"]) == 5
+    assert dados["next_cursor"] is None
+
+
+def test_lista_pacientes_parametros_invalidos(client, token_administrador):
+    resp = client.get("/administracao/lista_pacientes?limit=abc", headers=token_administrador)
+    assert resp.status_code == 400
+
+    resp = client.get("/administracao/lista_pacientes?limit=0", headers=token_administrador)
+    assert resp.status_code == 400
+
+
+def test_lista_administradores_carrega_usuario(client, token_administrador, administrador):
+    resp = client.get("/administracao/lista_administradores", headers=token_administrador)
+
+    assert resp.status_code == 200
+    dados = resp.get_json()["dados"]
+    assert dados[0]["email"] == "admin@example.com"
+
+
+def test_lista_consultas_paginada(client, token_administrador, varios_pacientes):
+    user = Usuario(nome="Dr Teste", email="dr@example.com", senha="hash", perfil=PerfilEnum.profissional)
+    prof = Profissional(usuario=user, conselho="CRM", numero_conselho="1")
+    db.session.add(prof)
+    db.session.flush()
+
+    for i, p in enumerate(varios_pacientes):
+        db.session.add(Consulta(
+            paciente_id=p.id,
+            profissional_id=prof.id,
+            data=date(2025, 1, 1),
+            hora=time(10 + i, 0),
+            status=StatusEnum.agendada,
+            tipo="presencial"
+        ))
+    db.session.commit()
+
+    resp = client.get("/administracao/lista_consultas?limit=3", headers=token_administrador)
+    dados = resp.get_json()
+
+    assert len(dados["dados"]) == 3
+    assert dados["dados"][0]["hora"] == "10:00:00"
+    assert dados["next_cursor"] == dados["dados"][-1]["id"]
+
+
+def test_exportacao_ndjson(app, client, token_administrador, varios_pacientes):
+    """A exportação deve entregar uma linha JSON por paciente, em lotes."""
+    app.config["EXPORTACAO_TAMANHO_LOTE"] = 2
+    resp = client.get("/administracao/export/pacientes?format=ndjson", headers=token_administrador)
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+
+    linhas = [json.loads(linha) for linha in resp.get_data(as_text=True).splitlines()]
+    assert [l["email"] for l in linhas] == [f"paciente{i}@example.com" for i in range(5)]
+    assert linhas[0]["data_nascimento"] == "1990-01-01"
+
+
+def test_exportacao_csv(client, token_administrador, varios_pacientes):
+    resp = client.get("/administracao/export/pacientes?format=csv", headers=token_administrador)
+
+    assert resp.status_code == 200
+    linhas = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert linhas[0] == ["id", "nome", "email", "cpf", "data_nascimento", "endereco", "telefone"]
+    assert len(linhas) == 6
+
+
+def test_exportacao_entidade_ou_formato_invalido(client, token_administrador):
+    assert client.get("/administracao/export/usuarios", headers=token_administrador).status_code == 404
+    assert client.get("/administracao/export/pacientes?format=xml", headers=token_administrador).status_code == 400
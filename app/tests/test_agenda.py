@@ -0,0 +1,165 @@
+import pytest
+from datetime import date, time, datetime
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import AgendaProfissional, Consulta, StatusEnum
+from app.services.agenda import IntervalosOcupados, calcula_horarios_livres
+
+# Segunda-feira no futuro, para os horários não serem descartados como passados
+SEGUNDA = date(2030, 1, 7)
+
+
+# ------------------------------------------------------------
+# FIXTURES
+# ------------------------------------------------------------
+
+@pytest.fixture
+def agenda(app, profissional):
+    """Segunda-feira das 09:00 às 11:00, consultas de 30 minutos."""
+    janela = AgendaProfissional(
+        profissional_id=profissional.id,
+        dia_semana=0,
+        hora_inicio=time(9, 0),
+        hora_fim=time(11, 0),
+        duracao_minutos=30
+    )
+    db.session.add(janela)
+    db.session.commit()
+    return janela
+
+
+def nova_consulta(paciente, profissional, hora, status=StatusEnum.agendada):
+    return Consulta(
+        paciente_id=paciente.id,
+        profissional_id=profissional.id,
+        data=SEGUNDA,
+        hora=hora,
+        status=status,
+        tipo="presencial"
+    )
+
+
+# ------------------------------------------------------------
+# TESTES DO CÁLCULO DE HORÁRIOS
+# ------------------------------------------------------------
+
+def test_intervalos_ocupados_sobreposicao():
+    ocupados = IntervalosOcupados([(60, 90), (80, 120), (200, 230)])
+
+    assert ocupados.sobrepoe(100, 130)
+    assert ocupados.sobrepoe(50, 61)
+    assert not ocupados.sobrepoe(120, 200)
+    assert not ocupados.sobrepoe(0, 60)
+
+
+def test_calcula_horarios_livres(agenda):
+    livres = calcula_horarios_livres(
+        [agenda],
+        [(SEGUNDA, time(9, 30))],
+        SEGUNDA, date(2030, 1, 8),
+        agora=datetime(2030, 1, 1)
+    )
+
+    assert livres == [{"data": SEGUNDA, "horas": [time(9, 0), time(10, 0), time(10, 30)]}]
+
+
+# ------------------------------------------------------------
+# TESTES DAS ROTAS
+# ------------------------------------------------------------
+
+def test_rota_disponibilidade(client, cabecalho_jwt, paciente, profissional, agenda):
+    resp = client.get(
+        f"/consultas/disponibilidade/{profissional.id}?inicio={SEGUNDA}&fim={SEGUNDA}",
+        headers=cabecalho_jwt(paciente.id, "paciente")
+    )
+
+    assert resp.status_code == 200
+    assert resp.get_json()["horarios"] == [
+        {"data": "2030-01-07", "horas": ["09:00", "09:30", "10:00", "10:30"]}
+    ]
+
+
+def test_reserva_de_horario_ocupado_retorna_409(client, cabecalho_jwt, paciente, outro_paciente, profissional, agenda):
+    corpo = {"profissional_id": profissional.id, "data": str(SEGUNDA), "hora": "09:30", "tipo": "online"}
+
+    resp = client.post("/consultas/", json=corpo, headers=cabecalho_jwt(paciente.id, "paciente"))
+    assert resp.status_code == 201
+
+    resp = client.post("/consultas/", json=corpo, headers=cabecalho_jwt(outro_paciente.id, "paciente"))
+    assert resp.status_code == 409
+
+    corpo["hora"] = "11:00"
+    resp = client.post("/consultas/", json=corpo, headers=cabecalho_jwt(outro_paciente.id, "paciente"))
+    assert resp.status_code == 409
+    assert resp.get_json()["message"] == "Horário fora da agenda do profissional."
+
+
+def test_reserva_em_dia_sem_janela_e_recusada(client, cabecalho_jwt, paciente, profissional, agenda):
+    """Quem só atende às segundas não aceita um domingo de madrugada."""
+    domingo = date(2030, 1, 6)
+    corpo = {"profissional_id": profissional.id, "data": str(domingo), "hora": "03:00", "tipo": "online"}
+
+    resp = client.post("/consultas/", json=corpo, headers=cabecalho_jwt(paciente.id, "paciente"))
+    assert resp.status_code == 409
+    assert resp.get_json()["message"] == "Horário fora da agenda do profissional."
+
+
+def test_indice_unico_impede_reserva_duplicada(app, paciente, outro_paciente, profissional):
+    """Mesmo sem a verificação da rota o banco recusa duas consultas ativas no mesmo horário."""
+    db.session.add(nova_consulta(paciente, profissional, time(9, 0)))
+    db.session.commit()
+
+    db.session.add(nova_consulta(outro_paciente, profissional, time(9, 0)))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_horario_cancelado_pode_ser_reservado(app, paciente, outro_paciente, profissional):
+    db.session.add(nova_consulta(paciente, profissional, time(9, 0), status=StatusEnum.cancelada))
+    db.session.add(nova_consulta(outro_paciente, profissional, time(9, 0)))
+    db.session.commit()
+
+    assert Consulta.query.count() == 2
+
+
+def test_profissional_define_agenda(client, cabecalho_jwt, profissional):
+    corpo = {"janelas": [{"dia_semana": 2, "hora_inicio": "14:00", "hora_fim": "18:00", "duracao_minutos": 60}]}
+
+    resp = client.put("/profissionais/agenda", json=corpo, headers=cabecalho_jwt(profissional.id, "profissional"))
+
+    assert resp.status_code == 200
+    assert AgendaProfissional.query.filter_by(profissional_id=profissional.id).one().duracao_minutos == 60
+
+    corpo["janelas"][0]["hora_fim"] = "13:00"
+    resp = client.put("/profissionais/agenda", json=corpo, headers=cabecalho_jwt(profissional.id, "profissional"))
+    assert resp.status_code == 400
+
+
+def test_remarcacao_por_outro_paciente_retorna_403(client, cabecalho_jwt, paciente, outro_paciente, profissional, agenda):
+    consulta = nova_consulta(paciente, profissional, time(9, 0))
+    db.session.add(consulta)
+    db.session.commit()
+
+    resp = client.put(
+        f"/consultas/{consulta.id}",
+        json={"hora": "10:00"},
+        headers=cabecalho_jwt(outro_paciente.id, "paciente")
+    )
+    assert resp.status_code == 403
+    assert db.session.get(Consulta, consulta.id).hora == time(9, 0)
+
+
+def test_remarcacao_de_consulta_sem_data_e_hora(client, cabecalho_jwt, paciente, profissional, agenda):
+    """Data e hora nulas no banco não derrubam a rota: só um dos campos é 400, os dois remarcam."""
+    consulta = Consulta(paciente_id=paciente.id, profissional_id=profissional.id, tipo="presencial")
+    db.session.add(consulta)
+    db.session.commit()
+    headers = cabecalho_jwt(paciente.id, "paciente")
+
+    resp = client.put(f"/consultas/{consulta.id}", json={"hora": "10:00"}, headers=headers)
+    assert resp.status_code == 400
+
+    resp = client.put(f"/consultas/{consulta.id}", json={"data": SEGUNDA.isoformat(), "hora": "10:00"}, headers=headers)
+    assert resp.status_code == 200
+    assert (consulta.data, consulta.hora) == (SEGUNDA, time(10, 0))
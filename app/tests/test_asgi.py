@@ -0,0 +1,103 @@
+import asyncio
+import json
+from datetime import date, time
+from app import db
+from app.asgi import AdaptadorAsgi
+from app.models import Consulta
+
+
+class ClienteAsgi:
+    """Executa uma requisição no adaptador e guarda as mensagens enviadas."""
+
+    def __init__(self, adaptador, metodo, caminho, cabecalhos=None, corpo=b""):
+        self.desconectar = asyncio.Event()
+        self.pedacos = asyncio.Queue()
+        self.inicio = None
+        caminho, _, query = caminho.partition("?")
+        scope = {
+            "type": "http", "method": metodo, "path": caminho, "query_string": query.encode(),
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (cabecalhos or {}).items()],
+            "server": ("testserver", 80), "client": ("127.0.0.1", 5000), "scheme": "http", "http_version": "1.1"
+        }
+        mensagens = [{"type": "http.request", "body": corpo, "more_body": False}]
+
+        async def receive():
+            if mensagens:
+                return mensagens.pop(0)
+
+            await self.desconectar.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(mensagem):
+            if mensagem["type"] == "http.response.start":
+                self.inicio = mensagem
+            else:
+                await self.pedacos.put(mensagem)
+
+        self.tarefa = asyncio.ensure_future(adaptador(scope, receive, send))
+
+    async def proximo(self):
+        return (await asyncio.wait_for(self.pedacos.get(), 5))["body"].decode()
+
+    async def completo(self):
+        await asyncio.wait_for(self.tarefa, 5)
+        corpo = b""
+
+        while not self.pedacos.empty():
+            corpo += (await self.pedacos.get())["body"]
+
+        return self.inicio["status"], corpo
+
+
+def test_requisicao_comum_e_corpo(app, token_administrador):
+    adaptador = AdaptadorAsgi(app, threads=2)
+
+    async def executa():
+        lista = await ClienteAsgi(adaptador, "GET", "/telemedicina/ativas", token_administrador).completo()
+        login = await ClienteAsgi(
+            adaptador, "POST", "/auth/login", {"Content-Type": "application/json"},
+            json.dumps({"email": "ninguem@example.com", "senha": "x"}).encode()
+        ).completo()
+        return lista, login
+
+    (status, corpo), (status_login, _) = asyncio.run(executa())
+
+    assert status == 200
+    assert json.loads(corpo) == {"total": 0, "dados": []}
+    assert status_login == 401
+
+
+def test_sse_nao_ocupa_thread_do_pool(app, paciente, profissional, cabecalho_jwt, token_administrador):
+    """Com uma única thread, outras requisições continuam sendo atendidas enquanto o paciente espera."""
+    consulta = Consulta(paciente_id=paciente.id, profissional_id=profissional.id, data=date(2025, 1, 1), hora=time(14, 0), tipo="online")
+    db.session.add(consulta)
+    db.session.commit()
+    consulta_id = consulta.id
+    token_paciente = cabecalho_jwt(paciente.id, "paciente")["Authorization"].split()[1]
+    cabecalho_profissional = cabecalho_jwt(profissional.id, "profissional")
+    adaptador = AdaptadorAsgi(app, threads=1)
+    eventos = app.extensions["eventos"]
+
+    async def executa():
+        sse = ClienteAsgi(adaptador, "GET", f"/telemedicina/eventos/{consulta_id}?jwt={token_paciente}")
+        estado = await sse.proximo()
+
+        status_lista, _ = await ClienteAsgi(adaptador, "GET", "/telemedicina/ativas", token_administrador).completo()
+        status_inicio, _ = await ClienteAsgi(adaptador, "POST", f"/telemedicina/iniciar/{consulta_id}", cabecalho_profissional).completo()
+        iniciada = await sse.proximo()
+
+        sse.desconectar.set()
+        await asyncio.wait_for(sse.tarefa, 5)
+
+        return sse.inicio, estado, status_lista, status_inicio, iniciada
+
+    inicio, estado, status_lista, status_inicio, iniciada = asyncio.run(executa())
+
+    assert inicio["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in inicio["headers"]
+    assert all(nome != b"content-length" for nome, _ in inicio["headers"])
+    assert '"ativa":false' in estado
+    assert status_lista == 200
+    assert status_inicio == 200
+    assert iniciada.startswith("event: iniciada\n")
+    assert eventos.metricas()["conexoes"] == 0
@@ -1,5 +1,11 @@
+import json
+import os
+import subprocess
+import sys
+import time
 import pytest
-from app.audit import registrar_auditoria
+from app import db
+from app.audit import registrar_auditoria, FilaAuditoria
 from app.models import LogAuditoria
 from datetime import datetime
 
@@ -50,3 +56,130 @@ def test_registrar_varias_auditorias(app, db_session):
     assert logs[0].usuario_id == 1
     assert logs[1].usuario_id == 2
     assert logs[2].usuario_id == 3
+
+
+# -----------------------------
+# FILA ASSÍNCRONA
+# -----------------------------
+@pytest.fixture
+def fila(app, tmp_path):
+    app.config["AUDITORIA_DIRETORIO_SPOOL"] = str(tmp_path)
+    app.config["AUDITORIA_INTERVALO_FLUSH"] = 0.05
+    return FilaAuditoria(app)
+
+
+def test_fila_grava_em_lote_ao_encerrar(app, fila):
+    """Os registros enfileirados devem ser gravados pela thread e no encerramento."""
+    app.config["AUDITORIA_ASSINCRONA"] = True
+
+    for i in range(10):
+        registrar_auditoria(i, f"ACAO_{i}")
+
+    fila.encerra()
+
+    logs = LogAuditoria.query.order_by(LogAuditoria.id).all()
+    assert [l.acao for l in logs] == [f"ACAO_{i}" for i in range(10)]
+    assert fila.registros_gravados == 10
+    assert fila.profundidade == 0
+
+
+def test_fila_usa_spool_quando_banco_falha(app, fila, tmp_path, monkeypatch):
+    """Sem banco o lote vai para o spool e é reprocessado no próximo flush."""
+    registro = {"usuario_id": 1, "acao": "SPOOL", "detalhes": None, "data_hora": datetime.now()}
+
+    def falha(*args, **kwargs):
+        raise RuntimeError("banco fora do ar")
+
+    with monkeypatch.context() as m:
+        m.setattr(db.session, "execute", falha)
+        fila.descarrega([registro])
+
+    assert fila.registros_em_spool == 1
+    assert LogAuditoria.query.count() == 0
+    assert len(list(tmp_path.glob("auditoria-*.ndjson"))) == 1
+
+    fila.descarrega([{**registro, "acao": "NOVO"}])
+
+    assert [l.acao for l in LogAuditoria.query.order_by(LogAuditoria.id)] == ["SPOOL", "NOVO"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fila_retoma_spool_de_processo_morto(app, fila, tmp_path):
+    """Um arquivo reivindicado por um processo que morreu volta a ser processado."""
+    morto = subprocess.Popen([sys.executable, "-c", "pass"])
+    morto.wait()
+
+    linha = {"usuario_id": 1, "acao": "ORFAO", "detalhes": None, "data_hora": datetime.now().isoformat()}
+    (tmp_path / f"auditoria-1.ndjson.{morto.pid}.processando").write_text(json.dumps(linha) + "\n")
+
+    # Reivindicado por este processo: ainda em andamento, não é tocado
+    ativo = tmp_path / f"auditoria-2.ndjson.{os.getpid()}.processando"
+    ativo.write_text(json.dumps({**linha, "acao": "ATIVO"}) + "\n")
+
+    fila.descarrega([])
+
+    assert [l.acao for l in LogAuditoria.query] == ["ORFAO"]
+    assert list(tmp_path.iterdir()) == [ativo]
+
+    # Na inicialização, o pid atual só pode ser de uma encarnação anterior
+    fila.retoma_spool_orfao(inicio=True)
+    fila.descarrega([])
+
+    assert sorted(l.acao for l in LogAuditoria.query) == ["ATIVO", "ORFAO"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fila_isola_linha_recusada_pelo_banco(app, fila, tmp_path):
+    """Uma linha inválida no spool vai para os descartados sem travar as demais."""
+    agora = datetime.now().isoformat()
+    spool = [
+        {"usuario_id": None, "acao": "INVALIDA", "detalhes": None, "data_hora": agora},
+        {"usuario_id": 1, "acao": "SPOOL", "detalhes": None, "data_hora": agora}
+    ]
+    (tmp_path / "auditoria-1.ndjson").write_text("".join(json.dumps(r) + "\n" for r in spool))
+
+    fila.descarrega([{"usuario_id": 2, "acao": "NOVO", "detalhes": None, "data_hora": datetime.now()}])
+
+    assert [l.acao for l in LogAuditoria.query.order_by(LogAuditoria.id)] == ["SPOOL", "NOVO"]
+    assert fila.registros_descartados == 1
+    assert fila.registros_em_spool == 0
+
+    descartados = list(tmp_path.glob("descartados-*.ndjson"))
+    assert [p.name for p in tmp_path.iterdir()] == [descartados[0].name]
+    assert json.loads(descartados[0].read_text())["acao"] == "INVALIDA"
+
+    # Os flushes seguintes não dependem mais da linha recusada
+    fila.descarrega([{"usuario_id": 3, "acao": "DEPOIS", "detalhes": None, "data_hora": datetime.now()}])
+    assert LogAuditoria.query.count() == 3
+
+
+def test_thread_sobrevive_a_falha_na_gravacao(app, fila, monkeypatch):
+    app.config["AUDITORIA_ASSINCRONA"] = True
+    grava = fila.grava
+    falhas = []
+
+    def falha_uma_vez(registros):
+        if not falhas:
+            falhas.append(registros)
+            raise OSError("disco cheio")
+        grava(registros)
+
+    monkeypatch.setattr(fila, "grava", falha_uma_vez)
+
+    registrar_auditoria(1, "PERDIDA")
+
+    limite = time.monotonic() + 2
+    while not falhas and time.monotonic() < limite:
+        time.sleep(0.01)
+
+    registrar_auditoria(2, "GRAVADA")
+
+    # Gravada pela mesma thread, não pelo encerramento
+    limite = time.monotonic() + 2
+    while not fila.registros_gravados and time.monotonic() < limite:
+        time.sleep(0.01)
+
+    assert fila.thread.is_alive()
+    fila.encerra()
+
+    assert [l.acao for l in LogAuditoria.query] == ["GRAVADA"]
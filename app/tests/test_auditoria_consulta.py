@@ -0,0 +1,89 @@
+import gzip
+import json
+from datetime import date, datetime
+from app import db
+from app.models import LogAuditoria
+from app.services.auditoria import arquiva_auditoria, ddl_particao, soma_meses
+
+
+def cria_logs(*registros):
+    logs = [
+        LogAuditoria(usuario_id=usuario_id, acao=acao, detalhes=f"log {i}", data_hora=data_hora)
+        for i, (usuario_id, acao, data_hora) in enumerate(registros)
+    ]
+    db.session.add_all(logs)
+    db.session.commit()
+    return [log.id for log in logs]
+
+
+def test_consulta_filtra_e_pagina_do_mais_recente(client, token_administrador):
+    ids = cria_logs(
+        (1, "CRIAR_CONSULTA", datetime(2024, 1, 10, 9)),
+        (1, "CRIAR_CONSULTA", datetime(2024, 2, 10, 9)),
+        (1, "CRIAR_CONSULTA", datetime(2024, 2, 10, 9)),
+        (2, "CRIAR_CONSULTA", datetime(2024, 2, 11, 9)),
+        (1, "CANCELAR_CONSULTA", datetime(2024, 2, 12, 9))
+    )
+    parametros = {"usuario_id": 1, "acao": "CRIAR_CONSULTA", "inicio": "2024-01-01", "limit": 2}
+
+    primeira = client.get("/administracao/auditoria", query_string=parametros, headers=token_administrador).json
+    segunda = client.get(
+        "/administracao/auditoria", query_string={**parametros, "after": primeira["next_cursor"]}, headers=token_administrador
+    ).json
+
+    assert [l["id"] for l in primeira["dados"]] == [ids[2], ids[1]]
+    assert [l["id"] for l in segunda["dados"]] == [ids[0]]
+    assert segunda["next_cursor"] is None
+
+    resp = client.get("/administracao/auditoria", query_string={"inicio": "2024-02-11", "fim": "2024-02-12"}, headers=token_administrador)
+
+    assert [l["id"] for l in resp.json["dados"]] == [ids[3]]
+
+
+def test_consulta_valida_parametros(client, token_administrador, cabecalho_jwt):
+    assert client.get("/administracao/auditoria?inicio=ontem", headers=token_administrador).status_code == 400
+    assert client.get("/administracao/auditoria?usuario_id=abc", headers=token_administrador).status_code == 400
+    assert client.get("/administracao/auditoria?after=xyz", headers=token_administrador).status_code == 400
+    assert client.get("/administracao/auditoria", headers=cabecalho_jwt(1, "paciente")).status_code == 401
+
+
+def test_arquiva_meses_fora_da_retencao(app, tmp_path):
+    cria_logs(
+        (1, "ANTIGO", datetime(2023, 11, 30, 23, 59)),
+        (1, "ANTIGO", datetime(2024, 1, 5, 8)),
+        (1, "RECENTE", datetime(2024, 5, 1, 0, 0))
+    )
+
+    arquivados = arquiva_auditoria(retencao_meses=3, diretorio=str(tmp_path), tamanho_lote=1, hoje=date(2024, 5, 20))
+
+    # Mantém maio e os 3 meses anteriores; novembro a janeiro vão para arquivo
+    assert [(mes, total) for mes, total, _ in arquivados] == [
+        (date(2023, 11, 1), 1), (date(2023, 12, 1), 0), (date(2024, 1, 1), 1)
+    ]
+    assert arquivados[1][2] is None
+    assert [log.acao for log in LogAuditoria.query.all()] == ["RECENTE"]
+
+    with gzip.open(arquivados[2][2], "rt", encoding="utf-8") as arquivo:
+        linhas = [json.loads(linha) for linha in arquivo]
+
+    assert linhas[0]["data_hora"] == "2024-01-05T08:00:00"
+    assert sorted(p.name.endswith(".ndjson.gz") for p in tmp_path.iterdir()) == [True, True]
+
+
+def test_comando_arquiva_auditoria(app, tmp_path):
+    cria_logs((1, "ANTIGO", datetime(2000, 1, 1)))
+
+    resultado = app.test_cli_runner().invoke(args=["manutencao", "arquiva-auditoria", "--diretorio", str(tmp_path)])
+
+    assert "2000-01: 1 logs arquivados" in resultado.output
+    assert LogAuditoria.query.count() == 0
+
+
+def test_ddl_particao_por_banco():
+    assert soma_meses(date(2024, 12, 1), 1) == date(2025, 1, 1)
+    assert ddl_particao("postgresql", date(2024, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS logs_auditoria_p202412 PARTITION OF logs_auditoria "
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    )
+    assert "PARTITION p202412 VALUES LESS THAN ('2025-01-01')" in ddl_particao("mysql", date(2024, 12, 1))
+    assert ddl_particao("sqlite", date(2024, 12, 1)) is None
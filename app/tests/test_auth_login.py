@@ -2,6 +2,7 @@ import pytest
 from flask_jwt_extended import decode_token
 from app.models import Usuario
 from app import create_app, db
+from app.services.security import FilaVerificacaoCheia
 
 @pytest.fixture
 def app():
@@ -92,3 +93,56 @@ def test_login_payload_invalido(client):
     })
 
     assert resp.status_code == 400
+
+
+def test_login_refaz_hash_com_parametros_antigos(app, client, usuario_valido):
+    """Após o login, o hash gravado com outro custo deve ser regravado."""
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+
+    resp = client.post("/auth/login", json={
+        "email": "teste@example.com",
+        "senha": "senha123"
+    })
+
+    assert resp.status_code == 200
+    db.session.refresh(usuario_valido)
+    assert usuario_valido.senha.startswith("pbkdf2:sha256:1000$")
+
+    # Verificação e rehash passam pelo pool de senhas
+    assert app.extensions["verificador_senhas"].metricas()["verificacoes"] == 2
+
+
+def test_login_com_pool_cheio_adia_o_rehash(app, client, usuario_valido, monkeypatch):
+    """Sem vaga no pool para o rehash o login segue com o hash antigo."""
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+    hash_antigo = usuario_valido.senha
+
+    def recusa(*args):
+        raise FilaVerificacaoCheia()
+
+    monkeypatch.setattr(app.extensions["verificador_senhas"], "gera_hash", recusa)
+
+    resp = client.post("/auth/login", json={
+        "email": "teste@example.com",
+        "senha": "senha123"
+    })
+
+    assert resp.status_code == 200
+    db.session.refresh(usuario_valido)
+    assert usuario_valido.senha == hash_antigo
+
+
+def test_login_sobrecarregado_retorna_503(app, client, usuario_valido, monkeypatch):
+    """Quando o pool de verificação está cheio o login deve responder 503."""
+    def recusa(*args):
+        raise FilaVerificacaoCheia()
+
+    monkeypatch.setattr(app.extensions["verificador_senhas"], "verifica", recusa)
+
+    resp = client.post("/auth/login", json={
+        "email": "teste@example.com",
+        "senha": "senha123"
+    })
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
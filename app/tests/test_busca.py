@@ -0,0 +1,118 @@
+from datetime import date, datetime, time
+from app import db
+from app.models import Consulta, Prontuario, Profissional, Usuario, TermoProntuario, PerfilEnum
+from app.services.busca import termos, indexa_prontuario
+
+
+def cria_prontuario(paciente_id, profissional_id, anotacoes, prescricao="", hora=9):
+    consulta = Consulta(
+        paciente_id=paciente_id, profissional_id=profissional_id,
+        data=date(2024, 1, 8), hora=time(hora, 0), tipo="presencial"
+    )
+    prontuario = Prontuario(consulta=consulta, anotacoes=anotacoes, prescricao=prescricao, data_registro=datetime(2024, 1, 8, hora))
+    db.session.add(prontuario)
+    indexa_prontuario(prontuario, consulta)
+    db.session.commit()
+    return prontuario
+
+
+def busca(client, cabecalho, texto, **parametros):
+    return client.get("/prontuarios/busca", query_string={"q": texto, **parametros}, headers=cabecalho)
+
+
+def test_termos_ignoram_acentos_e_palavras_comuns():
+    assert list(termos("Hipertensão arterial, em uso de Losartana 50 mg")) == [
+        "hipertensao", "arterial", "uso", "losartana"
+    ]
+
+
+def test_post_indexa_e_busca_encontra(client, paciente, profissional, cabecalho_jwt):
+    cabecalho = cabecalho_jwt(profissional.id, "profissional")
+    consulta = Consulta(
+        paciente_id=paciente.id, profissional_id=profissional.id,
+        data=date(2024, 1, 8), hora=time(9, 0), tipo="presencial"
+    )
+    db.session.add(consulta)
+    db.session.commit()
+
+    resp = client.post("/prontuarios/", json={
+        "consulta_id": consulta.id,
+        "anotacoes": "Paciente com hipertensão controlada.",
+        "prescricao": "Amoxicilina 500mg de 8 em 8 horas"
+    }, headers=cabecalho)
+    assert resp.status_code == 201
+
+    resp = busca(client, cabecalho, "AMOXICILINA")
+
+    assert resp.status_code == 200
+    assert [r["consulta_id"] for r in resp.json["dados"]] == [consulta.id]
+    assert "hipertensão" in busca(client, cabecalho, "hipertensao").json["dados"][0]["trecho"]
+
+
+def test_ranking_prioriza_mais_termos_encontrados(client, paciente, profissional, cabecalho_jwt):
+    so_um = cria_prontuario(paciente.id, profissional.id, "Dor de cabeça, dor de cabeça, dor de cabeça.", hora=9)
+    os_dois = cria_prontuario(paciente.id, profissional.id, "Febre e dor de cabeça.", hora=10)
+    cria_prontuario(paciente.id, profissional.id, "Retorno sem queixas.", hora=11)
+
+    resp = busca(client, cabecalho_jwt(profissional.id, "profissional"), "cabeça febre")
+
+    assert [r["id"] for r in resp.json["dados"]] == [os_dois.id, so_um.id]
+
+
+def test_busca_restrita_aos_pacientes_do_profissional(client, paciente, profissional, cabecalho_jwt):
+    usuario = Usuario(nome="Outro", email="outro.prof@example.com", senha="x", perfil=PerfilEnum.profissional)
+    outro = Profissional(usuario=usuario, conselho="CRM", numero_conselho="111111")
+    db.session.add(outro)
+    db.session.commit()
+
+    cria_prontuario(paciente.id, profissional.id, "Diabetes tipo 2.")
+
+    assert busca(client, cabecalho_jwt(outro.id, "profissional"), "diabetes").json["dados"] == []
+
+
+def test_busca_ignora_prontuarios_de_outro_profissional_do_mesmo_paciente(client, paciente, profissional, cabecalho_jwt):
+    """Atender o paciente não dá acesso aos prontuários escritos por outro profissional."""
+    usuario = Usuario(nome="Outro", email="outro.prof@example.com", senha="x", perfil=PerfilEnum.profissional)
+    outro = Profissional(usuario=usuario, conselho="CRM", numero_conselho="111111")
+    db.session.add(outro)
+    db.session.commit()
+
+    proprio = cria_prontuario(paciente.id, profissional.id, "Diabetes tipo 2.", hora=9)
+    cria_prontuario(paciente.id, outro.id, "Diabetes, encaminhado à endocrinologia.", hora=10)
+
+    resp = busca(client, cabecalho_jwt(profissional.id, "profissional"), "diabetes")
+
+    assert [r["id"] for r in resp.json["dados"]] == [proprio.id]
+
+
+def test_busca_paginada(client, paciente, profissional, cabecalho_jwt):
+    for hora in range(8, 13):
+        cria_prontuario(paciente.id, profissional.id, "Asma", hora=hora)
+
+    cabecalho = cabecalho_jwt(profissional.id, "profissional")
+    primeira = busca(client, cabecalho, "asma", limit=3).json
+    segunda = busca(client, cabecalho, "asma", limit=3, after=primeira["next_cursor"]).json
+
+    assert len(primeira["dados"]) == 3
+    assert len(segunda["dados"]) == 2
+    assert segunda["next_cursor"] is None
+    assert not {r["id"] for r in primeira["dados"]} & {r["id"] for r in segunda["dados"]}
+
+
+def test_busca_sem_texto_ou_com_cursor_negativo(client, profissional, cabecalho_jwt):
+    cabecalho = cabecalho_jwt(profissional.id, "profissional")
+
+    assert busca(client, cabecalho, " ").status_code == 400
+    assert busca(client, cabecalho, "asma", after=-1).status_code == 400
+
+
+def test_comando_reindexa_prontuarios(app, paciente, profissional):
+    profissional_id = profissional.id
+    cria_prontuario(paciente.id, profissional.id, "Rinite alérgica")
+    TermoProntuario.query.delete()
+    db.session.commit()
+
+    resultado = app.test_cli_runner().invoke(args=["manutencao", "reindexa-prontuarios"])
+
+    assert "1 prontuários indexados." in resultado.output
+    assert {(t.termo, t.profissional_id) for t in TermoProntuario.query} == {("rinite", profissional_id), ("alergica", profissional_id)}
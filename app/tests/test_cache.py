@@ -0,0 +1,81 @@
+from app import db
+from app.cache import CacheLocal, CacheRedis, CacheEntidades
+
+
+class ClienteChaveValor:
+    """Substituto local de um servidor compatível com Redis (apenas get/set/delete)."""
+
+    def __init__(self):
+        self.dados = {}
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.dados[chave] = valor
+
+    def delete(self, *chaves):
+        for chave in chaves:
+            self.dados.pop(chave, None)
+
+
+def test_cache_local_descarta_menos_usado_e_expirados():
+    cache = CacheLocal(maximo_entradas=2, ttl=60)
+    cache.grava("a", 1)
+    cache.grava("b", 2)
+    cache.obtem("a")
+    cache.grava("c", 3)
+
+    assert cache.obtem("b") is None
+    assert cache.obtem("a") == 1
+    assert cache.obtem("c") == 3
+
+    expirado = CacheLocal(maximo_entradas=2, ttl=0)
+    expirado.grava("a", 1)
+
+    assert expirado.obtem("a") is None
+
+
+def test_cache_redis_serializa_em_json():
+    cliente = ClienteChaveValor()
+    cache = CacheRedis(cliente, ttl=60)
+
+    cache.grava("pacientes:1", {"id": 1, "nome": "Maria"})
+
+    assert cache.obtem("pacientes:1") == {"id": 1, "nome": "Maria"}
+
+    cache.remove(["pacientes:1"])
+
+    assert cliente.dados == {}
+
+
+def test_consulta_da_administracao_usa_o_cache(app, client, paciente, token_administrador):
+    for _ in range(3):
+        resp = client.get(f"/administracao/lista_pacientes/{paciente.id}", headers=token_administrador)
+        assert resp.status_code == 200
+
+    metricas = app.extensions["cache"].metricas()
+
+    assert metricas["falhas"] == 1
+    assert metricas["acertos"] == 2
+
+
+def test_alteracao_invalida_o_cache(client, paciente, token_administrador, cabecalho_jwt):
+    """O paciente altera o próprio nome e a administração já enxerga a mudança."""
+    rota = f"/administracao/lista_pacientes/{paciente.id}"
+    client.get(rota, headers=token_administrador)
+
+    client.put("/pacientes/", json={"nome": "Maria Souza"}, headers=cabecalho_jwt(paciente.id, "paciente"))
+
+    assert client.get(rota, headers=token_administrador).json["nome"] == "Maria Souza"
+
+
+def test_invalidacao_usa_backend_compartilhado(app, paciente):
+    cache = CacheEntidades(app)
+    cache.backend = CacheRedis(ClienteChaveValor(), ttl=60)
+    cache.obtem(f"pacientes:{paciente.id}", lambda: {"id": paciente.id})
+
+    paciente.telefone = "11900000000"
+    db.session.commit()
+
+    assert cache.backend.cliente.dados == {}
@@ -0,0 +1,93 @@
+from datetime import date, time
+from app import db
+from app.models import Consulta, Paciente, Usuario, StatusEnum, PerfilEnum
+
+
+def test_perfil_responde_304_com_etag(client, paciente, cabecalho_jwt):
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+
+    resp = client.get("/pacientes/", headers=cabecalho)
+    etag = resp.headers["ETag"]
+
+    assert resp.status_code == 200
+    assert "Last-Modified" in resp.headers
+
+    resp = client.get("/pacientes/", headers={**cabecalho, "If-None-Match": etag})
+
+    assert resp.status_code == 304
+    assert resp.data == b""
+    assert resp.headers["ETag"] == etag
+
+
+def test_etag_muda_quando_o_usuario_e_alterado(client, paciente, cabecalho_jwt):
+    """Nome e e-mail vêm da tabela de usuários, que também entra na versão."""
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+    etag = client.get("/pacientes/", headers=cabecalho).headers["ETag"]
+
+    client.put("/pacientes/", json={"nome": "Maria Souza"}, headers=cabecalho)
+    resp = client.get("/pacientes/", headers={**cabecalho, "If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert resp.json["nome"] == "Maria Souza"
+    assert resp.headers["ETag"] != etag
+
+
+def test_listagem_muda_etag_com_novo_registro(client, paciente, token_administrador):
+    etag = client.get("/administracao/lista_pacientes", headers=token_administrador).headers["ETag"]
+
+    usuario = Usuario(nome="Novo", email="novo@example.com", senha="x", perfil=PerfilEnum.paciente)
+    db.session.add(Paciente(usuario=usuario, cpf="999.999.999-99", data_nascimento=date(2000, 1, 1)))
+    db.session.commit()
+
+    resp = client.get("/administracao/lista_pacientes", headers={**token_administrador, "If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert len(resp.json["dados"]) == 2
+
+
+def test_etag_depende_da_pagina(client, paciente, token_administrador):
+    primeira = client.get("/administracao/lista_pacientes", headers=token_administrador).headers["ETag"]
+    outra = client.get("/administracao/lista_pacientes?limit=1", headers=token_administrador).headers["ETag"]
+
+    assert primeira != outra
+
+
+def test_if_modified_since(client, paciente, cabecalho_jwt):
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+    ultima_modificacao = client.get("/pacientes/", headers=cabecalho).headers["Last-Modified"]
+
+    resp = client.get("/pacientes/", headers={**cabecalho, "If-Modified-Since": ultima_modificacao})
+
+    assert resp.status_code == 304
+
+
+def test_listagem_ignora_if_modified_since(client, paciente, profissional, cabecalho_jwt):
+    """Uma exclusão não muda o MAX(atualizado_em): a listagem só confia no ETag."""
+    consultas = [
+        Consulta(
+            paciente_id=paciente.id, profissional_id=profissional.id,
+            data=date(2030, 1, 7), hora=time(9 + i, 0), tipo="online", status=StatusEnum.agendada
+        )
+        for i in range(2)
+    ]
+    db.session.add_all(consultas)
+    db.session.commit()
+
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+    resp = client.get("/consultas/", headers=cabecalho)
+    assert "Last-Modified" not in resp.headers
+
+    db.session.delete(consultas[0])
+    db.session.commit()
+
+    resp = client.get("/consultas/", headers={**cabecalho, "If-Modified-Since": "Tue, 01 Jan 2999 00:00:00 GMT"})
+
+    assert resp.status_code == 200
+    assert len(resp.json) == 1
+
+
+def test_recurso_inexistente_nao_recebe_etag(client, token_administrador):
+    resp = client.get("/administracao/lista_consultas/999", headers=token_administrador)
+
+    assert resp.status_code == 404
+    assert "ETag" not in resp.headers
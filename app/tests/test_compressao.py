@@ -0,0 +1,57 @@
+import pytest
+from datetime import date, datetime, time
+from sqlalchemy import text
+from app import db
+from app.compressao import comprime, descomprime
+from app.models import Consulta, Prontuario
+
+NOTA_LONGA = "Paciente relata cefaleia há três dias, sem febre. Pressão 12x8. " * 20
+
+
+def test_texto_curto_fica_sem_compressao():
+    assert comprime("Dipirona") == b"Dipirona"
+    assert descomprime(b"Dipirona") == "Dipirona"
+
+
+def test_texto_longo_e_comprimido_com_cabecalho():
+    valor = comprime(NOTA_LONGA)
+
+    assert valor.startswith(b"\x00z")
+    assert len(valor) < len(NOTA_LONGA.encode("utf-8")) / 5
+    assert descomprime(valor) == NOTA_LONGA
+
+
+def test_linhas_antigas_continuam_legiveis():
+    """Texto gravado antes da compressão (str no SQLite, bytes nos demais) é lido como está."""
+    assert descomprime("Retorno em 30 dias") == "Retorno em 30 dias"
+    assert descomprime("Pressão alta".encode("utf-8")) == "Pressão alta"
+
+
+def test_texto_que_comeca_com_nul():
+    assert descomprime(comprime("\x00abc")) == "\x00abc"
+
+
+def test_zstd():
+    pytest.importorskip("zstandard")
+    valor = comprime(NOTA_LONGA, "zstd")
+
+    assert valor.startswith(b"\x00s")
+    assert descomprime(valor) == NOTA_LONGA
+
+
+def test_prontuario_grava_comprimido_e_le_texto(app, paciente, profissional):
+    consulta = Consulta(paciente_id=paciente.id, profissional_id=profissional.id, data=date(2024, 1, 8), hora=time(9, 0), tipo="presencial")
+    prontuario = Prontuario(consulta=consulta, anotacoes=NOTA_LONGA, prescricao="Dipirona", data_registro=datetime(2024, 1, 8, 9))
+    db.session.add(prontuario)
+    db.session.commit()
+
+    anotacoes, prescricao = db.session.execute(
+        text("SELECT anotacoes, prescricao FROM prontuarios WHERE id = :id"), {"id": prontuario.id}
+    ).one()
+
+    assert anotacoes.startswith(b"\x00z")
+    assert prescricao == b"Dipirona"
+
+    db.session.expire_all()
+
+    assert db.session.get(Prontuario, prontuario.id).anotacoes == NOTA_LONGA
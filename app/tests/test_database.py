@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from app.config import Config
+from app.database import (
+    PoolMonitorado, opcoes_engine, comando_timeout, engines_registrados, descarta_engines_apos_fork,
+    executa_fora_de_transacao
+)
+
+
+def config_com(uri, **extras):
+    config = {chave: getattr(Config, chave) for chave in dir(Config) if chave.isupper()}
+    config.update({"SQLALCHEMY_DATABASE_URI": uri, "SQLALCHEMY_ENGINE_OPTIONS": {}, **extras})
+    return config
+
+
+def test_opcoes_engine_ignora_sqlite_em_memoria():
+    assert opcoes_engine(config_com("sqlite:///:memory:")) == {}
+
+
+def test_opcoes_engine_usa_variaveis_do_pool():
+    """As opções do pool vêm da config, mas SQLALCHEMY_ENGINE_OPTIONS tem prioridade."""
+    config = config_com(
+        "postgresql://u:s@localhost/vidaplus",
+        DB_POOL_SIZE=20,
+        SQLALCHEMY_ENGINE_OPTIONS={"pool_recycle": 60}
+    )
+
+    opcoes = opcoes_engine(config)
+
+    assert opcoes["poolclass"] is PoolMonitorado
+    assert opcoes["pool_size"] == 20
+    assert opcoes["pool_recycle"] == 60
+    assert opcoes["pool_pre_ping"] is True
+
+
+def test_comando_timeout_por_dialeto():
+    assert comando_timeout("postgresql", 5000) == "SET statement_timeout = 5000"
+    assert comando_timeout("mysql", 5000) == "SET SESSION max_execution_time = 5000"
+    assert comando_timeout("sqlite", 5000) is None
+
+
+class ConexaoTransacional:
+    """Imita o psycopg2: fora do autocommit o SET só vale após o commit."""
+
+    def __init__(self):
+        self.autocommit = False
+        self.pendentes = []
+        self.configuracoes = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, comando):
+        (self.configuracoes if self.autocommit else self.pendentes).append(comando)
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        self.pendentes.clear()
+
+
+def test_statement_timeout_sobrevive_ao_rollback():
+    """O rollback do pool ao devolver a conexão não pode desfazer o timeout."""
+    conexao = ConexaoTransacional()
+
+    executa_fora_de_transacao(conexao, comando_timeout("postgresql", 5000), "postgresql")
+    conexao.rollback()
+
+    assert conexao.configuracoes == ["SET statement_timeout = 5000"]
+    assert conexao.autocommit is False
+
+
+def test_pool_monitorado_registra_checkouts_e_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=PoolMonitorado, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+
+    with engine.connect() as conexao:
+        conexao.execute(text("SELECT 1"))
+        assert engine.pool.metricas()["em_uso"] == 1
+
+        with pytest.raises(TimeoutPool):
+            engine.connect()
+
+    metricas = engine.pool.metricas()
+
+    assert metricas["checkouts"] == 2
+    assert metricas["timeouts"] == 1
+    assert metricas["em_uso"] == 0
+    assert metricas["tempo_espera_segundos"] >= 0.1
+
+
+def test_engines_sao_descartados_apos_fork(tmp_path):
+    """O processo filho não deve reutilizar as conexões abertas pelo pai."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fork.db'}", poolclass=PoolMonitorado)
+    pool_pai = engine.pool
+    engines_registrados.add(engine)
+
+    descarta_engines_apos_fork()
+
+    assert engine.pool is not pool_pai
+    assert isinstance(engine.pool, PoolMonitorado)
@@ -0,0 +1,84 @@
+from datetime import date
+from sqlalchemy import func, select
+from app import db
+from app.models import Consulta, LogAuditoria, Paciente, Prontuario, Telemedicina, Usuario, StatusEnum
+from app.services.geracao import PlanoGeracao, cpf_valido, gera_cpf, gera_dados
+from app.services.security import verificar_senha
+
+HOJE = date(2025, 6, 2)
+
+
+def test_cpfs_gerados_sao_validos_e_unicos():
+    cpfs = [gera_cpf(numero) for numero in range(1, 5001)]
+
+    assert all(cpf_valido(cpf) for cpf in cpfs)
+    assert len(set(cpfs)) == len(cpfs)
+    assert cpf_valido("529.982.247-25")
+    assert not cpf_valido("529.982.247-26")
+    assert not cpf_valido("111.111.111-11")
+
+
+def test_mesma_semente_gera_as_mesmas_linhas(app):
+    def linhas(semente):
+        plano = PlanoGeracao(1, 30, 3, 200, 100, 5, semente, HOJE)
+        return list(plano.lista_pacientes()), list(plano.lista_consultas()), list(plano.lista_prontuarios())
+
+    primeira, segunda = linhas(7), linhas(7)
+
+    # Ignora atualizado_em (momento da geração)
+    assert [p[:-1] for p in primeira[0]] == [p[:-1] for p in segunda[0]]
+    assert [c[:-1] for c in primeira[1]] == [c[:-1] for c in segunda[1]]
+    assert primeira[2] == segunda[2]
+    assert [c[:-1] for c in linhas(8)[1]] != [c[:-1] for c in primeira[1]]
+
+
+def test_gera_dados_popula_o_banco(app):
+    resultados = gera_dados(
+        pacientes=40, profissionais=4, consultas=600, logs=300, administradores=2,
+        sessoes_ativas=5, semente=3, senha="segredo", tamanho_lote=64, hoje=HOJE
+    )
+
+    assert dict((tabela, total) for tabela, total, _ in resultados)["consultas"] == 600
+    assert db.session.scalar(select(func.count()).select_from(Usuario)) == 46
+    assert db.session.scalar(select(func.count(func.distinct(Usuario.email)))) == 46
+    assert all(cpf_valido(cpf) for cpf in db.session.scalars(select(Paciente.cpf)))
+    assert verificar_senha("segredo", db.session.scalar(select(Usuario.senha).limit(1)))
+
+    status = dict(db.session.execute(select(Consulta.status, func.count()).group_by(Consulta.status)).all())
+    assert set(status) == {StatusEnum.agendada, StatusEnum.concluida, StatusEnum.cancelada}
+
+    # Prontuário só nas consultas concluídas, com os textos gravados comprimidos e lidos de volta
+    prontuarios = db.session.scalars(select(Prontuario)).all()
+    assert len(prontuarios) == status[StatusEnum.concluida]
+    assert all(p.consulta.status == StatusEnum.concluida and p.anotacoes for p in prontuarios)
+
+    sessoes = db.session.scalars(select(Telemedicina)).all()
+    assert len(sessoes) == 5
+    assert all(s.ativa and s.consulta.tipo == "online" and s.consulta.data >= HOJE for s in sessoes)
+
+    datas = db.session.scalars(select(LogAuditoria.data_hora).order_by(LogAuditoria.id)).all()
+    assert len(datas) == 300
+    assert datas == sorted(datas)
+
+    # Nenhum profissional com duas consultas no mesmo horário
+    horarios = db.session.execute(select(Consulta.profissional_id, Consulta.data, Consulta.hora)).all()
+    assert len(set(horarios)) == len(horarios)
+
+
+def test_comando_gera_dados_acrescenta_aos_dados_existentes(app, paciente):
+    argumentos = ["manutencao", "gera-dados", "--pacientes", "10", "--profissionais", "2",
+                  "--consultas", "50", "--logs", "20", "--sessoes-ativas", "0"]
+
+    resultado = app.test_cli_runner().invoke(args=argumentos)
+    assert resultado.exit_code == 0, resultado.output
+    assert "consultas" in resultado.output
+
+    # Uma segunda geração continua a partir dos ids existentes
+    resultado = app.test_cli_runner().invoke(args=argumentos + ["--semente", "9"])
+    assert resultado.exit_code == 0, resultado.output
+    assert db.session.scalar(select(func.count()).select_from(Paciente)) == 21
+    assert db.session.scalar(select(func.count()).select_from(Consulta)) == 100
+
+    resultado = app.test_cli_runner().invoke(args=["manutencao", "gera-dados", "--profissionais", "0"])
+    assert resultado.exit_code != 0
+    assert "profissionais" in resultado.output
@@ -0,0 +1,65 @@
+from datetime import date, datetime, time
+from app import db
+from app.models import Consulta, Prontuario, Telemedicina
+
+
+def cria_consultas(paciente, profissional):
+    consultas = [
+        Consulta(paciente_id=paciente.id, profissional_id=profissional.id, data=data, hora=hora, tipo="online")
+        for data, hora in [
+            (date(2024, 1, 8), time(9, 0)),
+            (date(2024, 3, 4), time(14, 0)),
+            (date(2024, 3, 4), time(10, 0))
+        ]
+    ]
+    db.session.add_all(consultas)
+    db.session.add(Prontuario(consulta=consultas[1], anotacoes="Retorno", prescricao="Dipirona", data_registro=datetime(2024, 3, 4, 14, 30)))
+    db.session.add(Telemedicina(consulta=consultas[1], codigo_sala="sala-1", url_sala="https://meet.example/sala-1", ativa=False))
+    db.session.commit()
+    return consultas
+
+
+def test_historico_do_paciente_paginado(client, paciente, profissional, cabecalho_jwt):
+    consultas = cria_consultas(paciente, profissional)
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+
+    primeira = client.get("/pacientes/historico?limit=2", headers=cabecalho).json
+    segunda = client.get(f"/pacientes/historico?limit=2&after={primeira['next_cursor']}", headers=cabecalho).json
+
+    assert [c["id"] for c in primeira["dados"]] == [consultas[1].id, consultas[2].id]
+    assert [c["id"] for c in segunda["dados"]] == [consultas[0].id]
+    assert segunda["next_cursor"] is None
+
+    recente = primeira["dados"][0]
+
+    assert recente["profissional"]["nome"] == "Profissional Teste"
+    assert recente["prontuarios"][0]["prescricao"] == "Dipirona"
+    assert recente["telemedicina"][0]["codigo_sala"] == "sala-1"
+    assert primeira["dados"][1]["prontuarios"] == []
+
+
+def test_historico_do_profissional(client, paciente, profissional, cabecalho_jwt):
+    cria_consultas(paciente, profissional)
+
+    resp = client.get("/profissionais/historico", headers=cabecalho_jwt(profissional.id, "profissional"))
+
+    assert resp.status_code == 200
+    assert len(resp.json["dados"]) == 3
+    assert resp.json["dados"][0]["paciente"]["nome"] == "Maria da Silva"
+
+
+def test_historico_executa_quantidade_fixa_de_queries(app, client, paciente, profissional, cabecalho_jwt, assert_max_queries):
+    """Consultas + prontuários + telemedicina, independentemente do tamanho da página."""
+    cria_consultas(paciente, profissional)
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+
+    with assert_max_queries(3) as registro:
+        client.get("/pacientes/historico", headers=cabecalho)
+
+    assert len(registro.statements) == 3
+
+
+def test_historico_cursor_invalido(client, paciente, cabecalho_jwt):
+    resp = client.get("/pacientes/historico?after=abc", headers=cabecalho_jwt(paciente.id, "paciente"))
+
+    assert resp.status_code == 400
@@ -0,0 +1,137 @@
+import io
+import pytest
+from flask_jwt_extended import create_access_token
+from app.models import Usuario, Paciente, Profissional
+
+
+def linha_paciente(i, **extra):
+    return {
+        "nome": f"Paciente {i}",
+        "email": f"importado{i}@example.com",
+        "senha": "123456",
+        "cpf": f"{i:03d}.111.111-11",
+        "data_nascimento": "01/02/1990",
+        **extra
+    }
+
+
+def test_importa_pacientes_json(client, token_administrador):
+    """Todas as linhas válidas devem ser criadas com usuário e perfil."""
+    linhas = [linha_paciente(i) for i in range(3)]
+
+    resp = client.post("/usuarios/importacao/pacientes", json=linhas, headers=token_administrador)
+
+    assert resp.status_code == 200
+    dados = resp.get_json()
+    assert dados["criados"] == 3
+    assert [r["status"] for r in dados["resultados"]] == ["criado"] * 3
+    assert Paciente.query.count() == 3
+    assert Usuario.query.filter_by(email="importado0@example.com").first().paciente.cpf == "000.111.111-11"
+
+
+def test_importa_pacientes_duplicados(client, token_administrador, paciente):
+    """Duplicidades no banco e dentro do próprio lote devem ser rejeitadas por linha."""
+    linhas = [
+        linha_paciente(1, email=paciente.usuario.email),
+        linha_paciente(2, cpf=paciente.cpf),
+        linha_paciente(3),
+        linha_paciente(4, email="importado3@example.com"),
+        linha_paciente(5, data_nascimento="1990-02-01"),
+    ]
+
+    resp = client.post("/usuarios/importacao/pacientes", json=linhas, headers=token_administrador)
+    resultados = resp.get_json()["resultados"]
+
+    assert [r["status"] for r in resultados] == ["erro", "erro", "criado", "erro", "erro"]
+    assert resultados[0]["mensagem"] == "E-mail já cadastrado."
+    assert resultados[1]["mensagem"] == "CPF já cadastrado."
+    assert resultados[3]["mensagem"] == "E-mail já cadastrado."
+    assert Paciente.query.count() == 2
+
+
+def test_importa_profissionais_csv(client, token_administrador):
+    csv = (
+        "nome,email,senha,conselho,numero_conselho,especialidade\n"
+        "Dra Ana,ana@example.com,123456,CRM,111,Pediatria\n"
+        "Dr Beto,beto@example.com,123456,CRM,,Cardiologia\n"
+    )
+
+    resp = client.post(
+        "/usuarios/importacao/profissionais",
+        data={"arquivo": (io.BytesIO(csv.encode()), "profissionais.csv")},
+        headers=token_administrador
+    )
+
+    dados = resp.get_json()
+    assert dados["criados"] == 1
+    assert dados["resultados"][1]["status"] == "erro"
+    assert Profissional.query.one().usuario.nome == "Dra Ana"
+
+
+def test_importacao_recusa_tipos_e_tamanhos_invalidos(client, token_administrador):
+    """Valores que não são texto ou não cabem na coluna viram erro na linha, não 500."""
+    linhas = [
+        linha_paciente(1, email=["x@x"]),
+        linha_paciente(2, senha=123),
+        linha_paciente(3, cpf="1" * 15),
+        linha_paciente(4, telefone="9" * 21),
+        linha_paciente(5)
+    ]
+
+    resp = client.post("/usuarios/importacao/pacientes", json=linhas, headers=token_administrador)
+
+    assert resp.status_code == 200
+    resultados = resp.get_json()["resultados"]
+    assert [r["status"] for r in resultados] == ["erro", "erro", "erro", "erro", "criado"]
+    assert resultados[0]["mensagem"] == "email deve ser um texto."
+    assert resultados[1]["mensagem"] == "senha deve ser um texto."
+    assert resultados[2]["mensagem"] == "cpf deve ter no máximo 14 caracteres."
+    assert resultados[3]["mensagem"] == "telefone deve ter no máximo 20 caracteres."
+
+
+def test_importacao_csv_fora_de_utf8(client, token_administrador):
+    csv = "nome,email,senha,conselho,numero_conselho\nJoão,joao@example.com,123456,CRM,1\n"
+
+    resp = client.post(
+        "/usuarios/importacao/profissionais",
+        data={"arquivo": (io.BytesIO(csv.encode("latin-1")), "profissionais.csv")},
+        headers=token_administrador
+    )
+
+    assert resp.status_code == 400
+    assert "UTF-8" in resp.get_json()["message"]
+
+
+def test_importacao_limite_e_permissao(app, client, token_administrador, paciente):
+    app.config["IMPORTACAO_LIMITE_LINHAS"] = 1
+
+    resp = client.post("/usuarios/importacao/pacientes", json=[linha_paciente(1), linha_paciente(2)], headers=token_administrador)
+    assert resp.status_code == 413
+
+    token = create_access_token(identity=str(paciente.id), additional_claims={"id": paciente.id, "perfil": "paciente"})
+    resp = client.post("/usuarios/importacao/pacientes", json=[], headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 401
+
+
+def test_importacao_cadastro_simultaneo(app, client, token_administrador, monkeypatch):
+    """Um e-mail gravado por outra requisição entre a verificação e o commit vira erro na linha."""
+    from app import db
+    from app.services import importacao
+
+    gera_hashes = importacao.gerar_hashes_senha
+
+    def cadastro_concorrente(senhas):
+        hashes = gera_hashes(senhas)
+        db.session.add(Usuario(nome="Concorrente", email="importado1@example.com", senha="x", perfil="paciente"))
+        db.session.commit()
+        return hashes
+
+    monkeypatch.setattr(importacao, "gerar_hashes_senha", cadastro_concorrente)
+
+    resp = client.post("/usuarios/importacao/pacientes", json=[linha_paciente(i) for i in range(3)], headers=token_administrador)
+
+    assert resp.status_code == 200
+    resultados = resp.get_json()["resultados"]
+    assert [r["status"] for r in resultados] == ["criado", "erro", "criado"]
+    assert resultados[1]["mensagem"] == "E-mail já cadastrado."
+    assert Paciente.query.count() == 2
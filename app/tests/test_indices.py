@@ -0,0 +1,40 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+from app import db
+from app.models import Consulta, Prontuario, Telemedicina, LogAuditoria
+
+
+def plano_execucao(consulta):
+    """Retorna o EXPLAIN QUERY PLAN (SQLite) da consulta como texto."""
+    sql = str(consulta.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    linhas = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return " | ".join(linha[-1] for linha in linhas)
+
+
+@pytest.mark.parametrize("consulta, indice", [
+    # ConsultaCollection.get
+    (lambda: Consulta.query.filter_by(paciente_id=1).order_by(Consulta.data, Consulta.hora),
+     "ix_consultas_paciente_data_hora"),
+    # Agenda do profissional
+    (lambda: Consulta.query.filter_by(profissional_id=1).order_by(Consulta.data, Consulta.hora),
+     "ix_consultas_profissional_data_hora"),
+    # consulta.prontuario
+    (lambda: Prontuario.query.filter_by(consulta_id=1), "ix_prontuarios_consulta_id"),
+    # consulta.telemedicina / sessão ativa
+    (lambda: Telemedicina.query.filter_by(consulta_id=1, ativa=True), "ix_telemedicinas_consulta_ativa"),
+    # Auditoria de um usuário por período
+    (lambda: LogAuditoria.query.filter(
+        LogAuditoria.usuario_id == 1,
+        LogAuditoria.data_hora >= datetime(2025, 1, 1)
+    ), "ix_logs_auditoria_usuario_data_hora"),
+    # Auditoria por período
+    (lambda: LogAuditoria.query.filter(LogAuditoria.data_hora >= datetime(2025, 1, 1)),
+     "ix_logs_auditoria_data_hora"),
+])
+def test_consultas_frequentes_usam_indice(app, consulta, indice):
+    """Cada consulta frequente deve ser resolvida pelo índice criado para ela."""
+    plano = plano_execucao(consulta())
+
+    assert f"USING INDEX {indice}" in plano or f"USING COVERING INDEX {indice}" in plano
+    assert "USE TEMP B-TREE" not in plano
@@ -0,0 +1,42 @@
+import logging
+import pytest
+from app.metrics import Histograma
+
+
+def test_histograma_acumula_buckets():
+    histograma = Histograma((1, 5))
+
+    for valor in (0.5, 3, 10):
+        histograma.observa(valor)
+
+    linhas = list(histograma.linhas("teste", {"rota": "/x"}))
+
+    assert 'teste_bucket{rota="/x",le="1"} 1' in linhas
+    assert 'teste_bucket{rota="/x",le="5"} 2' in linhas
+    assert 'teste_bucket{rota="/x",le="+Inf"} 3' in linhas
+    assert 'teste_count{rota="/x"} 3' in linhas
+
+
+def test_metrics_registra_latencia_e_queries(client, token_administrador):
+    """Cada requisição deve gerar latência e contagem de SQL para a sua rota."""
+    client.get("/administracao/lista_pacientes", headers=token_administrador)
+
+    resp = client.get("/metrics")
+    texto = resp.get_data(as_text=True)
+
+    assert resp.status_code == 200
+    assert 'vidaplus_requisicoes_total{metodo="GET",rota="/administracao/lista_pacientes",status="200"} 1' in texto
+    assert 'vidaplus_requisicao_duracao_segundos_count{metodo="GET",rota="/administracao/lista_pacientes"} 1' in texto
+    # Versão da listagem (ETag) + página
+    assert 'vidaplus_requisicao_queries_sum{metodo="GET",rota="/administracao/lista_pacientes"} 2' in texto
+    assert "vidaplus_auditoria_fila 0" in texto
+    assert 'vidaplus_login_verificacao{metrica="rejeitadas"} 0' in texto
+
+
+def test_metrics_avisa_excesso_de_queries(app, client, token_administrador, caplog):
+    app.extensions["metricas"].limite_queries = 0.5
+
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        client.get("/administracao/lista_pacientes", headers=token_administrador)
+
+    assert "possível N+1" in caplog.text
@@ -0,0 +1,82 @@
+import pytest
+from datetime import date, datetime, time
+from app import db
+from app.models import Administrador, Consulta, Paciente, PerfilEnum, Profissional, Prontuario, Usuario
+
+
+@pytest.fixture
+def clinica(app):
+    """Vários registros de cada tipo, para que um N+1 apareça como statements repetidos."""
+    profissionais, pacientes = [], []
+
+    for i in range(3):
+        usuario = Usuario(nome=f"Profissional {i}", email=f"prof{i}@example.com", senha="x", perfil=PerfilEnum.profissional)
+        profissionais.append(Profissional(usuario=usuario, conselho="CRM", numero_conselho=str(i)))
+        db.session.add(Administrador(
+            usuario=Usuario(nome=f"Admin {i}", email=f"adm{i}@example.com", senha="x", perfil=PerfilEnum.administrador),
+            cpf=f"000.000.000-0{i}", data_nascimento=date(1980, 1, 1)
+        ))
+
+    for i in range(5):
+        usuario = Usuario(nome=f"Paciente {i}", email=f"pac{i}@example.com", senha="x", perfil=PerfilEnum.paciente)
+        pacientes.append(Paciente(usuario=usuario, cpf=f"111.111.111-0{i}", data_nascimento=date(1990, 1, 1)))
+
+    db.session.add_all(profissionais + pacientes)
+    db.session.flush()
+
+    consultas = [
+        Consulta(
+            paciente_id=pacientes[0].id, profissional_id=profissionais[i % 3].id,
+            data=date(2025, 1, 1 + i), hora=time(9, 0), status="concluida", tipo="presencial"
+        )
+        for i in range(6)
+    ]
+    db.session.add_all(consultas)
+    db.session.flush()
+
+    for consulta in consultas:
+        db.session.add(Prontuario(consulta_id=consulta.id, anotacoes="Anotação", prescricao="Receita", data_registro=datetime(2025, 1, 1)))
+
+    db.session.commit()
+
+    return {
+        "administrador": db.session.scalar(db.select(Administrador.id).limit(1)),
+        "paciente": pacientes[0].id,
+        "profissional": consultas[0].profissional_id,
+        "consulta": consultas[0].id
+    }
+
+
+# (perfil, rota, máximo de statements), com várias linhas em cada listagem
+ORCAMENTOS = [
+    ("administrador", "/administracao/lista_administradores", 1),
+    ("administrador", "/administracao/lista_pacientes", 2),
+    ("administrador", "/administracao/lista_profissionais", 2),
+    ("administrador", "/administracao/lista_consultas", 2),
+    ("administrador", "/administracao/auditoria", 1),
+    ("paciente", "/consultas/", 2),
+    ("paciente", "/pacientes/historico", 3),
+    ("profissional", "/profissionais/historico", 3),
+    ("profissional", "/prontuarios/{consulta}", 1),
+    ("paciente", "/prontuarios/paciente/{consulta}", 1)
+]
+
+
+@pytest.mark.parametrize("perfil, rota, maximo", ORCAMENTOS)
+def test_orcamento_de_queries_por_endpoint(client, clinica, cabecalho_jwt, assert_max_queries, perfil, rota, maximo):
+    cabecalho = cabecalho_jwt(clinica[perfil], perfil)
+    caminho = rota.format(**clinica)
+
+    with assert_max_queries(maximo):
+        resp = client.get(caminho, headers=cabecalho)
+
+    assert resp.status_code == 200
+
+
+def test_detector_acusa_carregamento_preguicoso_em_laco(app, clinica, assert_max_queries):
+    db.session.expunge_all()
+
+    with pytest.raises(AssertionError, match="Possível N\\+1"):
+        with assert_max_queries(100):
+            # Cada paciente carrega o seu usuário com um SELECT próprio
+            [paciente.usuario.nome for paciente in Paciente.query.all()]
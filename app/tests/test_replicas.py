@@ -0,0 +1,141 @@
+import pytest
+from datetime import date
+from sqlalchemy import insert
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import Usuario, Administrador, Paciente, PerfilEnum
+from app.services.security import gerar_hash_senha
+
+
+def cria_app(tmp_path, replicas):
+    return create_app(testing=True, config={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primario.db'}",
+        "SQLALCHEMY_REPLICA_URIS": replicas
+    })
+
+
+def insere_paciente(engine, nome, usuario_id=None):
+    """Grava um paciente diretamente em um dos bancos, sem passar pela sessão."""
+    with engine.begin() as conexao:
+        usuario_id = conexao.execute(insert(Usuario).values(
+            id=usuario_id, nome=nome, email=f"{nome}@example.com", senha="x", perfil=PerfilEnum.paciente
+        )).inserted_primary_key[0]
+        conexao.execute(insert(Paciente).values(
+            id=usuario_id, cpf=nome, data_nascimento=date(1990, 1, 1)
+        ))
+
+
+@pytest.fixture
+def app_replica(tmp_path):
+    app = cria_app(tmp_path, [f"sqlite:///{tmp_path / 'replica.db'}"])
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(app.extensions["replicas"].engines["replica_0"])
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def cabecalho_admin(app_replica):
+    usuario = Usuario(
+        nome="Administrador", email="admin@example.com",
+        senha=gerar_hash_senha("123456"), perfil=PerfilEnum.administrador
+    )
+    administrador = Administrador(usuario=usuario, cpf="000.000.000-00", data_nascimento=date(1985, 5, 5))
+    db.session.add(administrador)
+    db.session.commit()
+
+    admin_id = administrador.id
+    token = create_access_token(identity=str(admin_id), additional_claims={"id": admin_id, "perfil": "administrador"})
+
+    # As requisições do test client reaproveitam este contexto: começa com uma sessão limpa
+    db.session.remove()
+
+    return admin_id, {"Authorization": f"Bearer {token}"}
+
+
+def nomes_pacientes(client, cabecalho):
+    resp = client.get("/administracao/lista_pacientes", headers=cabecalho)
+    assert resp.status_code == 200
+    return [p["nome"] for p in resp.json["dados"]]
+
+
+def test_get_le_da_replica(app_replica, cabecalho_admin):
+    """Listagens GET são atendidas pela réplica."""
+    insere_paciente(db.engines[None], "primario")
+    insere_paciente(app_replica.extensions["replicas"].engines["replica_0"], "replica")
+
+    assert nomes_pacientes(app_replica.test_client(), cabecalho_admin[1]) == ["replica"]
+
+
+def test_usuario_le_do_primario_apos_escrever(app_replica, cabecalho_admin):
+    """Logo após uma escrita, as leituras do mesmo usuário vão para o primário."""
+    insere_paciente(db.engines[None], "primario")
+    client = app_replica.test_client()
+    admin_id, cabecalho = cabecalho_admin
+
+    resp = client.put(f"/administracao/lista_administradores/{admin_id}", json={"telefone": "1"}, headers=cabecalho)
+    assert resp.status_code == 200
+
+    marca = resp.headers["X-Ultima-Escrita"]
+    db.session.remove()
+
+    assert nomes_pacientes(client, cabecalho) == ["primario"]
+
+    # Outro worker (ou cliente sem cookies) reconhece a marca enviada no cabeçalho
+    outro = app_replica.test_client()
+    assert nomes_pacientes(outro, {**cabecalho, "X-Ultima-Escrita": marca}) == ["primario"]
+    assert nomes_pacientes(outro, cabecalho) == []
+
+    # A marca é do usuário que escreveu e não pode ser forjada
+    outro_usuario = create_access_token(identity="999", additional_claims={"id": 999, "perfil": "administrador"})
+    assert nomes_pacientes(outro, {"Authorization": f"Bearer {outro_usuario}", "X-Ultima-Escrita": marca}) == []
+    assert nomes_pacientes(outro, {**cabecalho, "X-Ultima-Escrita": marca + "x"}) == []
+
+    client.delete_cookie("vidaplus_escrita")
+
+    assert nomes_pacientes(client, cabecalho) == []
+
+
+def test_cache_carrega_do_primario(app_replica, cabecalho_admin):
+    """Após uma invalidação, o valor recarregado no cache não vem de uma réplica atrasada."""
+    insere_paciente(db.engines[None], "atualizado", usuario_id=50)
+    insere_paciente(app_replica.extensions["replicas"].engines["replica_0"], "atrasado", usuario_id=50)
+
+    resp = app_replica.test_client().get("/administracao/lista_pacientes/50", headers=cabecalho_admin[1])
+
+    assert resp.status_code == 200
+    assert resp.json["nome"] == "atualizado"
+    assert app_replica.extensions["cache"].backend.obtem("pacientes:50")["nome"] == "atualizado"
+
+
+def test_replica_indisponivel_volta_para_o_primario(tmp_path):
+    app = cria_app(tmp_path, [f"sqlite:///{tmp_path / 'inexistente' / 'replica.db'}"])
+
+    with app.app_context():
+        db.create_all()
+        insere_paciente(db.engines[None], "primario")
+
+        usuario = Usuario(nome="Administrador", email="admin@example.com", senha="x", perfil=PerfilEnum.administrador)
+        db.session.add(Administrador(usuario=usuario, cpf="000.000.000-00", data_nascimento=date(1985, 5, 5)))
+        db.session.commit()
+
+        token = create_access_token(identity=str(usuario.id), additional_claims={"id": usuario.id, "perfil": "administrador"})
+        db.session.remove()
+        client = app.test_client()
+
+        assert nomes_pacientes(client, {"Authorization": f"Bearer {token}"}) == ["primario"]
+        assert 'vidaplus_replicas{replica="replica_0",metrica="disponivel"} 0' in client.get("/metrics").get_data(as_text=True)
+
+        db.session.remove()
+
+
+def test_round_robin_entre_replicas(tmp_path):
+    app = cria_app(tmp_path, [f"sqlite:///{tmp_path / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"])
+    roteador = app.extensions["replicas"]
+
+    with app.app_context():
+        escolhidas = [roteador.escolhe_replica() for _ in range(4)]
+
+    assert escolhidas == ["replica_0", "replica_1", "replica_0", "replica_1"]
@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from app.services.security import (
+    VerificadorSenhas,
+    FilaVerificacaoCheia,
+    gerar_hash_senha,
+    gerar_hashes_senha,
+    verificar_senha,
+    precisa_rehash,
+    normaliza_metodo
+)
+
+# -----------------------------
+# TESTES PARA normaliza_metodo()
+# -----------------------------
+def test_normaliza_metodo_completa_parametros():
+    assert normaliza_metodo("scrypt") == "scrypt:32768:8:1"
+    assert normaliza_metodo("scrypt:16384") == "scrypt:16384:8:1"
+    assert normaliza_metodo("pbkdf2:sha256:1000") == "pbkdf2:sha256:1000"
+
+
+# -----------------------------
+# TESTES PARA gerar_hash_senha() / precisa_rehash()
+# -----------------------------
+def test_hash_usa_metodo_configurado(app):
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+
+    hash_senha = gerar_hash_senha("segredo")
+
+    assert hash_senha.startswith("pbkdf2:sha256:1000$")
+    assert verificar_senha("segredo", hash_senha)
+    assert not precisa_rehash(hash_senha)
+
+
+def test_precisa_rehash_quando_custo_muda(app):
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+    hash_antigo = gerar_hash_senha("segredo")
+
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:2000"
+
+    assert precisa_rehash(hash_antigo)
+
+
+# -----------------------------
+# TESTES PARA gerar_hashes_senha()
+# -----------------------------
+@pytest.mark.parametrize("processos", [1, 2])
+def test_gerar_hashes_em_lote(app, processos):
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+    app.config["SENHA_PROCESSOS"] = processos
+    app.config["SENHA_LOTE_MINIMO_PARALELO"] = 2
+
+    senhas = [f"senha{i}" for i in range(6)]
+    hashes = gerar_hashes_senha(senhas)
+
+    assert len(hashes) == 6
+    assert all(h.startswith("pbkdf2:sha256:1000$") for h in hashes)
+    assert all(verificar_senha(s, h) for s, h in zip(senhas, hashes))
+
+
+# -----------------------------
+# TESTES PARA VerificadorSenhas
+# -----------------------------
+def test_verificador_recusa_acima_da_capacidade(app):
+    """Com todas as vagas ocupadas a verificação deve ser recusada imediatamente."""
+    app.config["LOGIN_VERIFICACAO_THREADS"] = 1
+    app.config["LOGIN_VERIFICACAO_FILA_MAXIMA"] = 1
+    verificador = VerificadorSenhas(app)
+
+    liberar = threading.Event()
+    ocupadas = [verificador.submete(liberar.wait) for _ in range(2)]
+
+    with pytest.raises(FilaVerificacaoCheia):
+        verificador.submete(liberar.wait)
+
+    # Aguarda a thread começar a executar a primeira tarefa
+    for _ in range(100):
+        if verificador.metricas()["em_execucao"] == 1:
+            break
+        time.sleep(0.01)
+
+    metricas = verificador.metricas()
+    assert metricas["em_execucao"] == 1
+    assert metricas["fila"] == 1
+    assert metricas["rejeitadas"] == 1
+
+    liberar.set()
+    for futuro in ocupadas:
+        futuro.result()
+
+    assert verificador.metricas()["verificacoes"] == 2
+
+
+def test_verificador_verifica_senha(app):
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+    verificador = VerificadorSenhas(app)
+    hash_senha = gerar_hash_senha("segredo")
+
+    assert verificador.verifica("segredo", hash_senha)
+    assert not verificador.verifica("errada", hash_senha)
+
+
+def test_verificador_dispensa_pool_em_worker_sync(app, monkeypatch):
+    """Em um worker sync (uma requisição por vez) a verificação não passa pelo pool."""
+    app.config["SENHA_METODO"] = "pbkdf2:sha256:1000"
+    verificador = VerificadorSenhas(app)
+    hash_senha = gerar_hash_senha("segredo")
+    monkeypatch.setattr(verificador, "obtem_executor", lambda: pytest.fail("usou o pool"))
+
+    with app.test_request_context(environ_overrides={"wsgi.multithread": False}):
+        assert verificador.verifica("segredo", hash_senha)
+
+    assert verificador.metricas()["verificacoes"] == 1
+    assert verificador.metricas()["fila"] == 0
@@ -0,0 +1,67 @@
+import json
+from datetime import date, time, datetime
+from types import SimpleNamespace
+from sqlalchemy import select
+from app import db
+from app.models import Consulta, StatusEnum, Usuario
+from app import serializacao
+from app.serializacao import Serializador, dumps
+
+
+def test_dumps_converte_tipos_do_banco(monkeypatch):
+    """date, time, datetime e Enum saem no mesmo formato com ou sem orjson."""
+    dados = {
+        "data": date(2024, 12, 31),
+        "hora": time(14, 30),
+        "registro": datetime(2024, 12, 31, 14, 30),
+        "status": StatusEnum.agendada,
+        "nome": "João"
+    }
+    esperado = {
+        "data": "2024-12-31",
+        "hora": "14:30:00",
+        "registro": "2024-12-31T14:30:00",
+        "status": "agendada",
+        "nome": "João"
+    }
+
+    assert json.loads(dumps(dados)) == esperado
+
+    monkeypatch.setattr(serializacao, "orjson", None)
+    assert json.loads(dumps(dados)) == esperado
+
+
+def test_serializador_le_atributos_aninhados():
+    serializa = Serializador({"id": "id", "nome": "usuario.nome"})
+    paciente = SimpleNamespace(id=1, usuario=SimpleNamespace(nome="Maria"))
+
+    assert serializa(paciente) == {"id": 1, "nome": "Maria"}
+    assert serializa.lista([paciente, paciente]) == [{"id": 1, "nome": "Maria"}] * 2
+
+
+def test_serializador_aceita_rows(app, paciente):
+    linhas = db.session.execute(select(Usuario.id, Usuario.nome).order_by(Usuario.id)).all()
+
+    assert Serializador({"id": "id", "nome": "nome"}).lista(linhas) == [{"id": paciente.id, "nome": "Maria da Silva"}]
+
+
+def test_consultas_serializa_status_pelo_valor(client, paciente, profissional, cabecalho_jwt):
+    """A listagem devolve o valor do enum, e não a sua representação em Python."""
+    db.session.add(Consulta(
+        paciente_id=paciente.id, profissional_id=profissional.id,
+        data=date(2030, 1, 7), hora=time(9, 0), tipo="online", status=StatusEnum.agendada
+    ))
+    db.session.commit()
+
+    resp = client.get("/consultas/", headers=cabecalho_jwt(paciente.id, "paciente"))
+
+    assert resp.status_code == 200
+    assert resp.json == [{
+        "id": 1,
+        "paciente_id": paciente.id,
+        "profissional_id": profissional.id,
+        "data": "2030-01-07",
+        "hora": "09:00:00",
+        "status": "agendada",
+        "tipo": "online"
+    }]
@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime, date, time
-from app import db
+from app import db, sessoes
 from app.models import Usuario, Paciente, Profissional, Consulta, Telemedicina, PerfilEnum, StatusEnum
 
 
@@ -165,3 +165,151 @@ def test_encerrar_sessao_inexistente(app):
     """Tenta encerrar sessão que não existe."""
     sessao = Telemedicina.query.filter_by(id=9999).first()
     assert sessao is None
+
+
+# ------------------------------------------------------------
+# ÍNDICE DE SESSÕES ATIVAS
+# ------------------------------------------------------------
+
+def test_fluxo_iniciar_entrar_encerrar(client, consulta, cabecalho_jwt, assert_max_queries):
+    """Entrar na sala usa o índice de sessões ativas, sem consultar o banco."""
+    profissional = cabecalho_jwt(consulta.profissional_id, "profissional")
+    paciente = cabecalho_jwt(consulta.paciente_id, "paciente")
+    consulta_id = consulta.id
+
+    url = client.post(f"/telemedicina/iniciar/{consulta_id}", headers=profissional).json["url_sala"]
+
+    # A sessão iniciada por este worker já está no índice
+    with assert_max_queries(0):
+        resp = client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente)
+
+    assert resp.status_code == 200
+    assert resp.json["url_sala"] == url
+
+    assert client.post(f"/telemedicina/encerrar/{consulta_id}", headers=profissional).status_code == 200
+    assert client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente).status_code == 404
+    assert client.post(f"/telemedicina/encerrar/{consulta_id}", headers=profissional).status_code == 404
+
+
+def test_entrar_sem_sessao_ou_sem_permissao(client, consulta, cabecalho_jwt):
+    paciente = cabecalho_jwt(consulta.paciente_id, "paciente")
+
+    assert client.get(f"/telemedicina/entrar/{consulta.id}", headers=paciente).status_code == 404
+
+    client.post(f"/telemedicina/iniciar/{consulta.id}", headers=cabecalho_jwt(consulta.profissional_id, "profissional"))
+
+    assert client.get(f"/telemedicina/entrar/{consulta.id}", headers=cabecalho_jwt(9999, "paciente")).status_code == 403
+    assert client.post(f"/telemedicina/encerrar/{consulta.id}", headers=cabecalho_jwt(9999, "profissional")).status_code == 403
+
+
+def test_entrar_em_sessao_iniciada_por_outro_worker(client, consulta, cabecalho_jwt, assert_max_queries, monkeypatch):
+    """Sem Redis, uma sessão ausente do índice local é procurada no banco."""
+    paciente = cabecalho_jwt(consulta.paciente_id, "paciente")
+    consulta_id = consulta.id
+
+    assert client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente).status_code == 404
+
+    # Outro worker inicia a sessão: este processo não recebe o registra()
+    db.session.add(Telemedicina(consulta_id=consulta_id, codigo_sala="sala-2", url_sala="https://example.com/sala-2"))
+    db.session.commit()
+
+    resp = client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente)
+    assert resp.status_code == 200
+    assert resp.json["url_sala"] == "https://example.com/sala-2"
+
+    with assert_max_queries(0):
+        assert client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente).status_code == 200
+
+    # Encerrada por outro worker: some deste índice quando a entrada expira
+    Telemedicina.query.filter_by(consulta_id=consulta_id).update({"ativa": False})
+    db.session.commit()
+    expirado = sessoes.time.monotonic() + 3600
+    monkeypatch.setattr(sessoes.time, "monotonic", lambda: expirado)
+
+    assert client.get(f"/telemedicina/entrar/{consulta_id}", headers=paciente).status_code == 404
+
+
+def test_ativas_carrega_sessoes_do_banco(client, consulta, token_administrador, cabecalho_jwt):
+    """Sessões abertas antes do índice existir (ex.: outro processo) são carregadas no primeiro uso."""
+    db.session.add(Telemedicina(consulta_id=consulta.id, codigo_sala="sala-1", url_sala="https://example.com/sala-1"))
+    db.session.commit()
+
+    resp = client.get("/telemedicina/ativas", headers=token_administrador)
+
+    assert resp.status_code == 200
+    assert resp.json["total"] == 1
+    assert resp.json["dados"][0]["codigo_sala"] == "sala-1"
+    assert client.get("/telemedicina/ativas", headers=cabecalho_jwt(consulta.paciente_id, "paciente")).status_code == 401
+    assert "vidaplus_telemedicina_sessoes_ativas 1" in client.get("/metrics").get_data(as_text=True)
+
+
+# ------------------------------------------------------------
+# EVENTOS (SSE)
+# ------------------------------------------------------------
+
+def abre_eventos(client, consulta_id, token):
+    return client.get(f"/telemedicina/eventos/{consulta_id}?jwt={token}", buffered=False)
+
+
+def test_eventos_avisam_inicio_e_fim_da_sessao(app, client, consulta, cabecalho_jwt):
+    profissional = cabecalho_jwt(consulta.profissional_id, "profissional")
+    token = cabecalho_jwt(consulta.paciente_id, "paciente")["Authorization"].split()[1]
+    consulta_id = consulta.id
+
+    resp = abre_eventos(client, consulta_id, token)
+    fluxo = iter(resp.response)
+
+    assert resp.mimetype == "text/event-stream"
+    assert '"ativa":false' in next(fluxo).decode()
+
+    client.post(f"/telemedicina/iniciar/{consulta_id}", headers=profissional)
+    assert next(fluxo).decode().startswith("event: iniciada\n")
+
+    client.post(f"/telemedicina/encerrar/{consulta_id}", headers=profissional)
+    assert next(fluxo).decode().startswith("event: encerrada\n")
+
+    # O fluxo termina depois do encerramento e libera a conexão
+    assert next(fluxo, None) is None
+    resp.close()
+    assert app.extensions["eventos"].metricas()["conexoes"] == 0
+
+
+def test_eventos_heartbeat(app, client, consulta, cabecalho_jwt):
+    app.config["EVENTOS_HEARTBEAT"] = 0.01
+    token = cabecalho_jwt(consulta.paciente_id, "paciente")["Authorization"].split()[1]
+
+    resp = abre_eventos(client, consulta.id, token)
+    fluxo = iter(resp.response)
+    next(fluxo)
+
+    assert next(fluxo) == b": heartbeat\n\n"
+    resp.close()
+
+
+def test_eventos_limite_de_conexoes_e_permissao(app, client, consulta, cabecalho_jwt):
+    app.extensions["eventos"].maximo_por_usuario = 1
+    token = cabecalho_jwt(consulta.paciente_id, "paciente")["Authorization"].split()[1]
+
+    primeira = abre_eventos(client, consulta.id, token)
+
+    assert abre_eventos(client, consulta.id, token).status_code == 429
+
+    primeira.close()
+
+    assert app.extensions["eventos"].metricas()["conexoes"] == 0
+
+    outro = cabecalho_jwt(9999, "paciente")["Authorization"].split()[1]
+
+    assert abre_eventos(client, consulta.id, outro).status_code == 403
+
+
+def test_eventos_recusados_com_varios_workers_sem_broker(client, consulta, cabecalho_jwt):
+    """Sem EVENTOS_URL os outros workers nunca avisariam o paciente: a conexão é recusada."""
+    token = cabecalho_jwt(consulta.paciente_id, "paciente")["Authorization"].split()[1]
+
+    resp = client.get(
+        f"/telemedicina/eventos/{consulta.id}?jwt={token}",
+        environ_overrides={"wsgi.multiprocess": True}
+    )
+
+    assert resp.status_code == 503
@@ -1,10 +1,15 @@
 import pytest
 from datetime import datetime
+from flask import g
+from app import db
 from app.utils import (
     converte_data,
     valida_perfil_usuario,
     valida_data_hora,
-    mensagem_criacao_sucesso
+    mensagem_criacao_sucesso,
+    requer_perfil,
+    usuario_atual,
+    cache_perfis
 )
 
 # -----------------------------
@@ -84,3 +89,55 @@ def test_mensagem_criacao_sucesso():
     assert status == 201
     assert resp["mensagem"] == "Paciente criado com sucesso."
     assert resp["dados"] == dados
+
+
+# -----------------------------
+# TESTES PARA requer_perfil() / usuario_atual()
+# -----------------------------
+@pytest.fixture
+def rota_protegida(app):
+    chamadas = []
+
+    @app.route("/teste/protegida")
+    @requer_perfil("paciente")
+    def protegida():
+        primeiro = usuario_atual()
+        assert usuario_atual() is primeiro  # carregado uma única vez na requisição
+        chamadas.append(g.usuario_id)
+        return {"nome": primeiro.nome if primeiro else None}
+
+    return chamadas
+
+
+def test_requer_perfil_permite_perfil_correto(client, cabecalho_jwt, paciente, rota_protegida):
+    resp = client.get("/teste/protegida", headers=cabecalho_jwt(paciente.id, "paciente"))
+
+    assert resp.status_code == 200
+    assert resp.get_json()["nome"] == "Maria da Silva"
+    assert rota_protegida == [paciente.id]
+
+
+def test_requer_perfil_nega_outro_perfil(client, cabecalho_jwt, paciente, rota_protegida):
+    resp = client.get("/teste/protegida", headers=cabecalho_jwt(paciente.id, "profissional"))
+
+    assert resp.status_code == 401
+    assert "Apenas pacientes" in resp.get_json()["message"]
+    assert rota_protegida == []
+
+
+def test_requer_perfil_com_cache_recusa_usuario_removido(app, client, cabecalho_jwt, paciente, rota_protegida):
+    app.config["PERFIL_CACHE_TTL"] = 60
+    cache_perfis.invalida()
+    cabecalho = cabecalho_jwt(paciente.id, "paciente")
+
+    assert client.get("/teste/protegida", headers=cabecalho).status_code == 200
+
+    db.session.delete(paciente)
+    db.session.delete(paciente.usuario)
+    db.session.commit()
+
+    # Ainda dentro do TTL o perfil vem do cache
+    assert client.get("/teste/protegida", headers=cabecalho).status_code == 200
+
+    cache_perfis.invalida(paciente.id)
+    assert client.get("/teste/protegida", headers=cabecalho).status_code == 401
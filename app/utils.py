@@ -1,4 +1,14 @@
-from datetime import datetime
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import Response, request, current_app, g
+from flask_restx import abort
+from flask_jwt_extended import jwt_required, get_jwt
+from werkzeug.http import http_date
+from app import db
+from app.models import Usuario
 
 def converte_data(data: str) -> datetime:
    data = datetime.strptime(data, "%d/%m/%Y")
@@ -18,6 +28,82 @@ def valida_perfil_usuario (identificacao, identificacao_perfil, tipo_perfil):
          if not identificacao or identificacao_perfil != tipo_perfil:
             return {"message": "Apenas profissionais podem acessar esta funcionalidade."}, 401
 
+class CachePerfis:
+   """Cache com TTL do perfil atual de cada usuário (None = usuário removido).
+
+   Evita consultar o banco a cada requisição só para saber se o usuário do
+   token ainda existe e mantém o mesmo perfil.
+   """
+
+   def __init__(self):
+      self.trava = threading.Lock()
+      self.perfis = {}
+
+   def obtem(self, usuario_id, ttl):
+      agora = time.monotonic()
+
+      with self.trava:
+         item = self.perfis.get(usuario_id)
+
+      if item and item[1] > agora:
+         return item[0]
+
+      perfil = db.session.execute(db.select(Usuario.perfil).where(Usuario.id == usuario_id)).scalar()
+      perfil = perfil.value if perfil else None
+
+      with self.trava:
+         self.perfis[usuario_id] = (perfil, agora + ttl)
+
+      return perfil
+
+   def invalida(self, usuario_id=None):
+      with self.trava:
+         if usuario_id is None:
+            self.perfis.clear()
+         else:
+            self.perfis.pop(usuario_id, None)
+
+cache_perfis = CachePerfis()
+
+def requer_perfil(tipo_perfil, locais=None):
+   """Exige um JWT do perfil informado e guarda a identificação em `g`.
+
+   Com PERFIL_CACHE_TTL > 0 também recusa tokens de usuários removidos ou que
+   mudaram de perfil, consultando o banco no máximo uma vez por TTL.
+   `locais` sobrescreve JWT_TOKEN_LOCATION (ex.: ["headers", "query_string"]
+   para o EventSource do navegador, que não envia cabeçalhos).
+   """
+   def decorador(funcao):
+      @wraps(funcao)
+      @jwt_required(locations=locais)
+      def envolvida(*args, **kwargs):
+         identificacao = get_jwt()
+         validacao = valida_perfil_usuario(identificacao, identificacao.get("perfil"), tipo_perfil)
+
+         if validacao:
+            return validacao
+
+         ttl = current_app.config["PERFIL_CACHE_TTL"]
+
+         if ttl > 0 and cache_perfis.obtem(identificacao["id"], ttl) != tipo_perfil:
+            return {"message": "Usuário inativo ou sem permissão."}, 401
+
+         g.identificacao = identificacao
+         g.usuario_id = identificacao["id"]
+
+         return funcao(*args, **kwargs)
+
+      return envolvida
+
+   return decorador
+
+def usuario_atual():
+   """Usuário da requisição, carregado do banco no máximo uma vez por requisição."""
+   if "usuario" not in g:
+      g.usuario = db.session.get(Usuario, g.usuario_id)
+
+   return g.usuario
+
 def valida_data_hora(data_hora_str):
    try:
        data_hora = datetime.fromisoformat(data_hora_str)
@@ -29,4 +115,117 @@ def mensagem_criacao_sucesso(entidade, dados):
    return {
        "mensagem": f"{entidade} criado com sucesso.",
        "dados": dados
-   }, 201
\ No newline at end of file
+   }, 201
+
+def parametros_paginacao_limite():
+   """Lê o parâmetro `limit` da query string (para cursores que não são um id)."""
+   try:
+      limite = int(request.args.get("limit", current_app.config["PAGINACAO_LIMITE_PADRAO"]))
+   except ValueError:
+      abort(400, "Parâmetros de paginação inválidos.")
+
+   if limite < 1:
+      abort(400, "O parâmetro limit deve ser maior que zero.")
+
+   return min(limite, current_app.config["PAGINACAO_LIMITE_MAXIMO"])
+
+def parametros_paginacao():
+   """Lê os parâmetros `limit` e `after` da query string."""
+   limite = parametros_paginacao_limite()
+
+   try:
+      after = request.args.get("after")
+      after = int(after) if after not in (None, "") else None
+   except ValueError:
+      abort(400, "Parâmetros de paginação inválidos.")
+
+   return limite, after
+
+def pagina_keyset(consulta, coluna_id, limite, after=None):
+   """Retorna uma página ordenada por id e o cursor da próxima página.
+
+   Busca `limite + 1` linhas para saber se existe próxima página sem
+   precisar de um COUNT na tabela inteira.
+   """
+   if after is not None:
+      consulta = consulta.filter(coluna_id > after)
+
+   itens = consulta.order_by(coluna_id).limit(limite + 1).all()
+   proximo_cursor = None
+
+   if len(itens) > limite:
+      itens = itens[:limite]
+      proximo_cursor = itens[-1].id
+
+   return itens, proximo_cursor
+
+def resposta_paginada(dados, proximo_cursor):
+   return {
+       "dados": dados,
+       "next_cursor": proximo_cursor
+   }, 200
+
+def versao_registros(modelo, *filtros):
+   """Total de linhas e MAX(atualizado_em) do modelo, sem carregar as linhas.
+
+   Nos perfis (paciente/profissional) também considera o usuário, já que
+   nome e e-mail fazem parte da resposta.
+   """
+   consulta = db.select(db.func.count(modelo.id), db.func.max(modelo.atualizado_em)).select_from(modelo)
+
+   if modelo is not Usuario and hasattr(modelo, "usuario"):
+      consulta = consulta.join(Usuario, Usuario.id == modelo.id).add_columns(db.func.max(Usuario.atualizado_em))
+
+   return tuple(db.session.execute(consulta.where(*filtros)).one())
+
+def nao_modificado(etag, ultima_modificacao):
+   if request.if_none_match:
+      return request.if_none_match.contains_weak(etag)
+
+   if request.if_modified_since and ultima_modificacao:
+      return ultima_modificacao.replace(microsecond=0) <= request.if_modified_since
+
+   return False
+
+def condicional(versao, entidade=False):
+   """GET condicional: responde 304 sem executar a rota se o cliente já tem a versão atual.
+
+   `versao(**kwargs)` recebe os argumentos da URL da rota e retorna
+   valores baratos de obter (ex.: `versao_registros`) que mudam sempre que a
+   resposta muda. O ETag é um hash desses valores e da URL com a query string.
+
+   Last-Modified/If-Modified-Since só valem em rotas de uma única entidade
+   (`entidade=True`): numa listagem, exclusões e alterações no mesmo segundo
+   não mudam o MAX(atualizado_em) e a data sozinha daria um 304 desatualizado.
+   """
+   def decorador(funcao):
+      @wraps(funcao)
+      def envolvida(*args, **kwargs):
+         valores = versao(**kwargs)
+         etag = hashlib.sha1(f"{request.full_path}|{valores!r}".encode()).hexdigest()
+         datas = [v for v in valores if isinstance(v, datetime)] if entidade else []
+         ultima_modificacao = max(datas).replace(tzinfo=timezone.utc) if datas else None
+
+         cabecalhos = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+
+         if ultima_modificacao:
+            cabecalhos["Last-Modified"] = http_date(ultima_modificacao)
+
+         if nao_modificado(etag, ultima_modificacao):
+            return Response(status=304, headers=cabecalhos)
+
+         resposta = funcao(*args, **kwargs)
+
+         if not isinstance(resposta, tuple):
+            resposta = (resposta, 200)
+
+         dados, codigo, *extras = resposta
+
+         if codigo != 200:
+            return resposta
+
+         return dados, codigo, {**(extras[0] if extras else {}), **cabecalhos}
+
+      return envolvida
+
+   return decorador
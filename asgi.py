@@ -0,0 +1,5 @@
+from app import create_app
+from app.asgi import AdaptadorAsgi
+
+# Modo ASGI: uvicorn asgi:app --workers 4
+app = AdaptadorAsgi(create_app())
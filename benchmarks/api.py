@@ -0,0 +1,346 @@
+"""Benchmark de carga da API: latência, vazão e queries por requisição.
+
+Uso: python -m benchmarks.api [--banco sqlite:///benchmark.db] [--escala 1.0]
+         [--clientes 16] [--requisicoes 2000] [--url http://127.0.0.1:8000]
+         [--cenarios consultas,admin_pacientes] [--saida relatorio.json]
+         [--compara relatorio_anterior.json]
+
+Na primeira execução cria as tabelas e popula o banco com volumes realistas
+(escala 1.0 = 100 mil pacientes, 1 milhão de consultas e 5 milhões de logs de
+auditoria) com o gerador de dados sintéticos (app/services/geracao.py); as execuções seguintes reutilizam os
+dados. Depois dispara `--requisicoes` requisições por cenário com `--clientes`
+clientes simultâneos e grava p50/p95/p99, requisições por segundo e a média de
+statements SQL por requisição (lida do /metrics) em um relatório JSON, que pode
+ser comparado entre commits com --compara.
+
+Sem --url a aplicação roda neste processo, em um servidor werkzeug com threads
+(clientes e servidor disputam o GIL; use os números para comparar commits).
+Com --url o alvo é um servidor já em execução sobre o mesmo banco, com o mesmo
+JWT_SECRET_KEY; use um único worker, pois cada processo expõe o seu /metrics.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import math
+import random
+import re
+import subprocess
+import threading
+import time as relogio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+from app import create_app, db
+from app.models import (
+    Administrador, Consulta, LogAuditoria, Paciente, Profissional, Prontuario, Telemedicina, Usuario
+)
+from app.services.geracao import gera_dados
+
+VOLUMES = {"pacientes": 100_000, "consultas": 1_000_000, "logs": 5_000_000}
+SENHA = "benchmark123"
+
+def popula(escala, semente):
+    pacientes = max(1, int(VOLUMES["pacientes"] * escala))
+    resultados = gera_dados(
+        pacientes=pacientes,
+        profissionais=max(1, pacientes // 100),
+        consultas=max(1, int(VOLUMES["consultas"] * escala)),
+        logs=max(1, int(VOLUMES["logs"] * escala)),
+        administradores=10,
+        sessoes_ativas=500,
+        semente=semente,
+        senha=SENHA
+    )
+
+    for tabela, total, duracao in resultados:
+        print(f"  {tabela:<22} {total:>10} linhas   {total / max(duracao, 1e-9):>10,.0f} linhas/s")
+
+def volumes():
+    return {
+        modelo.__tablename__: db.session.scalar(select(func.count()).select_from(modelo))
+        for modelo in (Usuario, Paciente, Profissional, Consulta, Prontuario, Telemedicina, LogAuditoria)
+    }
+
+def amostras():
+    """Ids usados para montar as requisições de cada cenário."""
+    def linhas(consulta):
+        return [tuple(linha) for linha in db.session.execute(consulta.limit(1000))]
+
+    return {
+        "administradores": db.session.scalars(select(Administrador.id).limit(1000)).all(),
+        "pacientes": db.session.scalars(select(Paciente.id).order_by(Paciente.id).limit(1000)).all(),
+        "emails": db.session.scalars(
+            select(Usuario.email).join(Paciente, Paciente.id == Usuario.id).order_by(Paciente.id).limit(1000)
+        ).all(),
+        "ultimo_paciente": db.session.scalar(select(func.max(Paciente.id))),
+        "consultas": db.session.scalar(select(func.max(Consulta.id))),
+        "prontuarios": linhas(
+            select(Consulta.id, Consulta.paciente_id, Consulta.profissional_id)
+            .join(Prontuario, Prontuario.consulta_id == Consulta.id).order_by(Prontuario.id)
+        ),
+        "sessoes": linhas(
+            select(Consulta.id, Consulta.paciente_id)
+            .join(Telemedicina, Telemedicina.consulta_id == Consulta.id).where(Telemedicina.ativa.is_(True))
+        )
+    }
+
+def monta_cenarios(dados, requisicoes):
+    """Cada cenário: (método, rota do Flask, total de requisições, função rnd -> (caminho, perfil, id, corpo))."""
+    admin = lambda rnd: rnd.choice(dados["administradores"])
+    paciente = lambda rnd: rnd.randrange(dados["pacientes"][0], dados["ultimo_paciente"] + 1)
+    prontuario = lambda rnd: rnd.choice(dados["prontuarios"])
+    sessao = lambda rnd: rnd.choice(dados["sessoes"])
+
+    def login(rnd):
+        return "/auth/login", None, None, {"email": rnd.choice(dados["emails"]), "senha": SENHA}
+
+    def lista(caminho, maximo):
+        return lambda rnd: (f"{caminho}?limit=50&after={rnd.randrange(maximo)}", "administrador", admin(rnd), None)
+
+    def prontuario_profissional(rnd):
+        consulta_id, _, profissional_id = prontuario(rnd)
+        return f"/prontuarios/{consulta_id}", "profissional", profissional_id, None
+
+    def prontuario_paciente(rnd):
+        consulta_id, paciente_id, _ = prontuario(rnd)
+        return f"/prontuarios/paciente/{consulta_id}", "paciente", paciente_id, None
+
+    def entrar(rnd):
+        consulta_id, paciente_id = sessao(rnd)
+        return f"/telemedicina/entrar/{consulta_id}", "paciente", paciente_id, None
+
+    cenarios = {
+        # A verificação de senha é propositalmente cara; menos requisições
+        "login": ("POST", "/auth/login", max(1, requisicoes // 10), login),
+        "consultas": ("GET", "/consultas/", requisicoes, lambda rnd: ("/consultas/", "paciente", paciente(rnd), None)),
+        "admin_pacientes": ("GET", "/administracao/lista_pacientes", requisicoes, lista("/administracao/lista_pacientes", dados["ultimo_paciente"])),
+        "admin_paciente": ("GET", "/administracao/lista_pacientes/<int:id>", requisicoes, lambda rnd: (f"/administracao/lista_pacientes/{paciente(rnd)}", "administrador", admin(rnd), None)),
+        "admin_profissionais": ("GET", "/administracao/lista_profissionais", requisicoes, lista("/administracao/lista_profissionais", dados["pacientes"][0])),
+        "admin_administradores": ("GET", "/administracao/lista_administradores", requisicoes, lista("/administracao/lista_administradores", 1)),
+        "admin_consultas": ("GET", "/administracao/lista_consultas", requisicoes, lista("/administracao/lista_consultas", dados["consultas"])),
+        "admin_auditoria": ("GET", "/administracao/auditoria", requisicoes, lambda rnd: (f"/administracao/auditoria?usuario_id={paciente(rnd)}", "administrador", admin(rnd), None)),
+        "prontuarios_profissional": ("GET", "/prontuarios/<int:id>", requisicoes, prontuario_profissional),
+        "prontuarios_paciente": ("GET", "/prontuarios/paciente/<int:consulta_id>", requisicoes, prontuario_paciente),
+        "telemedicina_entrar": ("GET", "/telemedicina/entrar/<int:consulta_id>", requisicoes, entrar),
+        "telemedicina_ativas": ("GET", "/telemedicina/ativas", requisicoes, lambda rnd: ("/telemedicina/ativas", "administrador", admin(rnd), None))
+    }
+
+    if not dados["sessoes"]:
+        del cenarios["telemedicina_entrar"]
+
+    return cenarios
+
+class Tokens:
+    """Gera (e guarda) os tokens JWT dos usuários sorteados."""
+
+    def __init__(self, app):
+        self.app = app
+        self.trava = threading.Lock()
+        self.tokens = {}
+
+    def obtem(self, usuario_id, perfil):
+        with self.trava:
+            if usuario_id not in self.tokens:
+                with self.app.app_context():
+                    self.tokens[usuario_id] = create_access_token(
+                        identity=str(usuario_id), additional_claims={"id": usuario_id, "perfil": perfil}
+                    )
+
+            return self.tokens[usuario_id]
+
+def requisicao(host, porta, metodo, caminho, cabecalhos=None, corpo=None):
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+
+    try:
+        conexao.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+        resposta = conexao.getresponse()
+        return resposta.status, resposta.read()
+    finally:
+        conexao.close()
+
+def queries_por_rota(host, porta):
+    """Lê do /metrics a soma e a contagem do histograma de queries por (método, rota)."""
+    _, corpo = requisicao(host, porta, "GET", "/metrics")
+    valores = {}
+
+    for linha in corpo.decode().splitlines():
+        encontrado = re.match(r'vidaplus_requisicao_queries_(sum|count)\{(.*)\} (\S+)$', linha)
+
+        if encontrado:
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', encontrado.group(2)))
+            chave = (labels["metodo"], labels["rota"])
+            valores.setdefault(chave, {})[encontrado.group(1)] = float(encontrado.group(3))
+
+    return valores
+
+def percentil(ordenados, p):
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+def executa_cenario(host, porta, tokens, cenario, clientes, semente):
+    metodo, rota, total, monta = cenario
+    contador = itertools.count()
+    trava = threading.Lock()
+    tempos = []
+    status = {}
+
+    def cliente(n):
+        rnd = random.Random(semente * 1000 + n)
+
+        while next(contador) < total:
+            caminho, perfil, usuario_id, corpo = monta(rnd)
+            cabecalhos = {"Content-Type": "application/json"} if corpo is not None else {}
+
+            if perfil:
+                cabecalhos["Authorization"] = f"Bearer {tokens.obtem(usuario_id, perfil)}"
+
+            inicio = relogio.perf_counter()
+
+            try:
+                codigo, _ = requisicao(host, porta, metodo, caminho, cabecalhos, json.dumps(corpo) if corpo is not None else None)
+            except OSError:
+                codigo = "erro"
+
+            duracao = relogio.perf_counter() - inicio
+
+            with trava:
+                tempos.append(duracao)
+                status[str(codigo)] = status.get(str(codigo), 0) + 1
+
+    antes = queries_por_rota(host, porta).get((metodo, rota), {})
+    inicio = relogio.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        list(executor.map(cliente, range(clientes)))
+
+    duracao = relogio.perf_counter() - inicio
+    depois = queries_por_rota(host, porta).get((metodo, rota), {})
+    medidas = depois.get("count", 0) - antes.get("count", 0)
+    tempos.sort()
+
+    return {
+        "metodo": metodo,
+        "rota": rota,
+        "requisicoes": len(tempos),
+        "status": status,
+        "rps": round(len(tempos) / duracao, 1),
+        "latencia_ms": {
+            "p50": round(percentil(tempos, 50) * 1000, 2),
+            "p95": round(percentil(tempos, 95) * 1000, 2),
+            "p99": round(percentil(tempos, 99) * 1000, 2),
+            "max": round(tempos[-1] * 1000, 2)
+        },
+        "queries_por_requisicao": round((depois.get("sum", 0) - antes.get("sum", 0)) / medidas, 2) if medidas else None
+    }
+
+def inicia_servidor(app):
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name="benchmark-servidor", daemon=True).start()
+    return servidor
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compara(atual, anterior):
+    print(f"\n{'comparação com ' + (anterior.get('commit') or 'relatório anterior'):<32}{'p95 ms':>20}{'rps':>20}{'queries':>16}")
+
+    for nome, medida in atual["cenarios"].items():
+        base = anterior["cenarios"].get(nome)
+
+        if base is None:
+            continue
+
+        def variacao(novo, velho):
+            if not velho or novo is None:
+                return f"{novo}"
+            return f"{novo} ({(novo - velho) / velho:+.0%})"
+
+        print(
+            f"{nome:<32}{variacao(medida['latencia_ms']['p95'], base['latencia_ms']['p95']):>20}"
+            f"{variacao(medida['rps'], base['rps']):>20}"
+            f"{variacao(medida['queries_por_requisicao'], base['queries_por_requisicao']):>16}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--banco", default="sqlite:///benchmark.db", help="URI do banco populado e usado pela aplicação.")
+    parser.add_argument("--escala", type=float, default=1.0, help="Fração dos volumes padrão (0.01 = mil pacientes).")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições por cenário.")
+    parser.add_argument("--cenarios", help="Lista separada por vírgulas (padrão: todos).")
+    parser.add_argument("--url", help="Servidor já em execução; sem ele a aplicação roda neste processo.")
+    parser.add_argument("--saida", default="benchmark_api.json")
+    parser.add_argument("--compara", help="Relatório anterior para comparar.")
+    args = parser.parse_args()
+
+    app = create_app(config={"SQLALCHEMY_DATABASE_URI": args.banco})
+
+    with app.app_context():
+        db.create_all()
+
+        if not db.session.scalar(select(func.count()).select_from(Usuario)):
+            print(f"Populando {args.banco} (escala {args.escala}):")
+            popula(args.escala, args.semente)
+
+        contagens = volumes()
+        dados = amostras()
+        dialeto = db.engine.dialect.name
+
+    cenarios = monta_cenarios(dados, args.requisicoes)
+
+    if args.cenarios:
+        cenarios = {nome: cenarios[nome] for nome in args.cenarios.split(",")}
+
+    if args.url:
+        url = urlsplit(args.url)
+        host, porta, servidor = url.hostname, url.port or 80, None
+    else:
+        servidor = inicia_servidor(app)
+        host, porta = "127.0.0.1", servidor.server_port
+
+    tokens = Tokens(app)
+    relatorio = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "banco": dialeto,
+        "volumes": contagens,
+        "clientes": args.clientes,
+        "cenarios": {}
+    }
+
+    print(f"\n{'cenário':<28}{'req':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}  status")
+
+    for nome, cenario in cenarios.items():
+        medida = executa_cenario(host, porta, tokens, cenario, args.clientes, args.semente)
+        relatorio["cenarios"][nome] = medida
+        latencia = medida["latencia_ms"]
+        print(
+            f"{nome:<28}{medida['requisicoes']:>7}{medida['rps']:>9}{latencia['p50']:>9}{latencia['p95']:>9}"
+            f"{latencia['p99']:>9}{medida['queries_por_requisicao'] if medida['queries_por_requisicao'] is not None else '-':>9}"
+            f"  {medida['status']}"
+        )
+
+    if servidor is not None:
+        servidor.shutdown()
+
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+
+    print(f"\nRelatório gravado em {args.saida}")
+
+    if args.compara:
+        with open(args.compara, encoding="utf-8") as arquivo:
+            compara(relatorio, json.load(arquivo))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compara tamanho gravado e latência de leitura das colunas de texto clínico comprimidas.
+
+Uso: python -m benchmarks.compressao [--linhas 5000] [--repeticoes 5]
+
+Gera anotações sintéticas de tamanhos variados e, para cada formato (texto
+puro, zlib e zstd quando o pacote zstandard estiver instalado), mede os bytes
+gravados e o tempo para ler todas as linhas de uma tabela SQLite em memória
+já convertidas para texto pelo TextoComprimido. As frases se repetem mais
+do que em anotações reais, então a taxa de compressão aqui é otimista.
+"""
+import argparse
+import random
+import time as relogio
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, Table, create_engine, insert, select
+from app.compressao import TextoComprimido, comprime, zstandard
+
+FRASES = [
+    "Paciente relata cefaleia frontal há três dias, sem febre.",
+    "Nega alergias medicamentosas conhecidas.",
+    "Pressão arterial 130x85 mmHg, frequência cardíaca 78 bpm.",
+    "Ausculta pulmonar com murmúrio vesicular presente, sem ruídos adventícios.",
+    "Em uso de losartana 50 mg uma vez ao dia.",
+    "Orientado retorno em 30 dias com exames laboratoriais.",
+    "Solicitados hemograma completo, glicemia de jejum e perfil lipídico.",
+    "Refere melhora parcial dos sintomas após início do tratamento.",
+    "Abdome flácido, indolor à palpação, sem visceromegalias.",
+    "Prescrita dipirona 500 mg de 6 em 6 horas se dor ou febre."
+]
+
+def gera_anotacoes(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    return [
+        " ".join(aleatorio.choice(FRASES) for _ in range(aleatorio.randint(3, 60)))
+        for _ in range(quantidade)
+    ]
+
+def mede_leitura(valores, repeticoes):
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    gravacao = Table("prontuarios", metadata, Column("id", Integer, primary_key=True), Column("anotacoes", LargeBinary))
+    leitura = Table("prontuarios", MetaData(), Column("id", Integer, primary_key=True), Column("anotacoes", TextoComprimido))
+    metadata.create_all(engine)
+
+    with engine.begin() as conexao:
+        conexao.execute(insert(gravacao), [{"id": i, "anotacoes": v} for i, v in enumerate(valores)])
+
+    melhor = float("inf")
+
+    with engine.connect() as conexao:
+        for _ in range(repeticoes):
+            inicio = relogio.perf_counter()
+            conexao.execute(select(leitura.c.anotacoes)).scalars().all()
+            melhor = min(melhor, relogio.perf_counter() - inicio)
+
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    anotacoes = gera_anotacoes(args.linhas)
+    formatos = {"texto puro": lambda t: t.encode("utf-8"), "zlib": lambda t: comprime(t, "zlib")}
+
+    if zstandard is not None:
+        formatos["zstd"] = lambda t: comprime(t, "zstd")
+
+    original = sum(len(t.encode("utf-8")) for t in anotacoes)
+
+    for nome, converte in formatos.items():
+        valores = [converte(t) for t in anotacoes]
+        tamanho = sum(len(v) for v in valores)
+        leitura = mede_leitura(valores, args.repeticoes)
+
+        print(
+            f"{nome:<12} {tamanho / 1024:>10,.0f} KiB ({tamanho / original:>5.1%})"
+            f" {leitura * 1e6 / args.linhas:>8.1f} µs/linha na leitura"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Teste de carga: quantos pacientes em espera (SSE) um servidor sustenta.
+
+Uso: python -m benchmarks.concorrencia --url http://127.0.0.1:8000 \\
+         --consulta-id 1 --paciente-id 1 --admin-id 1 [--conexoes 1000]
+
+Abre `--conexoes` fluxos GET /telemedicina/eventos/<consulta_id> ao mesmo
+tempo, conta quantos recebem o primeiro evento dentro de `--timeout` e, com
+eles abertos, mede a latência de GET /telemedicina/ativas. Rode contra os dois
+modos de implantação, com o mesmo banco e as mesmas variáveis de ambiente
+(os tokens são assinados com o JWT_SECRET_KEY local):
+
+    gunicorn -w 4 run:app                          (WSGI, workers síncronos)
+    uvicorn asgi:app --workers 4                   (ASGI)
+
+No servidor, aumente EVENTOS_MAXIMO_POR_USUARIO (todas as conexões são do
+mesmo paciente) e EVENTOS_MAXIMO_CONEXOES, e configure EVENTOS_URL: com mais de
+um worker a rota de eventos exige o broker.
+"""
+import argparse
+import asyncio
+import statistics
+import time as relogio
+from urllib.parse import urlsplit
+from flask_jwt_extended import create_access_token
+from app import create_app
+
+def gera_token(app, usuario_id, perfil):
+    with app.app_context():
+        return create_access_token(identity=str(usuario_id), additional_claims={"id": usuario_id, "perfil": perfil})
+
+async def requisicao(host, porta, caminho, token=None):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    cabecalhos = f"GET {caminho} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+
+    if token:
+        cabecalhos += f"Authorization: Bearer {token}\r\n"
+
+    escritor.write((cabecalhos + "\r\n").encode())
+    await escritor.drain()
+    return leitor, escritor
+
+async def espera_primeiro_evento(host, porta, caminho, timeout, abertas):
+    escritor = None
+
+    try:
+        leitor, escritor = await asyncio.wait_for(requisicao(host, porta, caminho), timeout)
+        status = await asyncio.wait_for(leitor.readline(), timeout)
+
+        if b" 200 " not in status:
+            return False
+
+        await asyncio.wait_for(leitor.readuntil(b"event: estado"), timeout)
+        abertas.append(escritor)
+        return True
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        if escritor is not None:
+            escritor.close()
+        return False
+
+async def mede_latencia(host, porta, caminho, token, quantidade):
+    tempos = []
+
+    for _ in range(quantidade):
+        inicio = relogio.perf_counter()
+
+        try:
+            leitor, escritor = await asyncio.wait_for(requisicao(host, porta, caminho, token), 30)
+            await asyncio.wait_for(leitor.read(), 30)
+            escritor.close()
+        except (OSError, asyncio.TimeoutError):
+            continue
+
+        tempos.append(relogio.perf_counter() - inicio)
+
+    return tempos
+
+async def executa(args, token_paciente, token_admin):
+    url = urlsplit(args.url)
+    host, porta = url.hostname, url.port or 80
+    caminho = f"/telemedicina/eventos/{args.consulta_id}?jwt={token_paciente}"
+    abertas = []
+
+    inicio = relogio.perf_counter()
+    resultados = await asyncio.gather(*[
+        espera_primeiro_evento(host, porta, caminho, args.timeout, abertas) for _ in range(args.conexoes)
+    ])
+    duracao = relogio.perf_counter() - inicio
+
+    tempos = await mede_latencia(host, porta, "/telemedicina/ativas", token_admin, args.requisicoes)
+
+    for escritor in abertas:
+        escritor.close()
+
+    return sum(resultados), duracao, tempos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--consulta-id", type=int, required=True)
+    parser.add_argument("--paciente-id", type=int, required=True)
+    parser.add_argument("--admin-id", type=int, required=True)
+    parser.add_argument("--conexoes", type=int, default=1000)
+    parser.add_argument("--requisicoes", type=int, default=20, help="Requisições comuns medidas com os fluxos abertos.")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    token_paciente = gera_token(app, args.paciente_id, "paciente")
+    token_admin = gera_token(app, args.admin_id, "administrador")
+
+    abertas, duracao, tempos = asyncio.run(executa(args, token_paciente, token_admin))
+
+    print(f"fluxos SSE abertos         {abertas:>8} de {args.conexoes} ({duracao:.1f} s)")
+
+    if tempos:
+        tempos.sort()
+        print(f"GET /telemedicina/ativas   p50 {statistics.median(tempos) * 1000:>8.1f} ms"
+              f"   máx {tempos[-1] * 1000:>8.1f} ms   ({len(tempos)}/{args.requisicoes} respondidas)")
+    else:
+        print(f"GET /telemedicina/ativas   nenhuma das {args.requisicoes} requisições respondeu")
+
+if __name__ == "__main__":
+    main()
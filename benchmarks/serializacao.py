@@ -0,0 +1,79 @@
+"""Compara a serialização das listagens antes e depois do encoder rápido.
+
+Uso: python -m benchmarks.serializacao [--linhas 10000] [--repeticoes 5]
+
+Mede linhas/segundo para montar e codificar em JSON uma listagem de
+consultas e de pacientes, com objetos do ORM (transientes, sem banco).
+"""
+import argparse
+import json
+import time as relogio
+from datetime import date, time, timedelta
+from flask_restx import marshal
+from app.models import Consulta, Paciente, Usuario, StatusEnum
+from app.routes.consultas import consulta_output, serializa_consulta
+from app.routes.administracao import serializa_paciente
+from app.serializacao import dumps
+
+def paciente_antigo(paciente):
+    return {
+        "id": paciente.id,
+        "nome": paciente.usuario.nome,
+        "email": paciente.usuario.email,
+        "cpf": paciente.cpf,
+        "data_nascimento": paciente.data_nascimento.strftime("%Y-%m-%d"),
+        "endereco": paciente.endereco,
+        "telefone": paciente.telefone
+    }
+
+def gera_consultas(quantidade):
+    return [
+        Consulta(
+            id=i, paciente_id=i, profissional_id=i % 100,
+            data=date(2025, 1, 1) + timedelta(days=i % 365), hora=time(8 + i % 10, 0),
+            status=StatusEnum.agendada, tipo="presencial"
+        )
+        for i in range(quantidade)
+    ]
+
+def gera_pacientes(quantidade):
+    return [
+        Paciente(
+            id=i, usuario=Usuario(id=i, nome=f"Paciente {i}", email=f"paciente{i}@example.com"),
+            cpf=f"{i:011d}", data_nascimento=date(1980, 1, 1) + timedelta(days=i % 10000),
+            endereco="Rua Teste, 123", telefone="11999999999"
+        )
+        for i in range(quantidade)
+    ]
+
+def mede(funcao, linhas, repeticoes):
+    melhor = float("inf")
+
+    for _ in range(repeticoes):
+        inicio = relogio.perf_counter()
+        funcao()
+        melhor = min(melhor, relogio.perf_counter() - inicio)
+
+    return linhas / melhor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    consultas = gera_consultas(args.linhas)
+    pacientes = gera_pacientes(args.linhas)
+
+    cenarios = {
+        "consultas: marshal + json": lambda: json.dumps(marshal(consultas, consulta_output)),
+        "consultas: Serializador + dumps": lambda: dumps(serializa_consulta.lista(consultas)),
+        "pacientes: dict/strftime + json": lambda: json.dumps([paciente_antigo(p) for p in pacientes]),
+        "pacientes: Serializador + dumps": lambda: dumps(serializa_paciente.lista(pacientes))
+    }
+
+    for nome, funcao in cenarios.items():
+        print(f"{nome:<35} {mede(funcao, args.linhas, args.repeticoes):>12,.0f} linhas/s")
+
+if __name__ == "__main__":
+    main()
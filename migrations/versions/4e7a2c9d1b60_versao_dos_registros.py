@@ -0,0 +1,44 @@
+"""Coluna atualizado_em para ETag/Last-Modified
+
+Revision ID: 4e7a2c9d1b60
+Revises: 9c1d4a7e3b52
+Create Date: 2026-10-18 14:20:11.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a2c9d1b60'
+down_revision = '9c1d4a7e3b52'
+branch_labels = None
+depends_on = None
+
+TABELAS = ('usuarios', 'pacientes', 'profissionais', 'consultas')
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+
+    # As linhas existentes recebem o momento da migração como versão inicial.
+    # No MySQL o default precisa ter a mesma precisão da coluna; o SQLite não
+    # aceita ADD COLUMN com CURRENT_TIMESTAMP, então a tabela é recriada.
+    padrao = sa.text('CURRENT_TIMESTAMP(6)') if dialeto == 'mysql' else sa.func.now()
+    recriar = 'always' if dialeto == 'sqlite' else 'auto'
+
+    for tabela in TABELAS:
+        with op.batch_alter_table(tabela, schema=None, recreate=recriar) as batch_op:
+            batch_op.add_column(sa.Column(
+                'atualizado_em',
+                sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+                server_default=padrao,
+                nullable=False
+            ))
+
+
+def downgrade():
+    for tabela in reversed(TABELAS):
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.drop_column('atualizado_em')
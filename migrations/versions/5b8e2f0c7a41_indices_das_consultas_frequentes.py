@@ -0,0 +1,39 @@
+"""Indices das consultas frequentes
+
+Revision ID: 5b8e2f0c7a41
+Revises: 143261191270
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f0c7a41'
+down_revision = '143261191270'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Consultas do paciente / agenda do profissional, já na ordem de data e hora
+    op.create_index('ix_consultas_paciente_data_hora', 'consultas', ['paciente_id', 'data', 'hora'], unique=False)
+    op.create_index('ix_consultas_profissional_data_hora', 'consultas', ['profissional_id', 'data', 'hora'], unique=False)
+
+    # consulta.prontuario e consulta.telemedicina
+    op.create_index('ix_prontuarios_consulta_id', 'prontuarios', ['consulta_id'], unique=False)
+    op.create_index('ix_telemedicinas_consulta_ativa', 'telemedicinas', ['consulta_id', 'ativa'], unique=False)
+
+    # Auditoria por usuário e por período
+    op.create_index('ix_logs_auditoria_usuario_data_hora', 'logs_auditoria', ['usuario_id', 'data_hora'], unique=False)
+    op.create_index('ix_logs_auditoria_data_hora', 'logs_auditoria', ['data_hora'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_logs_auditoria_data_hora', table_name='logs_auditoria')
+    op.drop_index('ix_logs_auditoria_usuario_data_hora', table_name='logs_auditoria')
+    op.drop_index('ix_telemedicinas_consulta_ativa', table_name='telemedicinas')
+    op.drop_index('ix_prontuarios_consulta_id', table_name='prontuarios')
+    op.drop_index('ix_consultas_profissional_data_hora', table_name='consultas')
+    op.drop_index('ix_consultas_paciente_data_hora', table_name='consultas')
@@ -0,0 +1,38 @@
+"""Índice de busca textual dos prontuários
+
+Revision ID: 7f3b9e2a6c14
+Revises: 4e7a2c9d1b60
+Create Date: 2026-10-18 15:41:05.118270
+
+Depois de aplicar, popule o índice dos prontuários existentes com:
+    flask manutencao reindexa-prontuarios
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3b9e2a6c14'
+down_revision = '4e7a2c9d1b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('termos_prontuarios',
+        sa.Column('termo', sa.String(length=64), nullable=False),
+        sa.Column('prontuario_id', sa.Integer(), nullable=False),
+        sa.Column('paciente_id', sa.Integer(), nullable=False),
+        sa.Column('frequencia', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['paciente_id'], ['pacientes.id'], ),
+        sa.ForeignKeyConstraint(['prontuario_id'], ['prontuarios.id'], ),
+        sa.PrimaryKeyConstraint('termo', 'prontuario_id')
+    )
+    op.create_index('ix_termos_prontuarios_termo_paciente', 'termos_prontuarios', ['termo', 'paciente_id'], unique=False)
+    op.create_index('ix_termos_prontuarios_prontuario_id', 'termos_prontuarios', ['prontuario_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_termos_prontuarios_prontuario_id', table_name='termos_prontuarios')
+    op.drop_index('ix_termos_prontuarios_termo_paciente', table_name='termos_prontuarios')
+    op.drop_table('termos_prontuarios')
@@ -0,0 +1,48 @@
+"""Agenda dos profissionais
+
+Revision ID: 9c1d4a7e3b52
+Revises: 5b8e2f0c7a41
+Create Date: 2026-10-18 11:02:47.918334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d4a7e3b52'
+down_revision = '5b8e2f0c7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('agendas_profissionais',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('profissional_id', sa.Integer(), nullable=False),
+        sa.Column('dia_semana', sa.Integer(), nullable=False),
+        sa.Column('hora_inicio', sa.Time(), nullable=False),
+        sa.Column('hora_fim', sa.Time(), nullable=False),
+        sa.Column('duracao_minutos', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['profissional_id'], ['profissionais.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_agendas_profissionais_profissional_dia', 'agendas_profissionais', ['profissional_id', 'dia_semana'], unique=False)
+
+    # Índice único parcial: só existe em bancos com suporte a WHERE no índice.
+    # No MySQL a reserva é protegida pelo SELECT ... FOR UPDATE no profissional.
+    if op.get_bind().dialect.name in ('postgresql', 'sqlite'):
+        op.create_index(
+            'uq_consultas_profissional_horario', 'consultas', ['profissional_id', 'data', 'hora'],
+            unique=True,
+            postgresql_where=sa.text("status <> 'cancelada'"),
+            sqlite_where=sa.text("status <> 'cancelada'")
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name in ('postgresql', 'sqlite'):
+        op.drop_index('uq_consultas_profissional_horario', table_name='consultas')
+
+    op.drop_index('ix_agendas_profissionais_profissional_dia', table_name='agendas_profissionais')
+    op.drop_table('agendas_profissionais')
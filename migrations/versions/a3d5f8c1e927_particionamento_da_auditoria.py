@@ -0,0 +1,140 @@
+"""Particionamento mensal dos logs de auditoria
+
+Revision ID: a3d5f8c1e927
+Revises: 7f3b9e2a6c14
+Create Date: 2026-10-18 17:12:40.530914
+
+PostgreSQL: logs_auditoria passa a ser uma tabela particionada por
+RANGE (data_hora), com uma partição por mês e uma partição padrão.
+MySQL: a tabela é particionada por RANGE COLUMNS (data_hora), com a partição
+pmax (MAXVALUE) no final. O MySQL não aceita chaves estrangeiras em tabelas
+particionadas, então a FK para usuarios é removida nesse banco.
+
+Em ambos a chave primária passa a ser (id, data_hora), já que toda chave
+única precisa conter a coluna de particionamento. Nos demais bancos a tabela
+não muda; o arquivamento remove as linhas por intervalo de data_hora.
+
+As partições dos meses seguintes devem ser criadas periodicamente com:
+    flask manutencao particoes-auditoria
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d5f8c1e927'
+down_revision = '7f3b9e2a6c14'
+branch_labels = None
+depends_on = None
+
+MESES_ADIANTE = 3
+
+
+def soma_meses(mes, quantidade):
+    total = mes.year * 12 + mes.month - 1 + quantidade
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def meses_particionados(bind):
+    """Do mês do log mais antigo até MESES_ADIANTE meses após o atual (ou o log mais novo)."""
+    mais_antigo, mais_novo = bind.execute(sa.text("SELECT MIN(data_hora), MAX(data_hora) FROM logs_auditoria")).one()
+    hoje = date.today().replace(day=1)
+    mes = min(mais_antigo.date().replace(day=1), hoje) if mais_antigo else hoje
+    ultimo = soma_meses(max(mais_novo.date().replace(day=1), hoje) if mais_novo else hoje, MESES_ADIANTE)
+
+    meses = []
+
+    while mes <= ultimo:
+        meses.append(mes)
+        mes = soma_meses(mes, 1)
+
+    return meses
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        meses = meses_particionados(bind)
+
+        op.execute("DROP INDEX ix_logs_auditoria_usuario_data_hora")
+        op.execute("DROP INDEX ix_logs_auditoria_data_hora")
+        op.execute("ALTER TABLE logs_auditoria RENAME TO logs_auditoria_antiga")
+        op.execute("ALTER TABLE logs_auditoria_antiga RENAME CONSTRAINT logs_auditoria_pkey TO logs_auditoria_antiga_pkey")
+        op.execute("""
+            CREATE TABLE logs_auditoria (
+                id INTEGER NOT NULL DEFAULT nextval('logs_auditoria_id_seq'),
+                usuario_id INTEGER NOT NULL REFERENCES usuarios (id),
+                acao VARCHAR(255),
+                detalhes TEXT,
+                data_hora TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                PRIMARY KEY (id, data_hora)
+            ) PARTITION BY RANGE (data_hora)
+        """)
+        op.execute("CREATE TABLE logs_auditoria_padrao PARTITION OF logs_auditoria DEFAULT")
+
+        for mes in meses:
+            op.execute(
+                f"CREATE TABLE logs_auditoria_p{mes:%Y%m} PARTITION OF logs_auditoria "
+                f"FOR VALUES FROM ('{mes}') TO ('{soma_meses(mes, 1)}')"
+            )
+
+        op.execute("""
+            INSERT INTO logs_auditoria (id, usuario_id, acao, detalhes, data_hora)
+            SELECT id, usuario_id, acao, detalhes, data_hora FROM logs_auditoria_antiga
+        """)
+        op.execute("ALTER SEQUENCE logs_auditoria_id_seq OWNED BY logs_auditoria.id")
+        op.execute("DROP TABLE logs_auditoria_antiga")
+        op.create_index('ix_logs_auditoria_usuario_data_hora', 'logs_auditoria', ['usuario_id', 'data_hora'], unique=False)
+        op.create_index('ix_logs_auditoria_data_hora', 'logs_auditoria', ['data_hora'], unique=False)
+
+    elif bind.dialect.name in ("mysql", "mariadb"):
+        meses = meses_particionados(bind)
+        chaves = bind.execute(sa.text(
+            "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+            "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'logs_auditoria'"
+        )).scalars().all()
+
+        for nome in chaves:
+            op.execute(f"ALTER TABLE logs_auditoria DROP FOREIGN KEY {nome}")
+
+        op.execute("ALTER TABLE logs_auditoria DROP PRIMARY KEY, ADD PRIMARY KEY (id, data_hora)")
+
+        particoes = [f"PARTITION p{mes:%Y%m} VALUES LESS THAN ('{soma_meses(mes, 1)}')" for mes in meses]
+        particoes.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+        op.execute(f"ALTER TABLE logs_auditoria PARTITION BY RANGE COLUMNS (data_hora) ({', '.join(particoes)})")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_logs_auditoria_usuario_data_hora")
+        op.execute("DROP INDEX ix_logs_auditoria_data_hora")
+        op.execute("ALTER TABLE logs_auditoria RENAME TO logs_auditoria_particionada")
+        op.execute("ALTER TABLE logs_auditoria_particionada RENAME CONSTRAINT logs_auditoria_pkey TO logs_auditoria_particionada_pkey")
+        op.execute("""
+            CREATE TABLE logs_auditoria (
+                id INTEGER NOT NULL DEFAULT nextval('logs_auditoria_id_seq'),
+                usuario_id INTEGER NOT NULL REFERENCES usuarios (id),
+                acao VARCHAR(255),
+                detalhes TEXT,
+                data_hora TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                PRIMARY KEY (id)
+            )
+        """)
+        op.execute("""
+            INSERT INTO logs_auditoria (id, usuario_id, acao, detalhes, data_hora)
+            SELECT id, usuario_id, acao, detalhes, data_hora FROM logs_auditoria_particionada
+        """)
+        op.execute("ALTER SEQUENCE logs_auditoria_id_seq OWNED BY logs_auditoria.id")
+        op.execute("DROP TABLE logs_auditoria_particionada")
+        op.create_index('ix_logs_auditoria_usuario_data_hora', 'logs_auditoria', ['usuario_id', 'data_hora'], unique=False)
+        op.create_index('ix_logs_auditoria_data_hora', 'logs_auditoria', ['data_hora'], unique=False)
+
+    elif bind.dialect.name in ("mysql", "mariadb"):
+        op.execute("ALTER TABLE logs_auditoria REMOVE PARTITIONING")
+        op.execute("ALTER TABLE logs_auditoria DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        op.create_foreign_key(None, 'logs_auditoria', 'usuarios', ['usuario_id'], ['id'])
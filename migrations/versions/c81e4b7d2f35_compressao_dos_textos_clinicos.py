@@ -0,0 +1,174 @@
+"""Compressão de anotações, prescrições e detalhes da auditoria
+
+Revision ID: c81e4b7d2f35
+Revises: a3d5f8c1e927
+Create Date: 2026-10-18 18:03:27.648120
+
+As colunas passam a ser binárias (BYTEA / LONGBLOB) no formato de
+app/compressao.py, copiado abaixo. O texto existente é convertido para
+bytes UTF-8 sem mudança de conteúdo, o que já é um valor válido nesse
+formato, e depois recomprimido em lotes de LOTE linhas, fora da transação
+da migração (autocommit), para não manter as tabelas bloqueadas durante
+toda a recompressão. Se ela for interrompida, as linhas restantes
+continuam legíveis e basta rodar a migração de novo. Textos curtos, que
+não ficam menores comprimidos, não são regravados.
+
+No SQLite o tipo da coluna não é alterado (a afinidade aceita os bytes).
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81e4b7d2f35'
+down_revision = 'a3d5f8c1e927'
+branch_labels = None
+depends_on = None
+
+LOTE = 1000
+
+COLUNAS = [
+    ('prontuarios', 'anotacoes'),
+    ('prontuarios', 'prescricao'),
+    ('logs_auditoria', 'detalhes'),
+]
+
+
+# Cópia do formato de app/compressao.py nesta revisão, para que a migração
+# não mude junto com o código da aplicação:
+#   sem 0x00 no início  UTF-8 puro
+#   0x00 "z" + dados    zlib
+#   0x00 "s" + dados    zstd (só na leitura; a migração grava zlib)
+#   0x00 "n" + texto    UTF-8 puro que começaria com 0x00
+MARCADOR = b"\x00"
+TAMANHO_MINIMO = 128
+
+
+def comprime(texto):
+    dados = texto.encode('utf-8')
+
+    if len(dados) >= TAMANHO_MINIMO:
+        comprimido = MARCADOR + b"z" + zlib.compress(dados, 6)
+
+        if len(comprimido) < len(dados):
+            return comprimido
+
+    if dados.startswith(MARCADOR):
+        return MARCADOR + b"n" + dados
+
+    return dados
+
+
+def descomprime(dados):
+    if not dados.startswith(MARCADOR):
+        return dados.decode('utf-8')
+
+    formato, conteudo = dados[1:2], dados[2:]
+
+    if formato == b"z":
+        return zlib.decompress(conteudo).decode('utf-8')
+    if formato == b"s":
+        if zstandard is None:
+            raise RuntimeError("Valor comprimido com zstd; instale o pacote zstandard para revertê-lo.")
+        return zstandard.ZstdDecompressor().decompress(conteudo).decode('utf-8')
+    if formato == b"n":
+        return conteudo.decode('utf-8')
+
+    raise ValueError(f"Formato de compressão desconhecido: {formato!r}")
+
+
+def converte_em_lotes(bind, tabela, coluna, converte, tipo=sa.LargeBinary):
+    """Aplica `converte(valor)` a cada linha, lendo LOTE linhas por vez; None = não regrava."""
+    seleciona = sa.text(
+        f"SELECT id, {coluna} FROM {tabela} WHERE id > :ultimo AND {coluna} IS NOT NULL ORDER BY id LIMIT :lote"
+    )
+    atualiza = sa.text(f"UPDATE {tabela} SET {coluna} = :valor WHERE id = :id").bindparams(
+        sa.bindparam('valor', type_=tipo)
+    )
+    ultimo = 0
+
+    while True:
+        linhas = bind.execute(seleciona, {'ultimo': ultimo, 'lote': LOTE}).all()
+
+        if not linhas:
+            break
+
+        alteradas = []
+
+        for linha_id, valor in linhas:
+            novo = converte(valor)
+
+            if novo is not None:
+                alteradas.append({'id': linha_id, 'valor': novo})
+
+        if alteradas:
+            bind.execute(atualiza, alteradas)
+
+        ultimo = linhas[-1][0]
+
+
+def recomprime(valor):
+    dados = valor.encode('utf-8') if isinstance(valor, str) else bytes(valor)
+
+    if dados.startswith(MARCADOR):
+        return None
+
+    novo = comprime(dados.decode('utf-8'))
+    return novo if novo != dados else None
+
+
+def descomprime_texto(valor):
+    dados = valor.encode('utf-8') if isinstance(valor, str) else bytes(valor)
+    return descomprime(dados) if dados.startswith(MARCADOR) else None
+
+
+def descomprime_bytes(valor):
+    texto = descomprime_texto(valor)
+    return texto.encode('utf-8') if texto is not None else None
+
+
+def coluna_binaria(bind, tabela, coluna):
+    tipos = {c['name']: c['type'] for c in sa.inspect(bind).get_columns(tabela)}
+    return isinstance(tipos[coluna], sa.types._Binary)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    for tabela, coluna in COLUNAS:
+        # Já convertida por uma execução anterior interrompida na recompressão
+        if coluna_binaria(bind, tabela, coluna):
+            continue
+
+        if bind.dialect.name == 'postgresql':
+            op.execute(f"ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE BYTEA USING convert_to({coluna}, 'UTF8')")
+        elif bind.dialect.name in ('mysql', 'mariadb'):
+            op.execute(f"ALTER TABLE {tabela} MODIFY {coluna} LONGBLOB NULL")
+
+    with op.get_context().autocommit_block():
+        for tabela, coluna in COLUNAS:
+            converte_em_lotes(bind, tabela, coluna, recomprime)
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    with op.get_context().autocommit_block():
+        for tabela, coluna in COLUNAS:
+            # Antes do ALTER a coluna ainda é binária, exceto no SQLite
+            if bind.dialect.name == 'sqlite':
+                converte_em_lotes(bind, tabela, coluna, descomprime_texto, sa.Text)
+            else:
+                converte_em_lotes(bind, tabela, coluna, descomprime_bytes)
+
+    for tabela, coluna in COLUNAS:
+        if bind.dialect.name == 'postgresql':
+            op.execute(f"ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE TEXT USING convert_from({coluna}, 'UTF8')")
+        elif bind.dialect.name in ('mysql', 'mariadb'):
+            op.execute(f"ALTER TABLE {tabela} MODIFY {coluna} TEXT NULL")
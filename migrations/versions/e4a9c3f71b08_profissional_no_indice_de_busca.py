@@ -0,0 +1,45 @@
+"""Profissional nas entradas do índice de busca dos prontuários
+
+Revision ID: e4a9c3f71b08
+Revises: c81e4b7d2f35
+Create Date: 2026-10-18 21:12:40.503317
+
+A busca é sempre restrita às consultas do profissional: com a coluna no
+próprio índice ela deixa de ler e juntar as entradas de todos os
+profissionais antes de filtrar.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c3f71b08'
+down_revision = 'c81e4b7d2f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('termos_prontuarios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profissional_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE termos_prontuarios SET profissional_id = ("
+        " SELECT consultas.profissional_id FROM prontuarios"
+        " JOIN consultas ON consultas.id = prontuarios.consulta_id"
+        " WHERE prontuarios.id = termos_prontuarios.prontuario_id)"
+    )
+
+    with op.batch_alter_table('termos_prontuarios', schema=None) as batch_op:
+        batch_op.alter_column('profissional_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_termos_prontuarios_profissional_id', 'profissionais', ['profissional_id'], ['id'])
+        batch_op.drop_index('ix_termos_prontuarios_termo_paciente')
+        batch_op.create_index('ix_termos_prontuarios_termo_profissional', ['termo', 'profissional_id', 'paciente_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('termos_prontuarios', schema=None) as batch_op:
+        batch_op.drop_index('ix_termos_prontuarios_termo_profissional')
+        batch_op.create_index('ix_termos_prontuarios_termo_paciente', ['termo', 'paciente_id'], unique=False)
+        batch_op.drop_constraint('fk_termos_prontuarios_profissional_id', type_='foreignkey')
+        batch_op.drop_column('profissional_id')